@@ -0,0 +1,185 @@
+"""
+Benchmarks of the core pipeline on plain Python
+
+Runs :mod:`bpsci.core` against the recording ``bpy``/``mathutils`` stand-ins in ``benchmarks/stubs`` with the example
+datasets interpolated up to larger sample counts, and reports the wall time, peak traced memory and number of bpy
+calls of each step::
+
+    python benchmarks/bench_core.py
+    python benchmarks/bench_core.py --sizes 1e4 1e5 1e6 1e7 --json results.json
+    python benchmarks/bench_core.py --legacy    # also time the per-frame keyframe_insert path
+
+By default there is one sample per frame, which is the densest keying bpsci produces. The stub does not evaluate
+anything, so the times are those of bpsci and the bpy calls it makes, not of Blender.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [os.path.join(HERE, 'stubs'), ROOT]
+
+import bpy
+import bpsci.core as bpsci_core
+from bpsci.utils import euler2quat
+
+GALLILEO = os.path.join(ROOT, 'examples', 'gallileo', 'gallileo.csv')
+ORB_INT = os.path.join(ROOT, 'examples', 'orbital_intercept', 'orb_int_data.csv')
+
+LEGACY_MAX = 10**5
+"""The per-frame path makes several bpy calls per sample, so it is only run up to this many samples"""
+
+def read_csv(filepath):
+    """Reads a numeric CSV into a dict of columns"""
+
+    with open(filepath, encoding='utf-8-sig') as f:
+        header = f.readline().strip().split(',')
+    values = np.loadtxt(filepath, delimiter=',', skiprows=1, ndmin=2)
+    return {name: values[:, i] for i, name in enumerate(header) if name}
+
+def scale_up(table, n, t_col='t'):
+    """Linearly interpolates every column of a dataset onto ``n`` evenly spaced times"""
+
+    t = table[t_col]
+    t_new = np.linspace(t[0], t[-1], n)
+    return {name: np.interp(t_new, t, col) for name, col in table.items()}
+
+def measure(name, n, setup, legacy=False):
+    """
+    Times one step and counts its bpy calls, then runs it again on a fresh scene to trace its peak memory
+    (tracing slows Python code down too much to time it at the same time)
+    """
+
+    fn = setup()
+    bpy.calls.clear()
+    start = time.perf_counter()
+    fn()
+    wall = time.perf_counter() - start
+    calls = dict(bpy.calls)
+
+    fn = setup()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'step': name + (' (per-frame)' if legacy else ''), 'samples': n, 'wall_s': wall, 'peak_mb': peak/2**20,
+            'bpy_calls': sum(calls.values()), 'calls': calls}
+
+def fresh_scene():
+    bpy.reset()
+    bpsci_core._text_tables.clear()
+    bpsci_core._swarms.clear()
+
+def run(n, samples_per_frame, legacy):
+    """Benchmarks every step at one sample count"""
+
+    gal = scale_up(read_csv(GALLILEO), n)
+    orb = scale_up(read_csv(ORB_INT), n)
+    quat = euler2quat(gal['psi'], gal['theta'], gal['phi'], 'zxz')
+    fps = 24
+
+    def new_anim(t):
+        # the speed up that gives the requested number of samples per frame
+        fresh_scene()
+        return bpsci_core.init_anim(t, t[-1]*fps*samples_per_frame/len(t), 1)
+
+    def init_anim():
+        fresh_scene()
+        return lambda: new_anim(gal['t'])
+
+    def apply_animation(bulk, flatten=False):
+        def setup():
+            craft = bpsci_core.dyn_obj(bpy.data.objects.new('gallileo', None), [.1, 0, 0], [.1, 0, 0], 'xyz', None,
+                                       new_anim(gal['t']), flatten)
+            return lambda: craft.apply_animation(gal['x'], gal['y'], gal['z'], quat, bulk=bulk)
+        return setup
+
+    def extend():
+        # a checkpoint that adds the last 1% of the samples to an animation of the rest
+        m = n - max(n // 100, 1)
+        craft = bpsci_core.dyn_obj(bpy.data.objects.new('gallileo', None), [.1, 0, 0], [.1, 0, 0], 'xyz', None,
+                                   new_anim(gal['t'][:m]))
+        craft.apply_animation(gal['x'][:m], gal['y'][:m], gal['z'][:m], quat[:m])
+        craft.apply_streamline('dynamic', gal['x'][:m], gal['y'][:m], gal['z'][:m], .1)
+        # the first extension converts the streamline's bevel to a driver, that is not what is measured
+        craft.anim.extend(gal['t'][m:m + 1])
+        craft.extend(gal['x'][m:m + 1], gal['y'][m:m + 1], gal['z'][m:m + 1], quat[m:m + 1])
+        craft.extend_streamline(gal['x'][m:m + 1], gal['y'][m:m + 1], gal['z'][m:m + 1])
+        m += 1
+
+        def step():
+            craft.anim.extend(gal['t'][m:])
+            craft.extend(gal['x'][m:], gal['y'][m:], gal['z'][m:], quat[m:])
+            craft.extend_streamline(gal['x'][m:], gal['y'][m:], gal['z'][m:])
+        return step
+
+    def apply_streamline(lod_tol=None, sides=None):
+        def setup():
+            sat = bpsci_core.dyn_obj(bpy.data.objects.new('sat', None), [0, 0, 0], [0, 0, 0], 'xyz', None,
+                                     new_anim(orb['t']))
+            if sides is not None:
+                return lambda: sat.apply_streamline('static', orb['r1'], orb['r2'], orb['r3'], .1, sides=sides)
+            return lambda: sat.apply_streamline('dynamic', orb['r1'], orb['r2'], orb['r3'], .1, lod_tol)
+        return setup
+
+    # a level of detail of 1/10000th of the orbit's extent
+    extent = max(np.ptp(orb[c]) for c in ('r1', 'r2', 'r3'))
+
+    def animate():
+        vec = bpsci_core.dyn_vec(None, 'velocity', 1, 1, (0, 0, 0), new_anim(gal['t']))
+        return lambda: vec.animate(gal['v_x'], gal['v_y'], gal['v_z'])
+
+    def vector_field():
+        anim = new_anim(gal['t'])
+        positions = np.column_stack([gal['x'], gal['y'], gal['z']])[None]
+        vectors = np.column_stack([gal['v_x'], gal['v_y'], gal['v_z']])[None]
+        return lambda: bpsci_core.vector_field('velocity', None, anim, positions, vectors)
+
+    def anim_text():
+        anim = new_anim(gal['t'])
+        return lambda: bpsci_core.anim_text('x', None, anim, gal['x'], 'x = ', 2, False)
+
+    results = [measure('init_anim', n, init_anim),
+               measure('dyn_obj.apply_animation', n, apply_animation(True))]
+    if legacy and n <= LEGACY_MAX:
+        results.append(measure('dyn_obj.apply_animation', n, apply_animation(False), legacy=True))
+    results.append(measure('dyn_obj.apply_animation (flatten)', n, apply_animation(True, True)))
+    results += [measure('init_anim/dyn_obj.extend (1%)', n, extend),
+                measure('dyn_obj.apply_streamline', n, apply_streamline()),
+                measure('dyn_obj.apply_streamline (lod)', n, apply_streamline(extent*1e-4)),
+                measure('dyn_obj.apply_streamline (tube mesh)', n, apply_streamline(sides=8)),
+                measure('dyn_vec.animate', n, animate),
+                measure('vector_field', n, vector_field),
+                measure('anim_text', n, anim_text)]
+    return results
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=float, default=[1e4, 1e5, 1e6], help='sample counts to run')
+    parser.add_argument('--samples-per-frame', type=float, default=1, help='dataset samples per animation frame')
+    parser.add_argument('--legacy', action='store_true', help='also time the per-frame keyframe_insert path')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    results = []
+    print('%-36s %10s %10s %10s %10s' % ('step', 'samples', 'wall [s]', 'peak [MB]', 'bpy calls'))
+    for n in args.sizes:
+        for row in run(int(n), args.samples_per_frame, args.legacy):
+            print('%-36s %10d %10.3f %10.1f %10d' % (row['step'], row['samples'], row['wall_s'], row['peak_mb'], row['bpy_calls']))
+            results.append(row)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+if __name__ == '__main__':
+    main()
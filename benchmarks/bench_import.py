@@ -0,0 +1,101 @@
+"""
+Import time of the bpsci modules
+
+Imports each module in a fresh interpreter, against the ``bpy``/``mathutils`` stand-ins in ``benchmarks/stubs``,
+and reports the best wall time of a few runs and which heavy optional dependencies the import pulled in. With a
+budget it is a regression check, the exit status is 1 if a module goes over it or imports a forbidden package::
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --max-ms 500 --forbid scipy pandas
+    python benchmarks/bench_import.py --top 10    # the slowest imports underneath each module
+
+The times include NumPy, which every module needs, so the difference between modules is what they add on top.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+MODULES = ['bpsci.core', 'bpsci.plan', 'bpsci.utils', 'bpsci.resample', 'bpsci.tube', 'bpsci.store', 'bpsci.cache',
+           'bpsci.batch', 'bpsci.stream']
+"""The modules timed by default"""
+
+HEAVY = ['scipy', 'pandas', 'matplotlib']
+"""Packages reported when an import pulls them in"""
+
+_SCRIPT = '''
+import sys, time, json
+sys.path[:0] = %r
+start = time.perf_counter()
+import %s
+wall = time.perf_counter() - start
+print(json.dumps({'wall_s': wall, 'heavy': [m for m in %r if m in sys.modules]}))
+'''
+
+def measure(module, repeat=5):
+    """The best wall time of importing a module in a fresh interpreter, and the heavy packages it loaded"""
+
+    path = [os.path.join(HERE, 'stubs'), ROOT]
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', _SCRIPT % (path, module, HEAVY)], check=True,
+                             capture_output=True, text=True).stdout
+        row = json.loads(out.splitlines()[-1])
+        if best is None or row['wall_s'] < best['wall_s']:
+            best = row
+    return dict(best, module=module)
+
+def slowest(module, n):
+    """The ``n`` imports with the largest self time underneath a module, from ``python -X importtime``"""
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(HERE, 'stubs'), ROOT]))
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module], check=True, env=env,
+                         capture_output=True, text=True).stderr
+
+    rows = []
+    for line in err.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[0].split(':')[-1].strip().isdigit():
+            rows.append((int(parts[0].split(':')[-1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:n]
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('modules', nargs='*', default=MODULES, help='modules to import')
+    parser.add_argument('--repeat', type=int, default=5, help='imports per module, the best one is reported')
+    parser.add_argument('--max-ms', type=float, help='fail if a module takes longer than this to import')
+    parser.add_argument('--forbid', nargs='*', default=[], help='fail if a module imports one of these packages')
+    parser.add_argument('--top', type=int, default=0, help='also list the slowest imports underneath each module')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    results = []
+    failed = False
+    print('%-20s %10s  %s' % ('module', 'wall [ms]', 'heavy imports'))
+    for module in args.modules:
+        row = measure(module, args.repeat)
+        over = args.max_ms is not None and row['wall_s']*1e3 > args.max_ms
+        forbidden = [m for m in row['heavy'] if m in args.forbid]
+        failed |= over or bool(forbidden)
+        print('%-20s %10.1f  %s%s' % (module, row['wall_s']*1e3, ', '.join(row['heavy']) or '-',
+                                      '  <- over budget' if over else ''))
+        if forbidden:
+            print('%-20s %10s  forbidden: %s' % ('', '', ', '.join(forbidden)))
+        for us, name in slowest(module, args.top) if args.top else ():
+            print('%-20s %10.1f    %s' % ('', us/1e3, name))
+        results.append(row)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
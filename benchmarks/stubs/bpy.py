@@ -0,0 +1,610 @@
+"""
+A recording stand-in for Blender's ``bpy`` module, for benchmarking bpsci on plain Python.
+
+It implements just enough of the data API that bpsci touches (objects, curves, meshes, actions, F-curves,
+keyframe points, spline points, handlers, ...) on top of numpy arrays, and counts every call and property write
+that would cross into Blender's RNA in :data:`calls`. It does not evaluate anything.
+"""
+
+import types
+from collections import Counter
+
+import numpy as np
+
+calls = Counter()
+"""Number of RNA calls and property writes by name since the last :func:`reset`"""
+
+def _rec(name, n=1):
+    calls[name] += n
+
+_INTERPOLATION = ['CONSTANT', 'LINEAR', 'BEZIER']
+
+class _Array(list):
+    """A float vector property (location, scale, ...), item writes are RNA writes"""
+
+    def __setitem__(self, i, v):
+        _rec('prop.set')
+        list.__setitem__(self, i, float(v))
+
+class _RNA:
+    """Property writes on public attributes are recorded"""
+
+    _vectors = ()
+
+    def __setattr__(self, k, v):
+        if not k.startswith('_'):
+            _rec('prop.set')
+            if k in self._vectors:
+                v = _Array(float(x) for x in v)
+        object.__setattr__(self, k, v)
+
+class Keyframe:
+    """A view of one keyframe point"""
+
+    def __init__(self, points, i):
+        self._points = points
+        self._i = i
+
+    @property
+    def co(self):
+        return tuple(self._points._co[self._i])
+
+    @co.setter
+    def co(self, value):
+        _rec('prop.set')
+        self._points._co[self._i] = value
+
+    @property
+    def interpolation(self):
+        return _INTERPOLATION[self._points._interp[self._i]]
+
+    @interpolation.setter
+    def interpolation(self, value):
+        _rec('prop.set')
+        self._points._interp[self._i] = _INTERPOLATION.index(value)
+
+class KeyframePoints:
+
+    def __init__(self):
+        self._arrays = (np.zeros((0, 2)), np.zeros(0, dtype=np.int32))
+        self._pending = {}
+
+    @property
+    def _co(self):
+        return self._flush()[0]
+
+    @property
+    def _interp(self):
+        return self._flush()[1]
+
+    def _flush(self):
+        # keys from keyframe_insert are merged in lazily, so the stub does not dominate per-frame timings
+        if self._pending:
+            co, interp = self._arrays
+            new = np.array(sorted(self._pending.items()), dtype=float).reshape(-1, 2)
+            self._pending = {}
+            replaced = np.isin(co[:, 0], new[:, 0])
+            co = np.concatenate([co[~replaced], new])
+            interp = np.concatenate([interp[~replaced], np.full(len(new), 2, dtype=np.int32)])
+            order = np.argsort(co[:, 0], kind='stable')
+            self._arrays = (co[order], interp[order])
+        return self._arrays
+
+    def __len__(self):
+        return len(self._co)
+
+    def __iter__(self):
+        return (Keyframe(self, i) for i in range(len(self)))
+
+    def __getitem__(self, i):
+        return Keyframe(self, range(len(self))[i])
+
+    def add(self, count):
+        _rec('keyframe_points.add')
+        co, interp = self._flush()
+        self._arrays = (np.concatenate([co, np.zeros((count, 2))]),
+                        np.concatenate([interp, np.full(count, 2, dtype=np.int32)]))
+
+    def clear(self):
+        _rec('keyframe_points.clear')
+        self.__init__()
+
+    def foreach_set(self, attr, seq):
+        _rec('keyframe_points.foreach_set')
+        if attr == 'co':
+            self._co[:] = np.asarray(seq, dtype=float).reshape(-1, 2)
+        elif attr == 'interpolation':
+            self._interp[:] = seq
+        else:
+            raise AttributeError(attr)
+
+    def foreach_get(self, attr, seq):
+        _rec('keyframe_points.foreach_get')
+        if attr == 'co':
+            seq[:] = self._co.ravel()
+        elif attr == 'interpolation':
+            seq[:] = self._interp
+        else:
+            raise AttributeError(attr)
+
+    def _insert(self, frame, value):
+        # what keyframe_insert does: replace a key on the same frame or insert one
+        self._pending[frame] = value
+
+class FCurve(_RNA):
+
+    def __init__(self, data_path, index, group):
+        self._data_path = data_path
+        self._index = index
+        self._group = types.SimpleNamespace(name=group) if group else None
+        self._keyframe_points = KeyframePoints()
+
+    data_path = property(lambda self: self._data_path)
+    array_index = property(lambda self: self._index)
+    group = property(lambda self: self._group)
+    keyframe_points = property(lambda self: self._keyframe_points)
+
+    def update(self):
+        _rec('fcurve.update')
+        co, interp = self._keyframe_points._flush()
+        if np.any(co[1:, 0] < co[:-1, 0]):
+            order = np.argsort(co[:, 0], kind='stable')
+            self._keyframe_points._arrays = (co[order], interp[order])
+
+class FCurves(list):
+
+    def new(self, data_path, index=0, action_group=''):
+        _rec('fcurves.new')
+        if self.find(data_path, index=index) is not None:
+            raise RuntimeError('F-Curve %r[%d] already exists' % (data_path, index))
+        fc = FCurve(data_path, index, action_group)
+        self.append(fc)
+        return fc
+
+    def find(self, data_path, index=0):
+        _rec('fcurves.find')
+        for fc in self:
+            if fc.data_path == data_path and fc.array_index == index:
+                return fc
+
+    def remove(self, fc):
+        _rec('fcurves.remove')
+        list.remove(self, fc)
+
+class Variables(list):
+
+    def new(self):
+        _rec('variables.new')
+        self.append(types.SimpleNamespace(name='var', type='SINGLE_PROP',
+                                          targets=[types.SimpleNamespace(id_type='OBJECT', id=None, data_path='')]))
+        return self[-1]
+
+class ID(_RNA):
+
+    def __init__(self, name):
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'animation_data', None)
+        self._props = {}
+
+    def __getitem__(self, key):
+        return self._props[key]
+
+    def __setitem__(self, key, value):
+        _rec('prop.set')
+        self._props[key] = value
+
+    def __contains__(self, key):
+        return key in self._props
+
+    def get(self, key, default=None):
+        return self._props.get(key, default)
+
+    def animation_data_create(self):
+        _rec('animation_data_create')
+        if self.animation_data is None:
+            object.__setattr__(self, 'animation_data', types.SimpleNamespace(action=None, drivers=FCurves()))
+        return self.animation_data
+
+    def driver_add(self, data_path, index=-1):
+        _rec('driver_add')
+        ad = self.animation_data_create()
+        fc = ad.drivers.new(data_path, index=max(index, 0))
+        object.__setattr__(fc, 'driver', types.SimpleNamespace(type='AVERAGE', expression='', variables=Variables()))
+        return fc
+
+    def keyframe_insert(self, data_path, frame=None, index=-1, group=None):
+        _rec('keyframe_insert')
+        ad = self.animation_data_create()
+        if ad.action is None:
+            ad.action = data.actions.new(self.name + 'Action')
+        if data_path.startswith('['):
+            value = self._props[data_path[2:-2]]
+        else:
+            value = getattr(self, data_path)
+        values = list(value) if hasattr(value, '__len__') else [value]
+        if group is None and isinstance(self, Object) and data_path in ('location', 'rotation_quaternion', 'rotation_euler', 'scale'):
+            group = 'Object Transforms'
+        for i, v in enumerate(values):
+            if index >= 0 and i != index:
+                continue
+            fc = ad.action.fcurves.find(data_path, index=i)
+            if fc is None:
+                fc = ad.action.fcurves.new(data_path, index=i, action_group=group or '')
+            fc.keyframe_points._insert(float(frame), float(v))
+        return True
+
+class Constraints(list):
+
+    def new(self, type):
+        _rec('constraints.new')
+        con = types.SimpleNamespace(type=type, target=None, track_axis=None, name=type.title())
+        self.append(con)
+        return con
+
+    def remove(self, con):
+        _rec('constraints.remove')
+        list.remove(self, con)
+
+class Modifiers(list):
+
+    def new(self, name, type):
+        _rec('modifiers.new')
+        mod = types.SimpleNamespace(name=name, type=type, node_group=None)
+        self.append(mod)
+        return mod
+
+class Object(ID):
+
+    _vectors = ('location', 'rotation_quaternion', 'rotation_euler', 'scale')
+
+    def __init__(self, name, object_data=None):
+        ID.__init__(self, name)
+        for k, v in (('location', (0, 0, 0)), ('rotation_quaternion', (1, 0, 0, 0)),
+                     ('rotation_euler', (0, 0, 0)), ('scale', (1, 1, 1))):
+            object.__setattr__(self, k, _Array(float(x) for x in v))
+        for k, v in (('data', object_data), ('parent', None), ('rotation_mode', 'XYZ'),
+                     ('empty_display_type', 'PLAIN_AXES'), ('matrix_world', None), ('hide_viewport', False),
+                     ('hide_render', False)):
+            object.__setattr__(self, k, v)
+        object.__setattr__(self, 'constraints', Constraints())
+        object.__setattr__(self, 'modifiers', Modifiers())
+
+    def select_set(self, state):
+        _rec('select_set')
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    @property
+    def users_collection(self):
+        scene = context.scene.collection
+        return [scene] if any(ob is self for ob in scene.objects) else []
+
+class SplinePoint:
+    """A view of one spline point"""
+
+    def __init__(self, points, i):
+        self._points = points
+        self._i = i
+
+    @property
+    def co(self):
+        return tuple(self._points._co[self._i])
+
+    @co.setter
+    def co(self, value):
+        _rec('prop.set')
+        self._points._co[self._i] = value
+
+class SplinePoints:
+
+    def __init__(self):
+        self._co = np.array([[0.0, 0.0, 0.0, 1.0]])
+
+    def __len__(self):
+        return len(self._co)
+
+    def __iter__(self):
+        return (SplinePoint(self, i) for i in range(len(self)))
+
+    def __getitem__(self, i):
+        return SplinePoint(self, range(len(self))[i])
+
+    def add(self, count):
+        _rec('points.add')
+        new = np.zeros((count, 4))
+        new[:, 3] = 1
+        self._co = np.concatenate([self._co, new])
+
+    def foreach_set(self, attr, seq):
+        _rec('points.foreach_set')
+        self._co[:] = np.asarray(seq, dtype=float).reshape(-1, 4)
+
+    def foreach_get(self, attr, seq):
+        _rec('points.foreach_get')
+        seq[:] = self._co.ravel()
+
+class Splines(list):
+
+    def new(self, type):
+        _rec('splines.new')
+        spline = types.SimpleNamespace(type=type, points=SplinePoints())
+        self.append(spline)
+        return spline
+
+class Curve(ID):
+
+    def __init__(self, name, type='CURVE'):
+        ID.__init__(self, name)
+        for k, v in (('type', type), ('dimensions', '2D'), ('bevel_depth', 0.0), ('bevel_factor_start', 0.0),
+                     ('bevel_factor_end', 1.0), ('bevel_factor_mapping_start', 'RESOLUTION'),
+                     ('bevel_factor_mapping_end', 'RESOLUTION'), ('body', '')):
+            object.__setattr__(self, k, v)
+        object.__setattr__(self, 'splines', Splines())
+
+class Vertices:
+
+    def __init__(self):
+        self._co = np.zeros((0, 3))
+
+    def __len__(self):
+        return len(self._co)
+
+    def add(self, count):
+        _rec('vertices.add')
+        self._co = np.concatenate([self._co, np.zeros((count, 3))])
+
+    def foreach_set(self, attr, seq):
+        _rec('vertices.foreach_set')
+        self._co[:] = np.asarray(seq, dtype=float).reshape(-1, 3)
+
+    def foreach_get(self, attr, seq):
+        _rec('vertices.foreach_get')
+        seq[:] = self._co.ravel()
+
+class Attribute:
+
+    def __init__(self, name, type, domain):
+        self.name = name
+        self.data_type = type
+        self.domain = domain
+        self.values = None
+
+    @property
+    def data(self):
+        return self
+
+    def foreach_set(self, attr, seq):
+        _rec('attribute.foreach_set')
+        self.values = np.array(seq)
+
+class Attributes(dict):
+
+    def new(self, name, type, domain):
+        _rec('attributes.new')
+        self[name] = Attribute(name, type, domain)
+        return self[name]
+
+class Elements:
+    """Mesh loops or polygons, each attribute set in bulk is kept as an array"""
+
+    def __init__(self):
+        self._count = 0
+        self._attrs = {}
+
+    def __len__(self):
+        return self._count
+
+    def add(self, count):
+        _rec('elements.add')
+        self._count += count
+
+    def foreach_set(self, attr, seq):
+        _rec('elements.foreach_set')
+        self._attrs[attr] = np.array(seq).reshape(self._count, -1).squeeze(axis=1)
+
+class Mesh(ID):
+
+    def __init__(self, name):
+        ID.__init__(self, name)
+        object.__setattr__(self, 'vertices', Vertices())
+        object.__setattr__(self, 'loops', Elements())
+        object.__setattr__(self, 'polygons', Elements())
+        object.__setattr__(self, 'attributes', Attributes())
+
+    def from_pydata(self, vertices, edges, faces):
+        _rec('from_pydata')
+        self.vertices._co = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        object.__setattr__(self, 'polygons', [list(f) for f in faces])
+
+    def update(self):
+        _rec('mesh.update')
+
+class Socket:
+
+    def __init__(self, name, enabled=True):
+        self.name = name
+        self.enabled = enabled
+        self.default_value = None
+
+class Sockets(list):
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            for socket in self:
+                if socket.name == key:
+                    return socket
+            self.append(Socket(key))
+            return self[-1]
+        return list.__getitem__(self, key)
+
+    def new(self, type, name):
+        self.append(Socket(name))
+        return self[-1]
+
+class Node:
+
+    def __init__(self, type):
+        self.bl_idname = type
+        self.inputs = Sockets()
+        self.outputs = Sockets()
+        self.data_type = None
+        if type == 'GeometryNodeInputNamedAttribute':
+            self.outputs.append(Socket('Attribute'))
+
+class Nodes(list):
+
+    def new(self, type):
+        _rec('nodes.new')
+        self.append(Node(type))
+        return self[-1]
+
+class Links(list):
+
+    def new(self, a, b):
+        _rec('links.new')
+        self.append((a, b))
+
+class NodeTree(ID):
+
+    def __init__(self, name, type):
+        ID.__init__(self, name)
+        for k in ('nodes', 'links', 'inputs', 'outputs'):
+            object.__setattr__(self, k, {'nodes': Nodes, 'links': Links}.get(k, Sockets)())
+
+class Action(ID):
+
+    def __init__(self, name):
+        ID.__init__(self, name)
+        object.__setattr__(self, 'fcurves', FCurves())
+
+class Collection(list):
+    """A ``bpy.data`` collection, names are made unique like Blender does"""
+
+    def __init__(self, factory=None, kind=''):
+        list.__init__(self)
+        self._factory = factory
+        self._kind = kind
+        self._names = {}
+
+    def new(self, name, *args, **kwargs):
+        _rec(self._kind + '.new')
+        item = self._factory(name, *args, **kwargs)
+        unique = name
+        i = 0
+        while unique in self._names:
+            i += 1
+            unique = '%s.%03d' % (name, i)
+        object.__setattr__(item, 'name', unique)
+        self.append(item)
+        self._names[unique] = item
+        return item
+
+    def _rename(self):
+        self._names = {item.name: item for item in self}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            self._rename()
+            return self._names[key]
+        return list.__getitem__(self, key)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            self._rename()
+            return key in self._names
+        return any(item is key for item in self)
+
+    def get(self, key, default=None):
+        self._rename()
+        return self._names.get(key, default)
+
+    def remove(self, item, do_unlink=True):
+        _rec(self._kind + '.remove')
+        for i, other in enumerate(self):
+            if other is item:
+                del self[i]
+                break
+        self._rename()
+
+    def link(self, item):
+        _rec('collection.link')
+        self.append(item)
+
+    def unlink(self, item):
+        _rec('collection.unlink')
+        list.remove(self, item)
+
+class Scene(_RNA):
+
+    def __init__(self):
+        for k, v in (('name', 'Scene'), ('frame_start', 1), ('frame_end', 250), ('frame_current', 1),
+                     ('render', types.SimpleNamespace(fps=24)),
+                     ('collection', types.SimpleNamespace(objects=Collection(kind='scene')))):
+            object.__setattr__(self, k, v)
+
+    def frame_set(self, frame):
+        _rec('frame_set')
+        object.__setattr__(self, 'frame_current', frame)
+        for handler in app.handlers.frame_change_pre:
+            handler(self, None)
+
+data = types.SimpleNamespace()
+context = types.SimpleNamespace()
+app = types.SimpleNamespace()
+
+# '//' paths are relative to the .blend file, which is the working directory here
+path = types.SimpleNamespace(abspath=lambda p: p[2:] if p.startswith('//') else p)
+
+def _batch_remove(ids):
+    _rec('batch_remove')
+    ids = list(ids)
+    for coll in (data.objects, data.curves, data.meshes, data.actions, data.node_groups):
+        coll[:] = [item for item in coll if not any(item is i for i in ids)]
+        coll._rename()
+
+def _new_from_object(ob, depsgraph=None):
+    _rec('new_from_object')
+    return data.meshes.new(ob.name)
+
+def reset():
+    """Empties the stub scene and the call counter"""
+
+    calls.clear()
+
+    data.objects = Collection(Object, 'objects')
+    data.curves = Collection(Curve, 'curves')
+    data.meshes = Collection(Mesh, 'meshes')
+    data.actions = Collection(Action, 'actions')
+    data.node_groups = Collection(NodeTree, 'node_groups')
+    data.batch_remove = _batch_remove
+    data.meshes.new_from_object = _new_from_object
+
+    scene = Scene()
+    context.scene = scene
+    context.collection = scene.collection
+    context.object = None
+    context.selected_objects = []
+    context.view_layer = types.SimpleNamespace(objects=types.SimpleNamespace(active=None))
+    context.evaluated_depsgraph_get = lambda: None
+
+    app.version = (4, 1, 0)
+    app.handlers = types.SimpleNamespace(frame_change_pre=[], frame_change_post=[], load_post=[],
+                                         persistent=lambda f: f)
+    app.timers = types.SimpleNamespace(register=lambda f, first_interval=0, persistent=False: None,
+                                       unregister=lambda f: None, is_registered=lambda f: False)
+
+reset()
+
+def _text_add(**kwargs):
+    ob = data.objects.new('Text', data.curves.new('Text', 'FONT'))
+    context.scene.collection.objects.link(ob)
+    context.object = ob
+
+def _import_obj(filepath, **kwargs):
+    ob = data.objects.new('Plane', data.meshes.new('Plane'))
+    context.scene.collection.objects.link(ob)
+    context.selected_objects = [ob]
+
+ops = types.SimpleNamespace(object=types.SimpleNamespace(text_add=_text_add),
+                            import_scene=types.SimpleNamespace(obj=_import_obj))
@@ -0,0 +1,18 @@
+"""
+A stand-in for Blender's ``mathutils`` module, see :mod:`bpy` in this directory.
+"""
+
+import numpy as np
+
+class Vector(tuple):
+
+    def __new__(cls, seq=(0.0, 0.0, 0.0)):
+        return tuple.__new__(cls, (float(v) for v in seq))
+
+    x = property(lambda self: self[0])
+    y = property(lambda self: self[1])
+    z = property(lambda self: self[2])
+
+    @property
+    def length(self):
+        return float(np.linalg.norm(self))
@@ -0,0 +1,228 @@
+"""
+Batch Precomputation for Many-Object Scenes - :mod:`bpsci.batch`
+================================================================
+Computes the animation tracks of many :class:`~bpsci.core.dyn_obj` in a process pool, outside of Blender.
+
+The input columns are copied once into shared memory that every worker reads. Each object's tracks are written
+straight into a shared memory block allocated for it, so the resulting :class:`shared_plan` is a set of views
+and nothing is copied back. Only :func:`bpsci.core.apply_plan` is left for Blender's Python thread.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from bpsci.plan import anim_clock, anim_plan, track
+from bpsci.resample import euler_to_quat
+
+class shared_plan(anim_plan):
+    """
+    An :class:`~bpsci.plan.anim_plan` whose arrays live in shared memory. Call :meth:`close` (or use it as a context
+    manager) once the plan has been applied to free the memory.
+
+    .. versionadded:: 0.3.6
+
+    :param anim: the animation clock the plan is built on
+    :type anim: :class:`~bpsci.plan.anim_clock`
+    """
+
+    def __init__(self, anim):
+
+        anim_plan.__init__(self, anim)
+
+        self.blocks = []
+        """:type: `list`: the :class:`multiprocessing.shared_memory.SharedMemory` blocks backing the plan"""
+
+    def close(self):
+        """
+        Drops every track and releases the shared memory
+        """
+
+        self.tracks = {}
+        self.streamlines = {}
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _columns(spec):
+    """The table columns one object spec reads"""
+
+    cols = [spec['x'], spec['y'], spec['z']]
+    cols += list(spec.get('angles', ()))
+    cols += list(spec.get('quat', ()))
+    return cols
+
+def _layout(spec, n_samples, n_frames):
+    """The slots of one object's output block: (object name, data path) -> (offset, frames shape, values shape)"""
+
+    name = spec['name']
+    slots = [((name+'_non_rot', 'location'), 3)]
+    if 'angles' in spec or 'quat' in spec:
+        slots.append(((name+'_pa', 'rotation_quaternion'), 4))
+    if spec.get('streamline') == 'dynamic':
+        slots.append(((name+'_streamline', 'data.bevel_factor_end'), 1))
+
+    layout = {}
+    offset = 0
+    for key, width in slots:
+        layout[key] = (offset, (n_frames,), (n_frames, width))
+        offset += n_frames*(1 + width)
+    if spec.get('streamline') is not None:
+        layout[(name+'_streamline', 'points')] = (offset, None, (n_samples, 4))
+        offset += n_samples*4
+
+    return layout, offset
+
+def _slot(out, slot):
+    """The frames and values views of one slot of an output block (frames is None for streamline points)"""
+
+    offset, frames_shape, values_shape = slot
+    if frames_shape is None:
+        return None, out[offset:offset + values_shape[0]*values_shape[1]].reshape(values_shape)
+
+    frames = out[offset:offset + frames_shape[0]]
+    offset += frames_shape[0]
+    return frames, out[offset:offset + values_shape[0]*values_shape[1]].reshape(values_shape)
+
+def _plan_one(table, out, col_index, clock_args, t_col, spec, layout):
+    """Computes one object's tracks into its output slots, returns what did not fit there"""
+
+    def col(name):
+        return table[col_index[name]]
+
+    anim = anim_clock(col(t_col), *clock_args)
+    plan = anim_plan(anim)
+
+    x, y, z = col(spec['x']), col(spec['y']), col(spec['z'])
+    if 'angles' in spec:
+        angles = np.column_stack([col(c) for c in spec['angles']])
+        quat = euler_to_quat(angles, spec['euler_type'])
+    elif 'quat' in spec:
+        quat = np.column_stack([col(c) for c in spec['quat']])
+    else:
+        quat = None
+
+    plan.dyn_obj(spec['name'], x, y, z, quat, spec.get('interpolation', 'BEZIER'), spec.get('pos_tol'), spec.get('ang_tol'))
+    if spec.get('streamline') is not None:
+        plan.streamline(spec['name'], spec['streamline'], x, y, z, spec.get('thickness', .1), spec.get('lod_tol'),
+                        spec.get('lod_angle'))
+
+    written = []
+    for name, tracks in plan.tracks.items():
+        for data_path, trk in tracks.items():
+            frames, values = _slot(out, layout[(name, data_path)])
+            n = len(trk.frames)
+            frames[:n] = trk.frames
+            values[:n] = np.asarray(trk.values).reshape(n, -1)
+            written.append((name, data_path, n, trk.interpolation))
+
+    n_points = {}
+    for name, streamline in plan.streamlines.items():
+        _, points = _slot(out, layout[(name, 'points')])
+        n_points[name] = len(streamline['points'])
+        points[:n_points[name]] = streamline['points']
+
+    return written, n_points, plan.decimation
+
+def _plan_worker(args):
+    """Runs :func:`_plan_one` in a worker process on the shared input and output blocks"""
+
+    clock_args, t_col, in_name, in_shape, col_index, spec, out_name, layout = args
+
+    in_block = shared_memory.SharedMemory(name=in_name)
+    out_block = shared_memory.SharedMemory(name=out_name)
+    try:
+        # every view into the blocks lives in _plan_one, so they are gone before the blocks are closed
+        return _plan_one(np.ndarray(in_shape, dtype=float, buffer=in_block.buf),
+                         np.ndarray(out_block.size // 8, dtype=float, buffer=out_block.buf),
+                         col_index, clock_args, t_col, spec, layout)
+    finally:
+        in_block.close()
+        out_block.close()
+
+def plan_objects(table, t_col, speed_up, scale, frame_rate, objects, resample=None, processes=None):
+    """
+    Computes the tracks of many dynamic objects from one dataset in a process pool.
+
+    Each entry of ``objects`` is a dict with the keys:
+
+    - ``name``: the Blender object name (as passed to :class:`~bpsci.core.dyn_obj`)
+    - ``x``, ``y``, ``z``: the position columns
+    - ``angles`` and ``euler_type`` (optional): three Euler angle columns and their sequence, converted like :func:`bpsci.utils.euler2quat`
+    - ``quat`` (optional): four quaternion columns in scipy's (x, y, z, w) order, instead of ``angles``
+    - ``pos_tol``, ``ang_tol``, ``interpolation`` (optional): see :meth:`bpsci.core.dyn_obj.apply_animation`
+    - ``streamline`` and ``thickness`` (optional): 'dynamic' or 'static' to also plan :meth:`bpsci.core.dyn_obj.apply_streamline`
+    - ``lod_tol``, ``lod_angle`` (optional): the streamline's level of detail, see :meth:`bpsci.core.dyn_obj.apply_streamline`
+
+    .. versionadded:: 0.3.6
+
+    :param table: the dataset, anything that maps a column name to a 1D array (i.e. a dict or a pandas DataFrame)
+    :param str t_col: the name of the time column
+    :param float speed_up: the 'real time speed up' or the ratio of the duration of the data to the duration of the animation
+    :param float scale: global physical scale factor of the animation
+    :param float frame_rate: frame rate of the animation (``bpy.context.scene.render.fps``)
+    :param list[dict] objects: the objects to plan
+    :param str resample: if given ['linear' or 'cubic'], resample onto the frame grid, see :class:`~bpsci.plan.anim_clock`
+    :param int processes: the number of worker processes (defaults to the number of CPUs)
+
+    Returns:
+        :returns (:class:`shared_plan`) the plan of every object, ready for :func:`bpsci.core.apply_plan`
+    """
+
+    names = [t_col] + sorted({c for spec in objects for c in _columns(spec)} - {t_col})
+    col_index = {name: i for i, name in enumerate(names)}
+    n_samples = len(np.asarray(table[t_col]))
+
+    in_block = shared_memory.SharedMemory(create=True, size=max(len(names)*n_samples*8, 1))
+    in_table = np.ndarray((len(names), n_samples), dtype=float, buffer=in_block.buf)
+    for name, i in col_index.items():
+        in_table[i] = np.asarray(table[name], dtype=float)
+
+    anim = anim_clock(in_table[0].copy(), speed_up, scale, frame_rate, resample)
+    clock_args = (speed_up, scale, frame_rate, resample)
+    n_frames = len(anim.frames)
+
+    plan = shared_plan(anim)
+    try:
+        jobs = []
+        for spec in objects:
+            layout, size = _layout(spec, n_samples, n_frames)
+            out_block = shared_memory.SharedMemory(create=True, size=max(size*8, 1))
+            plan.blocks.append(out_block)
+            jobs.append((clock_args, t_col, in_block.name, in_table.shape, col_index, spec, out_block.name, layout))
+
+        # spawn, never fork: forking Blender itself is not safe
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_plan_worker, jobs))
+    except BaseException:
+        plan.close()
+        raise
+    finally:
+        del in_table
+        in_block.close()
+        in_block.unlink()
+
+    for (_, _, _, _, _, spec, _, layout), block, (written, n_points, decimation) in zip(jobs, plan.blocks, results):
+        out = np.ndarray(block.size // 8, dtype=float, buffer=block.buf)
+        for name, data_path, n, interpolation in written:
+            frames, values = _slot(out, layout[(name, data_path)])
+            plan.tracks.setdefault(name, {})[data_path] = track(frames[:n], values[:n], interpolation)
+
+        if spec.get('streamline') is not None:
+            name = spec['name']+'_streamline'
+            _, points = _slot(out, layout[(name, 'points')])
+            plan.streamlines[name] = {'points': points[:n_points[name]], 'thickness': spec.get('thickness', .1)}
+
+        for name, reports in decimation.items():
+            plan.decimation.setdefault(name, {}).update(reports)
+
+    return plan
@@ -0,0 +1,262 @@
+"""
+On-Disk Cache of Animation Plans - :mod:`bpsci.cache`
+=====================================================
+Skips the computation of unchanged objects when a scene script is run again.
+
+A :class:`track_cache` stores :class:`~bpsci.plan.anim_plan` objects under a hash of everything they were computed
+from: the data (or the data file itself, see :func:`file_digest`) and every parameter. Plans are stored as one
+``.npy`` file per array and read back memory-mapped, so a hit costs next to nothing until the tracks are applied.
+The least recently used plans are evicted once the cache grows past its size limit::
+
+    cache = track_cache()
+    key = cache.key(file_digest(file_path), speed_up, scale, bpy.context.scene.render.fps, euler_type, pa, cog)
+
+    def build():
+        data = pd.read_csv(file_path)
+        ...
+        plan = anim_plan(anim)
+        plan.dyn_obj('gallileo', x, y, z, quat)
+        return plan
+
+    apply_plan(cache.plan(key, build))
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from bpsci.plan import anim_plan
+
+CACHE_DIR = os.environ.get('BPSCI_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'bpsci'))
+""":type: `str`: the default cache directory, set the BPSCI_CACHE environment variable to change it"""
+
+_FORMAT = 1
+
+_TMP_PREFIX = '.tmp'
+
+_STALE_TMP_SECONDS = 3600
+"""Plans being written are in '.tmp' directories, the ones not touched for this long were left by a crash"""
+
+def _update(h, part):
+    """Feeds one key part to a hash, with its type, so that i.e. 1 and '1' differ"""
+
+    if isinstance(part, np.ndarray):
+        h.update(b'array' + part.dtype.str.encode() + repr(part.shape).encode())
+        if part.dtype == object:
+            for p in part.ravel():
+                _update(h, p)
+        else:
+            h.update(np.ascontiguousarray(part).data)
+    elif isinstance(part, (list, tuple)):
+        h.update(b'seq%d' % len(part))
+        for p in part:
+            _update(h, p)
+    elif isinstance(part, dict):
+        h.update(b'dict%d' % len(part))
+        for k in sorted(part, key=repr):
+            _update(h, k)
+            _update(h, part[k])
+    elif isinstance(part, bytes):
+        h.update(b'bytes%d' % len(part) + part)
+    else:
+        text = repr(part.item() if isinstance(part, np.generic) else part).encode()
+        h.update(type(part).__name__.encode() + b'%d' % len(text) + text)
+
+def file_digest(filepath, chunk_size=2**20):
+    """
+    Hashes the contents of a file, so a cache key can be made before the file is parsed
+
+    .. versionadded:: 0.3.6
+
+    :param str filepath: the file
+    :param int chunk_size: the number of bytes read at a time
+
+    Returns:
+        :returns (str): the hex digest
+    """
+
+    h = hashlib.blake2b(digest_size=20)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+class track_cache:
+    """
+    A directory of cached :class:`~bpsci.plan.anim_plan` objects with size-based LRU eviction
+
+    .. versionadded:: 0.3.6
+
+    :param str directory: where the plans are stored, defaults to :data:`CACHE_DIR`
+    :param int max_bytes: the size the cache is trimmed to after each write
+    """
+
+    def __init__(self, directory=None, max_bytes=2**30):
+
+        self.directory = directory or CACHE_DIR
+        """:type: `str`: where the plans are stored"""
+
+        self.max_bytes = max_bytes
+        """:type: `int`: the size the cache is trimmed to after each write"""
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        """
+        Hashes everything a plan is computed from into a key
+
+        :param parts: numpy arrays, numbers, strings, None, and lists, tuples and dicts of them
+
+        Returns:
+            :returns (str): the key
+        """
+
+        h = hashlib.blake2b(digest_size=20)
+        _update(h, (_FORMAT,) + parts)
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key):
+        return os.path.isfile(os.path.join(self._path(key), 'manifest.json'))
+
+    def get(self, key):
+        """
+        Loads a cached plan, its arrays are memory-mapped read only
+
+        :param str key: the key of the plan, see :meth:`key`
+
+        Returns:
+            :returns (:class:`~bpsci.plan.anim_plan`) the plan, None if it is not cached
+        """
+
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, 'manifest.json')) as f:
+                manifest = json.load(f)
+            arrays = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r', allow_pickle=False)
+                      for name in manifest['arrays']}
+        except (OSError, ValueError):
+            return None
+
+        # the modification time of the directory is its last use
+        os.utime(path)
+        return anim_plan.from_arrays(manifest['plan'], arrays)
+
+    def put(self, key, plan):
+        """
+        Stores a plan, then evicts the least recently used plans until the cache fits in :attr:`max_bytes`
+
+        :param str key: the key of the plan, see :meth:`key`
+        :param plan: the plan
+        :type plan: :class:`~bpsci.plan.anim_plan`
+        """
+
+        manifest, arrays = plan.to_arrays()
+
+        # written next to its final place and renamed, so a plan is either complete or not there
+        tmp = tempfile.mkdtemp(prefix=_TMP_PREFIX, dir=self.directory)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp, name + '.npy'), np.asarray(array), allow_pickle=False)
+            with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+                json.dump({'plan': manifest, 'arrays': list(arrays)}, f)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            # another process stored the same plan first
+            if key not in self:
+                raise
+        finally:
+            # nothing is left after the rename, a failed write leaves no partial plan behind
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self.trim(keep=key)
+
+    def plan(self, key, build):
+        """
+        Returns the cached plan, or builds and caches it
+
+        :param str key: the key of the plan, see :meth:`key`
+        :param callable build: called without arguments to compute the plan if it is not cached
+
+        Returns:
+            :returns (:class:`~bpsci.plan.anim_plan`) the plan
+        """
+
+        plan = self.get(key)
+        if plan is None:
+            plan = build()
+            self.put(key, plan)
+        return plan
+
+    def entries(self):
+        """
+        Returns:
+            :returns (list[tuple]): (key, size in bytes, last use time) of each cached plan, least recently used first
+        """
+
+        entries = []
+        for key in os.listdir(self.directory):
+            path = self._path(key)
+            if key.startswith('.') or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                entries.append((key, size, os.stat(path).st_mtime))
+            except OSError:
+                continue
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self):
+        """
+        Returns:
+            :returns (int): the total size of the cached plans in bytes
+        """
+
+        return sum(size for _, size, _ in self.entries())
+
+    def _remove_stale(self):
+        """Removes the temporary directories of writes that crashed before they were renamed"""
+
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.startswith(_TMP_PREFIX) and entry.is_dir() and \
+                        now - entry.stat().st_mtime > _STALE_TMP_SECONDS:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def trim(self, max_bytes=None, keep=None):
+        """
+        Evicts the least recently used plans until the cache fits, and removes what writes that crashed left behind
+
+        :param int max_bytes: the size to trim to, defaults to :attr:`max_bytes`
+        :param str keep: a key that is never evicted (i.e. the plan just written)
+        """
+
+        self._remove_stale()
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """
+        Removes every cached plan
+        """
+
+        self.trim(0)
@@ -4,52 +4,283 @@ Building Blocks of a Dynamic Visualization - :mod:`bpsci.core`
 The bpsci core is a collection of classes and methods used to create dynamic visualizations.
 """
 
+import os
+import warnings
+
 import numpy as np
-from scipy.spatial.transform import Rotation as R
-from scipy.interpolate import interp1d
 import bpy
-import pandas as pd
 from mathutils import Vector
 
-def arc_length_frac(x, y, z):
-    tmp = np.column_stack([np.diff(x) ** 2, np.diff(y) ** 2, np.diff(z) ** 2])
-    tmp2 = np.sqrt(np.sum(tmp, axis=1))
-    tmp3 = np.cumsum(tmp2)
-    tmp4 = tmp3 / tmp3[-1]
-    tmp4 = np.insert(tmp4, 0, 0)
-    return tmp4
+from bpsci.decimate import last_per_frame
+from bpsci.resample import unflip_quat, euler_to_quat, quat_to_euler, derivative
+from bpsci.plan import (anim_clock, timebase, arc_length_frac, appended_samples, rotation_track, location_track,
+                        streamline_points, lod_streamline, bevel_track, flat_transforms, flat_tracks, vector_tracks,
+                        text_table, frame_table, TRANSFORM_WIDTHS)
+from bpsci.tube import sweep, align_quat
+from bpsci.utils import read_obj
+from bpsci import registry
+
+ARROW_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'objects', 'arrow.obj')
+""":type: `str`: file path to the arrow asset used by :class:`~bpsci.core.dyn_vec`"""
+
+ARROW_MESH = 'bpsci_arrow'
+""":type: `str`: name of the mesh datablock shared by all arrows"""
+
+_arrow_geometry = None
+
+_INTERPOLATION = {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}
+
+def keyframe_bulk(id_data, data_path, frames, values, interpolation='BEZIER', group=None):
+    """
+    Writes a whole animation track to the F-curves of a Blender ID in one pass per curve.
+
+    Produces the same keyframes as calling ``keyframe_insert`` once per frame: samples that land on the same frame
+    keep the last value, and keys already on the curves at other frames are kept. Keys that all come after the
+    existing ones are appended without merging, so extending a long curve does little more than copy it.
+
+    .. versionadded:: 0.3.6
 
-class init_anim:
+    :param bpy.types.ID id_data: the Blender datablock that owns the animated property (object, curve, ...)
+    :param str data_path: the RNA path of the animated property, i.e. 'location'
+    :param np.ndarray frames: the frame of each sample
+    :param np.ndarray values: the value of each sample, shape (len(frames),) or (len(frames), array length)
+    :param str interpolation: the keyframe interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+    :param str group: the action group of newly created F-curves (Blender uses 'Object Transforms' for object transforms)
+    """
+
+    if len(frames) == 0:
+        return
+
+    values = np.asarray(values, dtype=float).reshape(len(frames), -1)
+    frames, values = last_per_frame(frames, values)
+
+    anim_data = id_data.animation_data
+    if anim_data is None:
+        anim_data = id_data.animation_data_create()
+    if anim_data.action is None:
+        anim_data.action = bpy.data.actions.new(id_data.name + 'Action')
+    fcurves = anim_data.action.fcurves
+
+    for index in range(values.shape[1]):
+        cur_frames = frames
+        cur_values = values[:, index]
+        cur_interp = np.full(len(frames), _INTERPOLATION[interpolation], dtype=np.int32)
+
+        fc = fcurves.find(data_path, index=index)
+        if fc is not None and len(fc.keyframe_points) and fc.keyframe_points[-1].co[0] < frames[0]:
+            # appending after the existing keys: no merge, the old keys are only copied back as they are
+            points = fc.keyframe_points
+            n_old = len(points)
+            points.add(len(frames))
+            co = np.empty(2*len(points), dtype=np.float32)
+            points.foreach_get('co', co)
+            co[2*n_old::2] = cur_frames
+            co[2*n_old+1::2] = cur_values
+            interp = np.empty(len(points), dtype=np.int32)
+            points.foreach_get('interpolation', interp)
+            interp[n_old:] = cur_interp
+            points.foreach_set('co', co)
+            points.foreach_set('interpolation', interp)
+            fc.update()
+            continue
+
+        if fc is not None:
+            # merge with the existing keys, the new ones replace keys on the same frame
+            n_old = len(fc.keyframe_points)
+            old_co = np.empty(2*n_old, dtype=np.float32)
+            fc.keyframe_points.foreach_get('co', old_co)
+            old_interp = np.empty(n_old, dtype=np.int32)
+            fc.keyframe_points.foreach_get('interpolation', old_interp)
+            # the old frames are float32, so the new ones are compared as Blender stored them
+            keep = ~np.isin(old_co[0::2], frames.astype(np.float32))
+
+            cur_frames = np.concatenate([old_co[0::2][keep], frames])
+            order = np.argsort(cur_frames, kind='stable')
+            cur_frames = cur_frames[order]
+            cur_values = np.concatenate([old_co[1::2][keep], cur_values])[order]
+            cur_interp = np.concatenate([old_interp[keep], cur_interp])[order]
+
+            cur_group = fc.group.name if fc.group is not None else group
+            fcurves.remove(fc)
+        else:
+            cur_group = group
+
+        if cur_group is None:
+            fc = fcurves.new(data_path, index=index)
+        else:
+            fc = fcurves.new(data_path, index=index, action_group=cur_group)
+
+        # float32 like Blender's own keyframe coordinates, so foreach_set copies the buffer as it is
+        co = np.empty(2*len(cur_frames), dtype=np.float32)
+        co[0::2] = cur_frames
+        co[1::2] = cur_values
+
+        fc.keyframe_points.add(len(cur_frames))
+        fc.keyframe_points.foreach_set('co', co)
+        fc.keyframe_points.foreach_set('interpolation', cur_interp)
+        fc.update()
+
+def new_streamline(name, coords, thickness):
+    """
+    Creates a POLY curve object through the given points
+
+    .. versionadded:: 0.3.6
+
+    :param str name: the Blender object name of the streamline
+    :param np.ndarray coords: the (x, y, z, w) coordinates of the points, see :func:`bpsci.plan.streamline_points`
+    :param float thickness: the bevel depth of the streamline
+
+    Returns:
+        :returns (:class:`bpy.types.Object`) the curve object
+    """
+
+    # make a new curve
+    crv = bpy.data.curves.new('crv', 'CURVE')
+    crv.dimensions = '3D'
+
+    # make a new spline in that curve
+    spline = crv.splines.new(type='POLY')
+
+    # a spline point for each point
+    spline.points.add(len(coords)-1) # theres already one point by default
+    spline.points.foreach_set('co', np.ascontiguousarray(coords, dtype=np.float32).ravel())
+
+    # make a new object with the curve
+    obj = bpy.data.objects.new(name, crv)
+    bpy.context.scene.collection.objects.link(obj)
+
+    crv.bevel_depth = thickness
+
+    crv.bevel_factor_mapping_end = "SEGMENTS"
+    crv.bevel_factor_mapping_start = "SEGMENTS"
+
+    return obj
+
+def new_tube(name, coords, thickness, sides=8, chunk_rows=2**16):
+    """
+    Creates a tube mesh object through the given points, the mesh a static :func:`new_streamline` converts to,
+    swept directly from the points by :func:`bpsci.tube.sweep` and written in bulk
+
+    .. versionadded:: 0.3.6
+
+    :param str name: the Blender object name of the streamline
+    :param np.ndarray coords: the (x, y, z) or (x, y, z, w) coordinates of the points, see :func:`bpsci.plan.streamline_points`
+    :param float thickness: the radius of the tube
+    :param int sides: the number of vertices around the tube
+    :param int chunk_rows: the number of points swept at a time, see :func:`bpsci.tube.sweep`
+
+    Returns:
+        :returns (:class:`bpy.types.Object`) the mesh object
+    """
+
+    verts, faces = sweep(coords, thickness, sides, chunk_rows)
+
+    me = bpy.data.meshes.new(name)
+    me.vertices.add(len(verts))
+    me.vertices.foreach_set('co', verts.ravel())
+    me.loops.add(faces.size)
+    me.loops.foreach_set('vertex_index', faces.ravel())
+    me.polygons.add(len(faces))
+    me.polygons.foreach_set('loop_start', np.arange(0, faces.size, 4, dtype=np.int32))
+    if bpy.app.version < (4, 0, 0):
+        # newer versions work the loop totals out from the loop starts
+        me.polygons.foreach_set('loop_total', np.full(len(faces), 4, dtype=np.int32))
+    me.polygons.foreach_set('use_smooth', np.ones(len(faces), dtype=bool))
+    me.update()
+
+    obj = bpy.data.objects.new(name, me)
+    bpy.context.scene.collection.objects.link(obj)
+
+    return obj
+
+def extend_spline(spline, coords):
+    """
+    Appends points to a spline in bulk
+
+    .. versionadded:: 0.3.6
+
+    :param bpy.types.Spline spline: the spline to extend
+    :param np.ndarray coords: the (x, y, z, w) coordinates of the new points, see :func:`bpsci.plan.streamline_points`
+    """
+
+    points = spline.points
+    n_old = len(points)
+    points.add(len(coords))
+
+    co = np.empty(4*len(points), dtype=np.float32)
+    points.foreach_get('co', co)
+    co[4*n_old:] = np.ascontiguousarray(coords).ravel()
+    points.foreach_set('co', co)
+
+def _bevel_driver(crv, total):
+    """
+    Turns the ``bevel_factor_end`` keys of a dynamic streamline into keys of an absolute position along it
+    ('["bpsci_bevel"]') and a driver that divides it by the length of the streamline ('["bpsci_bevel_total"]'), so
+    the streamline can grow without rewriting the keys it already has
+    """
+
+    if 'bpsci_bevel_total' in crv:
+        return
+
+    fcurves = crv.animation_data.action.fcurves
+    fc = fcurves.find('bevel_factor_end')
+    n = len(fc.keyframe_points)
+    co = np.empty(2*n, dtype=np.float32)
+    fc.keyframe_points.foreach_get('co', co)
+    interp = np.empty(n, dtype=np.int32)
+    fc.keyframe_points.foreach_get('interpolation', interp)
+    interpolation = {v: k for k, v in _INTERPOLATION.items()}.get(int(interp[0]) if n else 2, 'BEZIER')
+    fcurves.remove(fc)
+
+    crv['bpsci_bevel'] = 0.0
+    crv['bpsci_bevel_total'] = float(total)
+    keyframe_bulk(crv, '["bpsci_bevel"]', co[0::2], co[1::2]*total, interpolation)
+
+    driver = crv.driver_add('bevel_factor_end').driver
+    driver.type = 'SCRIPTED'
+    for name in ('bevel', 'bevel_total'):
+        var = driver.variables.new()
+        var.name = name
+        var.type = 'SINGLE_PROP'
+        var.targets[0].id_type = 'CURVE'
+        var.targets[0].id = crv
+        var.targets[0].data_path = '["bpsci_%s"]' % name
+    driver.expression = 'bevel / bevel_total'
+
+class init_anim(anim_clock):
     """
     Sets up the global animation information such speed up and global scale
     :param np.ndarray t: contains the time information that corresponds with the six degrees of freedom data
     :param float speed_up: the 'real time speed up' or the ratio of the duration of the data to the duration of the animation
     :param float scale: global physical scale factor of the animation, i.e., .1 will reduce everything to be 1/10th its original size
-    """
-    def __init__(self, t, speed_up, scale):
+    :param str resample: if given ['linear' or 'cubic'], all data is resampled to exactly one sample per frame before it is keyed
 
-        self.frame_rate = bpy.context.scene.render.fps
-        """:type: `float`: frame rate of animation"""
+    .. versionchanged:: 0.3.6
+        added the ``resample`` parameter, the timing itself is computed by :class:`bpsci.plan.anim_clock`
+    """
+    def __init__(self, t, speed_up, scale, resample=None):
 
-        self.t = t
-        """:type: `np.ndarray`: contains the time information that corresponds with the six degrees of freedom data"""
+        anim_clock.__init__(self, t, speed_up, scale, bpy.context.scene.render.fps, resample)
 
-        self.speed_up = speed_up
-        """:type: `float`: the "real time speed up" or the ratio of the duration of the data to the duration of the animation"""
+        bpy.context.scene.frame_start = 1
+        bpy.context.scene.frame_end = self.frame_duration+1
 
-        self.frame_duration = int(t[-1]/speed_up*self.frame_rate)
-        """:type: `int`: number of total frames in animation"""
+    def extend(self, t_new):
+        """
+        Appends new samples to the animation and extends the scene's frame range, see :meth:`bpsci.plan.anim_clock.extend`.
+        Call :meth:`dyn_obj.extend` and :meth:`dyn_obj.extend_streamline` with the data of the new samples afterwards.
 
-        frame_interper = interp1d(np.linspace(0, t[-1]*1.00001, len(t)), np.linspace(0, self.frame_duration, len(t)))
+        .. versionadded:: 0.3.6
 
-        self.frames = frame_interper(t).astype(int)
-        """:type: `np.ndarray`: the frames that Blender will animate and have corresponding data for"""
+        :param np.ndarray t_new: the times of the new samples
 
-        self.scale = scale
-        """:type: `float`: global physical scale factor of the animation, i.e., .1 will reduce everything to be 1/10th its original size"""
+        Returns:
+            :returns (np.ndarray): the new entries of :attr:`frames`
+        """
 
-        bpy.context.scene.frame_start = 1
+        new_frames = anim_clock.extend(self, t_new)
         bpy.context.scene.frame_end = self.frame_duration+1
+        return new_frames
 
 
 class ref_frame:
@@ -88,6 +319,9 @@ class ref_frame:
         self.scale = anim.scale
         """:type: `float`: global physical scale factor of the animation"""
 
+        self.decimation = {}
+        """:type: `dict`: the decimation report of each decimated track, keyed by data path"""
+
 
     def static_6DOF(self, quat, x, y, z):
         """
@@ -115,7 +349,7 @@ class ref_frame:
         if not((x is None or y is None) or z is None):
             self.ob.location = (x, y, z)
 
-    def dynamic_6DOF(self, quat, x_list, y_list, z_list):
+    def dynamic_6DOF(self, quat, x_list, y_list, z_list, bulk=False, interpolation='BEZIER', pos_tol=None, ang_tol=None, frames=None):
         """
         Animates the reference frame over time.
 
@@ -129,9 +363,35 @@ class ref_frame:
         :param np.ndarray x: the x position over time
         :param np.ndarray y: the y position over time
         :param np.ndarray z: the z position over time
+        :param bool bulk: whether to write every keyframe at once through :func:`~bpsci.core.keyframe_bulk` instead of one ``keyframe_insert`` per frame
+        :param str interpolation: the keyframe interpolation mode used by the bulk writer ['CONSTANT', 'LINEAR' or 'BEZIER']
+        :param float pos_tol: if given, the position track is decimated so no sample strays further than this from it (scene units)
+        :param float ang_tol: if given, the quaternion track is decimated so no sample is rotated further than this from it (radians)
+        :param np.ndarray frames: the frame of each sample, defaults to :attr:`frames`
+
+        Decimated tracks are always written in bulk with 'LINEAR' interpolation, which is what the tolerance is measured against.
+        A report of each decimation (``keys_in``, ``keys_out``, ``ratio`` and ``max_error``) is kept in :attr:`decimation`.
+
+        .. versionchanged:: 0.3.6
+            added the ``bulk``, ``interpolation``, ``pos_tol``, ``ang_tol`` and ``frames`` parameters
         """
 
-        frames = self.frames
+        frames = self.frames if frames is None else frames
+        if bulk or not(pos_tol is None and ang_tol is None):
+            if not(quat is None):
+                trk, report = rotation_track(frames, quat, interpolation, ang_tol)
+                if report is not None:
+                    self.decimation['rotation_quaternion'] = report
+                keyframe_bulk(self.ob, 'rotation_quaternion', *trk, 'Object Transforms')
+
+            if not(x_list is None):
+                trk, report = location_track(frames, x_list, y_list, z_list, self.scale, interpolation, pos_tol)
+                if report is not None:
+                    self.decimation['location'] = report
+                keyframe_bulk(self.ob, 'location', *trk, 'Object Transforms')
+
+            return
+
         if not(quat is None):
             for i in range(len(frames)):
                 cur_frame = frames[i]
@@ -157,6 +417,31 @@ class ref_frame:
                 self.ob.keyframe_insert(data_path='location', frame=cur_frame)
 
 
+def _own_timebase(anim, t):
+    """The timing to extend a track with: its own :class:`~bpsci.plan.timebase` extended by ``t``, or the shared clock"""
+
+    if isinstance(anim, timebase):
+        if t is None:
+            raise ValueError('the times of the new samples are required, the track has its own time vector')
+        anim.extend(t)
+    elif t is not None:
+        raise ValueError('the track follows the shared clock, extend it with init_anim.extend instead of passing t')
+    return anim
+
+def _rotation_of(obj):
+    """The local rotation of an object in any rotation mode, as an (x, y, z, w) quaternion"""
+
+    mode = obj.rotation_mode
+    if mode == 'QUATERNION':
+        w, x, y, z = obj.rotation_quaternion
+        return np.array([x, y, z, w], dtype=float)
+    if mode == 'AXIS_ANGLE':
+        angle, x, y, z = obj.rotation_axis_angle
+        axis = np.array([x, y, z], dtype=float)
+        return np.append(axis/(np.linalg.norm(axis) or 1)*np.sin(angle/2), np.cos(angle/2))
+    # Blender's Euler modes rotate about the fixed axes in the order of their name
+    return euler_to_quat(list(obj.rotation_euler), mode.lower())
+
 class dyn_obj:
     """
     The main building block of all dynamic visualizations
@@ -168,14 +453,24 @@ class dyn_obj:
     :param bpy.data.object parent: the Blender object parent of the original object
     :param anim: class object that was used to initialize the animation
     :type anim: :class:`bpsci.core.init_anim`
+    :param bool flatten: if True, no reference frames are created: the principal axes offset, center of gravity and
+        scale are composed with the animation in NumPy and only the object itself is keyed, with the same world
+        transforms as the rig (see :func:`bpsci.plan.flat_transforms`)
+
+    .. versionchanged:: 0.3.6
+        the reference frames and streamline it creates are recorded in :mod:`bpsci.registry` under :attr:`name`,
+        added the ``flatten`` parameter
     """
 
-    def __init__(self, obj, pa, cog, euler_type, parent, anim):
+    def __init__(self, obj, pa, cog, euler_type, parent, anim, flatten=False):
 
 
         self.parent = parent
         """:type: `bpy.data.object`: the Blender object parent of this reference frame"""
 
+        self.anim = anim
+        """:class:`bpsci.core.init_anim`: class object that was used to initialize the animation"""
+
         self.frames = anim.frames
         """:type: `np.ndarray`: the frames that Blender will animate and have corresponding data for"""
         self.scale = anim.scale
@@ -187,11 +482,36 @@ class dyn_obj:
         self.euler_pa = pa
         """:type: `np.ndarray`: the offset of the principal axes specified by the :param: ` euler_type:"""
 
-        self.quat = R.from_euler(euler_type, pa).as_quat()
+        self.quat = euler_to_quat(pa, euler_type)
         """:type: `np.ndarray`: a numpy array of one quaternion that represents the principal axes offset"""
 
+        self.flatten = flatten
+        """:type: `bool`: whether the object is keyed directly instead of through reference frames"""
+
+        self.name = obj.name
+        """:type: `str`: the Blender object name of the original object"""
+
+        self._appended = None
+        self._streamline = None
+        self._pose_quat = None
+
+        if flatten:
+            self.cog = np.asarray(cog, dtype=float)
+            """:type: `np.ndarray`: the center of gravity as defined from the origin of the 3D model (flattened objects only)"""
+
+            # the object's own transform, which the rig would have applied under the body frame
+            self.rest = (np.array(obj.location, dtype=float), _rotation_of(obj))
+            """:type: `tuple`: the object's location and (x, y, z, w) rotation before it was flattened"""
+
+            self.non_rot = self.pa_axes = self.body = None
+            obj.parent = parent
+            obj.rotation_mode = 'QUATERNION'
+            obj.scale = (self.scale, self.scale, self.scale)
+            self.set_pose((0, 0, 0), None)
+            return
+
         self.non_rot = ref_frame(obj.name+'_non_rot', parent, anim)
-        """:class:`~bpsci.core.ref_frame`: the non-rotational reference frame (owner of translational movement only)"""
+        """:class:`~bpsci.core.ref_frame`: the non-rotational reference frame (owner of translational movement only), None if flattened"""
 
         self.pa_axes = ref_frame(obj.name+'_pa', self.non_rot.ob, anim)
         """:class:`~bpsci.core.ref_frame`: the principal axes rotational reference frame (owner of rotational movement, inherits translational movement from parent)"""
@@ -206,10 +526,38 @@ class dyn_obj:
 
         self.body.static_6DOF(-self.quat, cog[0], cog[1], cog[2])
 
-        self.name = obj.name
-        """:type: `str`: the Blender object name of the original object"""
+        registry.register(self.name, objects=[self.non_rot.ob, self.pa_axes.ob, self.body.ob])
+
+    def set_pose(self, location, quat=None):
+        """
+        Moves the object to one state without keying it (i.e. for live data, see :class:`bpsci.stream.live_view`)
 
-    def apply_animation(self, x_list, y_list, z_list, quat_list):
+        .. versionadded:: 0.3.6
+
+        :param np.ndarray location: the scaled position
+        :param np.ndarray quat: the quaternion in scipy's (x, y, z, w) order, None to leave the rotation as it is
+        """
+
+        if not self.flatten:
+            self.non_rot.ob.location = location
+            if quat is not None:
+                self.pa_axes.ob.rotation_quaternion = (quat[3], quat[0], quat[1], quat[2])
+            return
+
+        if quat is None:
+            # the rotation the principal axes frame last had, posed or keyed
+            state = self._appended
+            quat = self._pose_quat
+            if quat is None:
+                quat = self.quat if state is None or state['rotation_quaternion'] is None else state['rotation_quaternion']
+        else:
+            self._pose_quat = np.asarray(quat, dtype=float)
+        loc, q = flat_transforms(np.asarray(location, dtype=float), quat, self.quat, self.cog, *self.rest)
+        self.ob.location = loc
+        self.ob.rotation_quaternion = (q[3], q[0], q[1], q[2])
+
+    def apply_animation(self, x_list, y_list, z_list, quat_list, bulk=True, interpolation='BEZIER', pos_tol=None, ang_tol=None,
+                        t=None, mapping='nearest', cache_dir=None):
         """
         Animates a :class:`~bpsci.core.dyn_obj` in the full six degrees of freedom
 
@@ -217,64 +565,292 @@ class dyn_obj:
         :param np.ndarray y_list: a numpy array of the y position over time
         :param np.ndarray z_list: a numpy array of the z position over time
         :param np.ndarray quat_list: a numpy array of the quaternion over time. Can be passed None if rotation is ignored.
+        :param bool bulk: whether to write all keyframes at once (default) or with one ``keyframe_insert`` per frame (flattened objects are always keyed in bulk)
+        :param str interpolation: the keyframe interpolation mode used by the bulk writer ['CONSTANT', 'LINEAR' or 'BEZIER']
+        :param float pos_tol: if given, decimate the position track to this distance tolerance (scene units)
+        :param float ang_tol: if given, decimate the quaternion track to this angular tolerance (radians)
+        :param np.ndarray t: the time of each sample, if the data has its own time vector instead of ``anim.t``, see :meth:`bpsci.plan.anim_clock.timebase`
+        :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+        :param str cache_dir: if given, the transform of every frame is written to a cache file in this directory (one ``<object name>.npy`` per animated object) instead of keyframes, see :func:`cache_transforms`
+
+        Returns:
+            :returns (dict): the decimation report of each decimated track, keyed by data path (empty if nothing was decimated)
+
+        .. versionchanged:: 0.3.6
+            keyframes are written in bulk by default, added decimation, per-object time vectors and transform caches
+        """
+
+        anim = self.anim if t is None else self.anim.timebase(t, mapping)
+        last_quat = None
+        if quat_list is not None:
+            # the sign of the last key written, resampling makes the signs continuous
+            last_quat = np.asarray(quat_list[-1] if anim.resample is None else unflip_quat(quat_list)[-1], dtype=float)
+        self._appended = {'anim': anim, 'samples': len(x_list), 'frames': len(anim.frames), 'interpolation': interpolation,
+                          'location': np.array([x_list[-1], y_list[-1], z_list[-1]], dtype=float),
+                          'rotation_quaternion': last_quat}
+        # the keys set the rotation from now on, not an earlier pose
+        self._pose_quat = None
+
+        if anim.resample is not None:
+            quat_list = anim.sample_quat(quat_list)
+            x_list, y_list, z_list = anim.sample(np.column_stack([x_list, y_list, z_list])).T
+
+        if cache_dir is None and not self.flatten and not bulk and pos_tol is None and ang_tol is None:
+            # one keyframe_insert per frame
+            self.pa_axes.dynamic_6DOF(quat_list, None, None, None, frames=anim.frames)
+            self.non_rot.dynamic_6DOF(None, x_list, y_list, z_list, frames=anim.frames)
+            self.decimation = {}
+            """:type: `dict`: the decimation report of each decimated track, keyed by data path"""
+            return self.decimation
+
+        targets, self.decimation = self._transform_tracks(anim.frames, x_list, y_list, z_list, quat_list, interpolation,
+                                                          pos_tol, ang_tol)
+        if cache_dir is not None:
+            self._appended['cache'] = cache_dir
+
+        for ob, tracks in targets:
+            tracks = {path: trk for path, trk in tracks.items() if trk is not None}
+            if not tracks:
+                continue
+            if cache_dir is not None:
+                cache_transforms(ob, os.path.join(cache_dir, ob.name + '.npy'), tracks, self.name)
+            else:
+                for path, trk in tracks.items():
+                    keyframe_bulk(ob, path, *trk, 'Object Transforms')
+
+        return self.decimation
+
+    def _transform_tracks(self, frames, x_list, y_list, z_list, quat_list, interpolation, pos_tol, ang_tol):
         """
+        The tracks of every animated object, built once whether they are keyed or written to a transform cache
+
+        Returns:
+            :returns (tuple): a list of (object, {data path: track or None}) and the decimation report of each decimated track
+        """
+
+        if self.flatten:
+            rot, loc, reports = flat_tracks(frames, x_list, y_list, z_list, quat_list, self.scale, self.quat, self.cog,
+                                            *self.rest, interpolation, pos_tol, ang_tol)
+            return [(self.ob, {'rotation_quaternion': rot, 'location': loc})], reports
+
+        reports = {}
+        rot = None
+        if quat_list is not None:
+            rot, report = rotation_track(frames, quat_list, interpolation, ang_tol)
+            if report is not None:
+                reports['rotation_quaternion'] = report
+        loc, report = location_track(frames, x_list, y_list, z_list, self.scale, interpolation, pos_tol)
+        if report is not None:
+            reports['location'] = report
 
-        self.pa_axes.dynamic_6DOF(quat_list, None, None, None)
-        self.non_rot.dynamic_6DOF(None, x_list, y_list, z_list)
+        return [(self.pa_axes.ob, {'rotation_quaternion': rot}), (self.non_rot.ob, {'location': loc})], reports
 
-    def apply_streamline(self, staticity, int_x, int_y, int_z, thickness):
+    def extend(self, x_list, y_list, z_list, quat_list, t=None):
+        """
+        Keys samples appended to the animation with :meth:`init_anim.extend`, after those of :meth:`apply_animation`.
+        Only the new frames are keyed, with the interpolation :meth:`apply_animation` used.
+
+        .. versionadded:: 0.3.6
+
+        :param np.ndarray x_list: a numpy array of the x position of the new samples
+        :param np.ndarray y_list: a numpy array of the y position of the new samples
+        :param np.ndarray z_list: a numpy array of the z position of the new samples
+        :param np.ndarray quat_list: a numpy array of the quaternion of the new samples. Can be passed None if rotation is ignored.
+        :param np.ndarray t: the times of the new samples, required if :meth:`apply_animation` was given its own ``t``
+        """
+
+        if self._appended is None:
+            raise RuntimeError('apply_animation must be called before extend')
+
+        state = self._appended
+        if 'cache' in state:
+            raise RuntimeError('an animation written to a transform cache can not be extended, apply it again instead')
+        n, n_frames = state['samples'], state['frames']
+        anim = _own_timebase(state['anim'], t)
+        self._pose_quat = None
+
+        quat = None
+        if not(quat_list is None):
+            frames, quat, state['rotation_quaternion'] = appended_samples(anim, quat_list, n, n_frames,
+                                                                          state['rotation_quaternion'], quat=True)
+            if not self.flatten:
+                trk, _ = rotation_track(frames, quat, state['interpolation'])
+                keyframe_bulk(self.pa_axes.ob, 'rotation_quaternion', *trk, 'Object Transforms')
+
+        frames, loc, state['location'] = appended_samples(anim, np.column_stack([x_list, y_list, z_list]), n, n_frames,
+                                                          state['location'])
+
+        if self.flatten:
+            if quat is None and state['rotation_quaternion'] is not None:
+                # the rotation holds its last key
+                quat = np.tile(state['rotation_quaternion'], (len(frames), 1))
+            rot, trk, _ = flat_tracks(frames, *loc.T, quat, self.scale, self.quat, self.cog, *self.rest,
+                                      state['interpolation'])
+            if rot is not None:
+                keyframe_bulk(self.ob, 'rotation_quaternion', *rot, 'Object Transforms')
+            keyframe_bulk(self.ob, 'location', *trk, 'Object Transforms')
+        else:
+            trk, _ = location_track(frames, *loc.T, self.scale, state['interpolation'])
+            keyframe_bulk(self.non_rot.ob, 'location', *trk, 'Object Transforms')
+
+        state['samples'] += len(x_list)
+        state['frames'] += len(frames)
+
+    def apply_streamline(self, staticity, int_x, int_y, int_z, thickness, lod_tol=None, lod_angle=None, t=None,
+                         mapping='nearest', sides=None):
         """
         Gives a :class:`~bpsci.core.dyn_obj` a dynamic or static trail that shows its position
 
         :param str staticity: a string ['dynamic' or 'static'] that specifies whether the streamline is animated or static
-        :param np.ndarray x_list: a numpy array of the x position over time
-        :param np.ndarray y_list: a numpy array of the y position over time
-        :param np.ndarray z_list: a numpy array of the z position over time
-        :param np.ndarray quat_list: a numpy array of the quaternion over time. Can be passed None if rotation is ignored.
+        :param np.ndarray int_x: a numpy array of the x position over time
+        :param np.ndarray int_y: a numpy array of the y position over time
+        :param np.ndarray int_z: a numpy array of the z position over time
+        :param float thickness: the bevel depth of the streamline
+        :param float lod_tol: if given, the streamline keeps only the points needed to stay within this distance of the data (scene units)
+        :param float lod_angle: with ``lod_tol``, also keeps points so the data never turns by more than this along one segment (radians)
+        :param np.ndarray t: the time of each sample, if the data has its own time vector instead of ``anim.t``, see :meth:`bpsci.plan.anim_clock.timebase`
+        :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+        :param int sides: if given, a static streamline is a tube mesh with this many sides (see :func:`new_tube`)
+            instead of a beveled curve, so it needs no conversion to export
+
+        Returns:
+            :returns (dict): the decimation report of the spline points, None without ``lod_tol``
+
+        .. versionchanged:: 0.3.6
+            spline points and ``bevel_factor_end`` keyframes are written in bulk, added the ``lod_tol`` and ``lod_angle`` level of detail,
+            per-object time vectors and tube meshes
         """
 
+        if sides is not None and staticity != 'static':
+            raise ValueError('only a static streamline can be a tube mesh')
+
+        anim = self.anim if t is None else self.anim.timebase(t, mapping)
         name = self.name+'_streamline'
-        frames = self.frames
 
-        self.arc_length_frac = arc_length_frac(int_x, int_y, int_z)
+        if lod_tol is None:
+            points = streamline_points(int_x, int_y, int_z, self.scale)
+            self.arc_length_frac = arc_length_frac(int_x, int_y, int_z)
+            # the streamline's length, the denominator of arc_length_frac
+            total = np.sum(np.linalg.norm(np.diff(np.column_stack([int_x, int_y, int_z]), axis=0), axis=1))
+            report = None
+        else:
+            points, self.arc_length_frac, report = lod_streamline(int_x, int_y, int_z, self.scale, lod_tol, lod_angle)
+            total = len(points) - 1
+
+        if sides is None:
+            obj = new_streamline(name, points, thickness)
+            crv = obj.data
+        else:
+            obj = new_tube(name, points, thickness, sides)
+            crv = None
+        registry.register(self.name, objects=[obj], data=[obj.data])
 
-        int_size = len(int_x)
-        int_coords = np.zeros((int_size, 3))
-        int_coords[:, 0] = int_x*self.scale
-        int_coords[:, 1] = int_y*self.scale
-        int_coords[:, 2] = int_z*self.scale
-        coords_list = int_coords.tolist()
+        if staticity == 'dynamic':
+            keyframe_bulk(crv, 'bevel_factor_end', *bevel_track(anim, self.arc_length_frac))
 
-        # make a new curve
-        crv = bpy.data.curves.new('crv', 'CURVE')
-        crv.dimensions = '3D'
+        self._streamline = {'anim': anim, 'curve': crv, 'staticity': staticity, 'lod_tol': lod_tol, 'lod_angle': lod_angle,
+                            'samples': len(int_x), 'frames': len(anim.frames), 'total': float(total),
+                            'last': np.array([int_x[-1], int_y[-1], int_z[-1]], dtype=float)}
 
-        # make a new spline in that curve
-        spline = crv.splines.new(type='POLY')
+        return report
 
-        # a spline point for each point
-        spline.points.add(len(coords_list)-1) # theres already one point by default
+    def extend_streamline(self, int_x, int_y, int_z, t=None):
+        """
+        Extends the streamline of :meth:`apply_streamline` with samples appended to the animation with
+        :meth:`init_anim.extend`. The new points are added to the end of the spline (simplified on their own with the
+        same level of detail).
 
-        # assign the point coordinates to the spline points
-        for p, new_co in zip(spline.points, coords_list):
-            p.co = (new_co + [1.0]) # (add nurbs weight)
+        A dynamic streamline is switched, the first time it is extended, from ``bevel_factor_end`` keys to keys of
+        its absolute length ('["bpsci_bevel"]' on the curve) and a driver that divides them by its total length
+        ('["bpsci_bevel_total"]'), so extending it never rewrites the keys it already has.
 
-        # make a new object with the curve
-        obj = bpy.data.objects.new(name, crv)
-        bpy.context.scene.collection.objects.link(obj)
+        .. versionadded:: 0.3.6
 
-        bpy.data.objects[name].data.bevel_depth = thickness
+        :param np.ndarray int_x: a numpy array of the x position of the new samples
+        :param np.ndarray int_y: a numpy array of the y position of the new samples
+        :param np.ndarray int_z: a numpy array of the z position of the new samples
+        :param np.ndarray t: the times of the new samples, required if :meth:`apply_streamline` was given its own ``t``
 
-        bpy.data.objects[name].data.bevel_factor_mapping_end = "SEGMENTS"
-        bpy.data.objects[name].data.bevel_factor_mapping_start = "SEGMENTS"
+        Returns:
+            :returns (dict): the decimation report of the new spline points, None without level of detail
+        """
 
-        if staticity == 'dynamic':
-            for i in range(len(frames)):
-                cur_frame = frames[i]
+        if self._streamline is None:
+            raise RuntimeError('apply_streamline must be called before extend_streamline')
+        if self._streamline['curve'] is None:
+            raise RuntimeError('a tube mesh streamline cannot be extended')
+
+        state = self._streamline
+        anim = _own_timebase(state['anim'], t)
+        crv = state['curve']
+        pts = np.vstack([state['last'], np.column_stack([int_x, int_y, int_z])])
+
+        if state['lod_tol'] is None:
+            coords = streamline_points(*pts[1:].T, self.scale)
+            position = state['total'] + np.cumsum(np.linalg.norm(np.diff(pts, axis=0), axis=1))
+            report = None
+        else:
+            # the last point of the spline is kept by any simplification, so the new points are simplified from it
+            coords, frac, report = lod_streamline(*pts.T, self.scale, state['lod_tol'], state['lod_angle'])
+            position = state['total'] + frac[1:]*(len(coords) - 1)
+            coords = coords[1:]
+
+        extend_spline(crv.splines[0], coords)
+
+        if state['staticity'] == 'dynamic':
+            _bevel_driver(crv, state['total'])
+            frames, bevel, _ = appended_samples(anim, position, state['samples'], state['frames'], state['total'],
+                                                kind='linear')
+            keyframe_bulk(crv, '["bpsci_bevel"]', frames, bevel)
+            state['frames'] += len(frames)
+
+        state['samples'] += len(int_x)
+        state['total'] = float(position[-1])
+        state['last'] = pts[-1]
+        if state['staticity'] == 'dynamic':
+            crv['bpsci_bevel_total'] = state['total']
+
+        return report
+
+def arrow_mesh():
+    """
+    Returns the arrow mesh shared by every :class:`~bpsci.core.dyn_vec`. The OBJ asset is parsed at most once per
+    session and the mesh is only built if the .blend file does not already have it.
 
-                bpy.data.objects[name].data.bevel_factor_end = self.arc_length_frac[i]
-                bpy.data.objects[name].data.keyframe_insert(data_path='bevel_factor_end', frame=cur_frame)
-            
+    .. versionadded:: 0.3.6
+
+    Returns:
+        :returns (:class:`bpy.types.Mesh`) the arrow mesh
+    """
+
+    global _arrow_geometry
+
+    me = bpy.data.meshes.get(ARROW_MESH)
+    if me is None:
+        if _arrow_geometry is None:
+            _arrow_geometry = read_obj(ARROW_PATH)
+        verts, faces = _arrow_geometry
+
+        me = bpy.data.meshes.new(ARROW_MESH)
+        me.from_pydata(verts, [], faces)
+        me.update()
+    return me
+
+def arrow_object():
+    """
+    Returns the object that holds :func:`arrow_mesh` for instancing (i.e. by a :class:`vector_field`). It is not
+    linked to the scene, so it is not rendered itself.
+
+    .. versionadded:: 0.3.6
+
+    Returns:
+        :returns (:class:`bpy.types.Object`) the arrow object
+    """
+
+    ob = bpy.data.objects.get(ARROW_MESH)
+    if ob is None:
+        ob = bpy.data.objects.new(ARROW_MESH, arrow_mesh())
+    return ob
 
 class dyn_vec:
     """
@@ -287,6 +863,10 @@ class dyn_vec:
     :param tuple[float] offset: offset of vector from the parent object (purely aesthetic)
     :param anim: class object that was used to initialize the animation
     :type anim: :class:`bpsci.core.anim`
+
+    .. versionchanged:: 0.3.6
+        the arrow object shares the mesh from :func:`~bpsci.core.arrow_mesh` instead of importing the asset each time,
+        the objects and constraint it creates are recorded in :mod:`bpsci.registry` under :attr:`name`
     """
 
     def __init__(self, parent, name, scale_mag, scale_off, offset, anim):
@@ -302,19 +882,18 @@ class dyn_vec:
         self.parent_rf = ref_frame(self.name+"_empty", self.parent, anim)
         """:type: `bpy.data.object`: holds the vector"""
 
-        self.filepath = self.filepath = __file__.replace("__init__.py", "").replace("\\core.py", "")+'\\assets\\objects\\arrow.obj' #"C:/Users/vargh/Documents/GitHub/bpsci/bpsci/assets/objects/arrow.obj" #bpsci.__file__.replace("__init__.py", "")+'\\assets\\objects\\arrow.obj'
+        self.filepath = ARROW_PATH
         """:type: `str`: file path to arrow asset"""
 
-
-        vec = bpy.ops.import_scene.obj(filepath=self.filepath)
-        vec = bpy.context.selected_objects[0]
+        # every arrow shares one mesh datablock instead of importing its own copy
+        vec = bpy.data.objects.new(self.name, arrow_mesh())
+        bpy.context.scene.collection.objects.link(vec)
         self.vec = vec
         """:type: `bpy.data.object`: the actual arrow asset"""
         
         self.parent_rf.ob.location = offset
         self.offset = offset
         vec.parent = self.parent_rf.ob
-        vec.name = self.name
         
         self.scale = scale_mag
         vec.scale = (scale_mag, scale_off, scale_off)
@@ -323,53 +902,64 @@ class dyn_vec:
         
         self.frames = anim.frames
         """:type: `np.ndarray`: the frames that Blender will animate and have corresponding data for"""
-    def animate(self, x, y, z):
+
+        self.point_rf = ref_frame(self.name+"_pointing_empty", self.parent, self.anim)
+        """:type: `bpy.data.object`: an empty that provides calculates the directionality of the vector"""
+        
+        tracking_constraint = self.parent_rf.ob.constraints.new('DAMPED_TRACK')
+        tracking_constraint.target = self.point_rf.ob
+        tracking_constraint.track_axis = 'TRACK_X'
+
+        registry.register(self.name, objects=[self.parent_rf.ob, vec, self.point_rf.ob],
+                          constraints=[(self.parent_rf.ob, tracking_constraint)])
+
+    def animate(self, x, y, z, norm='component', max_mag=None, interpolation='BEZIER', t=None, mapping='nearest'):
         """
         Animates a dynamic vector
         
         :param np.ndarray x: a numpy array of the x component over time
         :param np.ndarray y: a numpy array of the y component over time
         :param np.ndarray z: a numpy array of the z component over time
+        :param str norm: how the vector is normalized ['component' divides each component by its own maximum, 'magnitude' divides the vector by its largest magnitude, keeping its direction]
+        :param float max_mag: the magnitude to normalize by in 'magnitude' mode instead of this vector's own maximum, so several vectors can share one scale. It does not apply to 'component' mode, passing it there raises a ValueError.
+        :param str interpolation: the keyframe interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+        :param np.ndarray t: the time of each sample, if the data has its own time vector instead of ``anim.t``, see :meth:`bpsci.plan.anim_clock.timebase`
+        :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+
+        .. versionchanged:: 0.3.6
+            computed on whole arrays and keyed in bulk, added the ``norm``, ``max_mag``, ``interpolation``, ``t`` and ``mapping`` parameters.
+            The pointing empty and its tracking constraint are created with the vector.
         """
 
-        frames = self.frames
+        anim = self.anim if t is None else self.anim.timebase(t, mapping)
+        loc, scale = vector_tracks(anim, x, y, z, self.scale, self.offset, norm, max_mag, interpolation)
 
-        max_x = 1
-        max_y = 1
-        max_z = 1
-        
-        if max(x) != 0:
-            max_x = max(x)
-        if max(y) != 0:
-            max_y = max(y)
-        if max(z) != 0:
-            max_z = max(z)
-        
-        norm_x = x/max_x *self.scale
-        norm_y = y/max_y *self.scale
-        norm_z = z/max_z *self.scale
-        
-        self.point_rf = ref_frame(self.name+"_pointing_empty", self.parent, self.anim)
-        """:type: `bpy.data.object`: an empty that provides calculates the directionality of the vector"""
-        
-        tracking_constraint = self.parent_rf.ob.constraints.new('DAMPED_TRACK')
-        tracking_constraint.target = self.point_rf.ob
-        tracking_constraint.track_axis = 'TRACK_X'
-        
-        for i in range(len(frames)):
-            cur_frame = frames[i]
-            cur_x = norm_x[i]
-            cur_y = norm_y[i]
-            cur_z = norm_z[i]
-                
-            mag_arrow = np.sqrt(cur_x**2 + cur_y**2 + cur_z**2)*self.scale
-            
-            self.parent_rf.ob.scale = (mag_arrow, 1, 1)
-                
-            self.point_rf.ob.location = (cur_x + self.offset[0], cur_y+self.offset[1], cur_z+self.offset[2])
-            
-            self.point_rf.ob.keyframe_insert(data_path='location', frame=cur_frame)
-            self.parent_rf.ob.keyframe_insert(data_path='scale', frame=cur_frame)
+        keyframe_bulk(self.point_rf.ob, 'location', *loc, 'Object Transforms')
+        keyframe_bulk(self.parent_rf.ob, 'scale', *scale, 'Object Transforms')
+
+_text_tables = {}
+
+def _update_texts(scene, depsgraph=None):
+    """Sets the body of every :class:`~bpsci.core.anim_text` from its precomputed table"""
+
+    frame = scene.frame_current
+    for name, (ob, table, first) in list(_text_tables.items()):
+        try:
+            ob.data.body = table[min(max(frame-first, 0), len(table)-1)]
+        except ReferenceError:
+            # the text object was deleted
+            del _text_tables[name]
+
+def _install_handler(handler, stale=(), kind='frame_change_pre'):
+    """Registers a handler (``frame_change_pre`` by default) exactly once, removing copies left by earlier runs or module reloads"""
+
+    names = (handler.__name__,) + tuple(stale)
+    handlers = getattr(bpy.app.handlers, kind)
+    for old in list(handlers):
+        if old is handler or (getattr(old, '__module__', None) == __name__ and getattr(old, '__name__', None) in names):
+            handlers.remove(old)
+
+    handlers.append(handler)
 
 class anim_text:
     """
@@ -382,10 +972,19 @@ class anim_text:
     :param np.ndarray data: the data to be displayed (same length as the number of animated frames)
     :param str label: a label to append to the text (if no label is desired, pass '')
     :param int fix_place: the number of decimal places to fix the text to
-    :param bool if_str: whether or not the data is a numerical or string vector. Currently only numerical vectors are supported.
+    :param bool if_str: whether or not the data is a numerical or string vector. String data is shown as is, holding each value until the next sample.
+    :param np.ndarray t: the time of each sample, if the data has its own time vector instead of ``anim.t``, see :meth:`bpsci.plan.anim_clock.timebase`
+    :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+
+    The text of every frame is formatted once here. A single shared ``frame_change_pre`` handler then looks up the
+    current frame's text for every :class:`~bpsci.core.anim_text`, and re-running a script does not stack handlers.
+
+    .. versionchanged:: 0.3.6
+        text is precomputed and shared by one handler, added string data and per-object time vectors. The text object and its handler entry
+        are recorded in :mod:`bpsci.registry` under the object's name.
     """
     
-    def __init__(self, name, parent, anim, data, label, fix_place, if_str):
+    def __init__(self, name, parent, anim, data, label, fix_place, if_str, t=None, mapping='nearest'):
 
         
 
@@ -402,37 +1001,514 @@ class anim_text:
         self.obj.parent = parent
         self.name = name
 
-        all_frames = np.arange(1, anim.frames[-1])
-        frame_interper = interp1d(anim.frames, data, fill_value = 'extrapolate')
+        self.table = text_table(anim if t is None else anim.timebase(t, mapping), data, label, fix_place, if_str)
+        """:type: `np.ndarray`: the text shown on each frame, starting at frame 1"""
+
+        _register_text(ob, self.table)
+
+def _register_text(ob, table, first=1):
+    """Hands the text table of a text object, starting at frame ``first``, to the shared frame handler"""
+
+    _text_tables[ob.name] = (ob, np.asarray(table).tolist(), first)
+    registry.register(ob.name, objects=[ob], data=[ob.data], handlers=[(_update_texts, _text_tables, ob.name)])
+    _install_handler(_update_texts, ('recalculate_text',))
+    _update_texts(bpy.context.scene)
+
+def apply_plan(plan):
+    """
+    Pushes an :class:`~bpsci.plan.anim_plan` into Blender, writing every track in bulk.
+
+    Tracks are written to the existing objects of the same name, so the rigs they animate must be set up first
+    (i.e. by creating the :class:`dyn_obj` and :class:`dyn_vec` with ``plan.anim``). Streamlines and texts
+    that do not exist yet are created. The scene's frame range is set to the whole animation, or to the window of a
+    plan made with :meth:`~bpsci.plan.anim_plan.window`.
+
+    .. versionadded:: 0.3.6
+
+    :param plan: the plan to apply, i.e. one loaded with :meth:`bpsci.plan.anim_plan.load`
+    :type plan: :class:`bpsci.plan.anim_plan`
+    """
+
+    first, last = plan.frame_range or (1, plan.anim.frame_duration+1)
+    bpy.context.scene.frame_start = first
+    bpy.context.scene.frame_end = last
+
+    for name, streamline in plan.streamlines.items():
+        if bpy.data.objects.get(name) is None:
+            obj = new_streamline(name, streamline['points'], streamline['thickness'])
+            registry.register(name, objects=[obj], data=[obj.data])
+
+    for name, tracks in plan.tracks.items():
+        ob = bpy.data.objects[name]
+        for data_path, trk in tracks.items():
+            if data_path.startswith('data.'):
+                keyframe_bulk(ob.data, data_path[len('data.'):], *trk)
+            else:
+                keyframe_bulk(ob, data_path, *trk, 'Object Transforms')
+
+    for name, table in plan.texts.items():
+        ob = bpy.data.objects.get(name)
+        if ob is None:
+            bpy.ops.object.text_add()
+            ob = bpy.context.object
+            ob.name = name
+        _register_text(ob, table, first)
+
+_caches = {}
+
+@bpy.app.handlers.persistent
+def _update_caches(scene, depsgraph=None):
+    """Sets every object driven by a transform cache to its row for the current frame"""
+
+    frame = scene.frame_current
+    for name, (ob, table, start, paths) in list(_caches.items()):
+        try:
+            # only the current frame's row is read from the memory-mapped file
+            row = table[min(max(frame - start, 0), len(table)-1)]
+            col = 0
+            for path in paths:
+                width = TRANSFORM_WIDTHS[path]
+                setattr(ob, path, row[col:col+width])
+                col += width
+        except ReferenceError:
+            # the object was deleted
+            del _caches[name]
+
+def _load_cache(ob):
+    """Maps the transform cache file of an object and hands it to the shared frame handler"""
+
+    table = np.load(bpy.path.abspath(ob['bpsci_cache']), mmap_mode='r')
+    _caches[ob.name] = (ob, table, int(ob['bpsci_cache_start']), ob['bpsci_cache_paths'].split())
+
+def _load_caches(strict):
+    """Maps the transform caches of every object in the file, an unreadable cache raises with ``strict`` and warns otherwise"""
+
+    _caches.clear()
+    for ob in bpy.data.objects:
+        if 'bpsci_cache' in ob:
+            try:
+                _load_cache(ob)
+            except (OSError, ValueError, KeyError) as e:
+                if strict:
+                    raise
+                warnings.warn('can not read the transform cache of %s: %s' % (ob.name, e), RuntimeWarning)
+    _update_caches(bpy.context.scene)
+
+@bpy.app.handlers.persistent
+def _reload_caches(*args):
+    """Drives the objects of a newly opened file from their transform caches"""
+
+    # a handler must not raise, the file is open either way
+    _load_caches(strict=False)
+
+def load_transform_caches():
+    """
+    Drives every object with a transform cache (see :func:`cache_transforms`) in the open file, and keeps doing so
+    for files opened later in this Blender session. Call it once after opening a .blend file with transform caches
+    in a new session (i.e. from a startup script).
+
+    A cache of the open file that can not be read raises its error here. In files opened later it is reported with
+    a ``RuntimeWarning`` and the other caches are still loaded.
+
+    .. versionadded:: 0.3.6
+    """
+
+    _install_handler(_update_caches)
+    _install_handler(_reload_caches, kind='load_post')
+    _load_caches(strict=True)
+
+def cache_transforms(ob, filepath, tracks, owner=None):
+    """
+    Writes transform tracks to a memory-mapped cache file instead of keyframes, and drives the object from it.
+
+    The file holds the transform at every whole frame (see :func:`bpsci.plan.frame_table`) as float32. Its path is
+    kept in the object's 'bpsci_cache' custom property (Blender's '//' relative paths work), so the .blend file
+    stays small however long the animation is. One shared ``frame_change_pre`` handler reads only the current
+    frame's row of each cache. The object must not have keyframes on the cached properties, they would override it.
+
+    .. versionadded:: 0.3.6
+
+    :param bpy.data.object ob: the object to drive
+    :param str filepath: the cache file to write (``.npy``)
+    :param dict tracks: data path ('location', 'rotation_quaternion' or 'scale') -> :class:`~bpsci.plan.track`
+    :param str owner: the :mod:`bpsci.registry` entity the handler entry is recorded under, defaults to the object's name
+    """
+
+    start, table = frame_table(tracks)
+
+    out = np.lib.format.open_memmap(bpy.path.abspath(filepath), mode='w+', dtype=np.float32, shape=table.shape)
+    out[:] = table
+    out.flush()
+    del out
+
+    ob['bpsci_cache'] = filepath
+    ob['bpsci_cache_start'] = start
+    ob['bpsci_cache_paths'] = ' '.join(tracks)
+
+    _load_cache(ob)
+    registry.register(owner or ob.name, handlers=[(_update_caches, _caches, ob.name)])
+    _install_handler(_update_caches)
+    _install_handler(_reload_caches, kind='load_post')
+    _update_caches(bpy.context.scene)
+
+_swarms = {}
+
+def _update_swarms(scene, depsgraph=None):
+    """Moves the points of every :class:`~bpsci.core.swarm` and :class:`~bpsci.core.vector_field` to the current frame"""
+
+    frame = scene.frame_current
+    for name, sw in list(_swarms.items()):
+        try:
+            sw.set_frame(frame)
+        except ReferenceError:
+            # the swarm object was deleted
+            del _swarms[name]
+
+def _bracket(key_frames, frame):
+    """
+    The key frames on either side of ``frame`` and how far it is from the first to the second, clamped to the
+    first and last key frame
+
+    Returns:
+        :returns (tuple): the index of each key frame and the interpolation weight of the second
+    """
+
+    i = int(np.clip(np.searchsorted(key_frames, frame, side='right')-1, 0, len(key_frames)-1))
+    j = min(i+1, len(key_frames)-1)
+    u = 0.0 if j == i else min(max((frame - key_frames[i])/(key_frames[j] - key_frames[i]), 0.0), 1.0)
+    return i, j, u
+
+def _swarm_node_group(instance, scale=False):
+    """
+    The geometry nodes group that instances ``instance`` on every point, rotated by the 'bpsci_rotation' attribute
+    (and with ``scale`` scaled by the 'bpsci_scale' attribute)
+    """
+
+    name = 'bpsci_swarm_' + instance.name + ('_scaled' if scale else '')
+    ng = bpy.data.node_groups.get(name)
+    if ng is not None:
+        return ng
+
+    ng = bpy.data.node_groups.new(name, 'GeometryNodeTree')
+    if hasattr(ng, 'interface'):
+        ng.interface.new_socket('Geometry', in_out='INPUT', socket_type='NodeSocketGeometry')
+        ng.interface.new_socket('Geometry', in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    else:
+        ng.inputs.new('NodeSocketGeometry', 'Geometry')
+        ng.outputs.new('NodeSocketGeometry', 'Geometry')
+
+    group_in = ng.nodes.new('NodeGroupInput')
+    group_out = ng.nodes.new('NodeGroupOutput')
+
+    info = ng.nodes.new('GeometryNodeObjectInfo')
+    info.inputs['Object'].default_value = instance
+
+    rotation = ng.nodes.new('GeometryNodeInputNamedAttribute')
+    rotation.data_type = 'FLOAT_VECTOR'
+    rotation.inputs['Name'].default_value = 'bpsci_rotation'
+
+    instancer = ng.nodes.new('GeometryNodeInstanceOnPoints')
+
+    ng.links.new(group_in.outputs['Geometry'], instancer.inputs['Points'])
+    ng.links.new(info.outputs['Geometry'], instancer.inputs['Instance'])
+    ng.links.new([out for out in rotation.outputs if out.enabled][0], instancer.inputs['Rotation'])
+    if scale:
+        scaling = ng.nodes.new('GeometryNodeInputNamedAttribute')
+        scaling.data_type = 'FLOAT_VECTOR'
+        scaling.inputs['Name'].default_value = 'bpsci_scale'
+        ng.links.new([out for out in scaling.outputs if out.enabled][0], instancer.inputs['Scale'])
+    ng.links.new(instancer.outputs['Instances'], group_out.inputs['Geometry'])
+
+    return ng
+
+class swarm:
+    """
+    Animates many bodies as the points of one object, each point instancing the same mesh.
+
+    Instead of three empties and a set of F-curves per body (as in :class:`dyn_obj`), the positions and quaternions
+    stay in numpy arrays. One shared ``frame_change_pre`` handler interpolates them to the current frame and writes
+    all points with a single ``foreach_set``. A geometry nodes modifier instances ``instance`` on every point.
+
+    .. versionadded:: 0.3.6
+
+    :param str name: the Blender object name of the swarm
+    :param bpy.data.object instance: the object whose geometry is instanced on every body
+    :param bpy.data.object parent: the Blender object parent of the swarm
+    :param anim: class object that was used to initialize the animation
+    :type anim: :class:`bpsci.core.init_anim`
+    :param np.ndarray positions: the positions of every body over time, shape (N_bodies, len(anim.t), 3)
+    :param np.ndarray quats: the quaternions of every body over time, shape (N_bodies, len(anim.t), 4). Can be passed None if rotation is ignored.
+    :param np.ndarray t: the time of each sample, if the data has its own time vector instead of ``anim.t`` (then the sample axis of ``positions`` and ``quats`` has length len(t)), see :meth:`bpsci.plan.anim_clock.timebase`
+    :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+    """
+
+    def __init__(self, name, instance, parent, anim, positions, quats=None, t=None, mapping='nearest'):
+
+        self.anim = anim
+        """:class:`bpsci.core.init_anim`: class object that was used to initialize the animation"""
+
+        if t is not None:
+            anim = anim.timebase(t, mapping)
+        n_bodies, n_samples = positions.shape[:2]
+
+        # put time first so one frame of every body is one contiguous block
+        positions = np.swapaxes(np.asarray(positions, dtype=float), 0, 1).reshape(n_samples, -1)
+        positions = anim.sample(positions).reshape(-1, n_bodies, 3)*anim.scale
+        if quats is not None:
+            quats = np.swapaxes(np.asarray(quats, dtype=float), 0, 1)
+            if anim.resample is not None:
+                quats = np.stack([anim.sample_quat(quats[:, i]) for i in range(n_bodies)], axis=1)
+
+        # last sample per frame, like keyframe_insert
+        self.key_frames, self.key_index = last_per_frame(anim.frames, np.arange(len(anim.frames)))
+        """:type: `np.ndarray`: the frames that have a sample, and the index of that sample"""
+
+        self.positions = positions[self.key_index.astype(int)]
+        """:type: `np.ndarray`: the scaled positions at each key frame, shape (len(key_frames), N_bodies, 3)"""
+
+        self.quats = None if quats is None else quats[self.key_index.astype(int)]
+        """:type: `np.ndarray`: the quaternions at each key frame, shape (len(key_frames), N_bodies, 4), or None"""
+
+        me = bpy.data.meshes.new(name)
+        me.vertices.add(n_bodies)
+        if quats is not None:
+            me.attributes.new('bpsci_rotation', 'FLOAT_VECTOR', 'POINT')
+
+        self.ob = bpy.data.objects.new(name, me)
+        """:type: `bpy.data.object`: the object whose points are the bodies"""
 
-        fixed_data = frame_interper(all_frames)
+        bpy.context.scene.collection.objects.link(self.ob)
+        self.ob.parent = parent
+
+        mod = self.ob.modifiers.new('bpsci_swarm', 'NODES')
+        mod.node_group = _swarm_node_group(instance)
+
+        self.name = self.ob.name
+        """:type: `str`: the Blender object name of the swarm"""
+
+        _swarms[self.name] = self
+        registry.register(self.name, objects=[self.ob], data=[me], handlers=[(_update_swarms, _swarms, self.name)])
+        _install_handler(_update_swarms)
+        self.set_frame(bpy.context.scene.frame_current)
+
+    def set_frame(self, frame):
+        """
+        Moves every body to where it is at ``frame``, interpolating between samples
+
+        :param float frame: the frame
+        """
+
+        i, j, u = _bracket(self.key_frames, frame)
+
+        me = self.ob.data
+        pos = self.positions[i]*(1-u) + self.positions[j]*u
+        me.vertices.foreach_set('co', pos.astype(np.float32).ravel())
+
+        if self.quats is not None:
+            q0 = self.quats[i]
+            q1 = self.quats[j]*np.where(np.einsum('ij,ij->i', q0, self.quats[j]) < 0, -1.0, 1.0)[:, None]
+            rot = quat_to_euler(q0*(1-u) + q1*u)
+            me.attributes['bpsci_rotation'].data.foreach_set('vector', rot.astype(np.float32).ravel())
+
+        me.update()
+
+class vector_field:
+    """
+    Animates many vectors (i.e. the velocity, acceleration, angular rate or thrust of many bodies) as the points of
+    one object, each point instancing the shared arrow of :func:`arrow_object`.
+
+    Instead of the arrow, two empties, a ``DAMPED_TRACK`` constraint and F-curves per vector (as in :class:`dyn_vec`),
+    the vectors stay in numpy arrays. The shared handler of :class:`swarm` interpolates them to the current frame and
+    writes the rotation and scale of every arrow as point attributes, so there is one object and no constraints
+    however many vectors there are. The unit direction ('bpsci_direction') and the magnitude ('bpsci_magnitude') of
+    each vector are written too, for materials to read with an Attribute node.
+
+    .. versionadded:: 0.3.6
+
+    :param str name: the Blender object name of the field
+    :param bpy.data.object parent: the Blender object parent of the field
+    :param anim: class object that was used to initialize the animation
+    :type anim: :class:`bpsci.core.init_anim`
+    :param np.ndarray positions: where each vector starts over time, shape (N_vectors, len(anim.t), 3), or shape (N_vectors, 3) if they do not move
+    :param np.ndarray vectors: the vectors over time, shape (N_vectors, len(anim.t), 3)
+    :param float scale_mag: the length of an arrow of magnitude ``max_mag`` (purely aesthetic)
+    :param float scale_off: the scaling factor of the arrows' off-axes (purely aesthetic)
+    :param float max_mag: the magnitude that is drawn ``scale_mag`` long, defaults to the largest magnitude of all vectors, so every arrow shares one scale
+    :param np.ndarray t: the time of each sample, if the data has its own time vector instead of ``anim.t`` (then the sample axis of ``positions`` and ``vectors`` has length len(t)), see :meth:`bpsci.plan.anim_clock.timebase`
+    :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+    """
+
+    def __init__(self, name, parent, anim, positions, vectors, scale_mag=1, scale_off=1, max_mag=None, t=None,
+                 mapping='nearest'):
+
+        self.anim = anim
+        """:class:`bpsci.core.init_anim`: class object that was used to initialize the animation"""
+
+        if t is not None:
+            anim = anim.timebase(t, mapping)
+        vectors = np.asarray(vectors, dtype=float)
+        n_vectors, n_samples = vectors.shape[:2]
+        positions = np.asarray(positions, dtype=float)
+        if positions.ndim == 2:
+            positions = np.broadcast_to(positions[:, None], vectors.shape)
+
+        # put time first so one frame of every vector is one contiguous block
+        data = np.concatenate([positions, vectors], axis=2)
+        data = np.swapaxes(data, 0, 1).reshape(n_samples, -1)
+        data = anim.sample(data).reshape(-1, n_vectors, 6)
+
+        # last sample per frame, like keyframe_insert
+        self.key_frames, self.key_index = last_per_frame(anim.frames, np.arange(len(anim.frames)))
+        """:type: `np.ndarray`: the frames that have a sample, and the index of that sample"""
+
+        data = data[self.key_index.astype(int)]
+
+        self.positions = data[..., :3]*anim.scale
+        """:type: `np.ndarray`: the scaled start of each vector at each key frame, shape (len(key_frames), N_vectors, 3)"""
+
+        self.vectors = data[..., 3:]
+        """:type: `np.ndarray`: the vectors at each key frame, shape (len(key_frames), N_vectors, 3)"""
+
+        if max_mag is None:
+            max_mag = np.sqrt(np.max(np.einsum('...i,...i->...', self.vectors, self.vectors), initial=0))
+
+        self.max_mag = max_mag or 1
+        """:type: `float`: the magnitude that is drawn :attr:`scale_mag` long"""
+
+        self.scale_mag = scale_mag
+        """:type: `float`: the length of an arrow of magnitude :attr:`max_mag`"""
+
+        self.scale_off = scale_off
+        """:type: `float`: the scaling factor of the arrows' off-axes"""
 
-        if not(if_str):
-            def recalculate_text(scene):
-                text = ob
-                cur_frame = bpy.context.scene.frame_current
-                
-                text.data.body = ('{0:.'+str(fix_place)+'f}').format(fixed_data[cur_frame-1]) + ' ' + label
-                    
+        me = bpy.data.meshes.new(name)
+        me.vertices.add(n_vectors)
+        for attr, data_type in (('bpsci_rotation', 'FLOAT_VECTOR'), ('bpsci_scale', 'FLOAT_VECTOR'),
+                                ('bpsci_direction', 'FLOAT_VECTOR'), ('bpsci_magnitude', 'FLOAT')):
+            me.attributes.new(attr, data_type, 'POINT')
 
-            bpy.app.handlers.frame_change_pre.append(recalculate_text)
+        self.ob = bpy.data.objects.new(name, me)
+        """:type: `bpy.data.object`: the object whose points are the starts of the vectors"""
+
+        bpy.context.scene.collection.objects.link(self.ob)
+        self.ob.parent = parent
+
+        mod = self.ob.modifiers.new('bpsci_vector_field', 'NODES')
+        mod.node_group = _swarm_node_group(arrow_object(), scale=True)
+
+        self.name = self.ob.name
+        """:type: `str`: the Blender object name of the field"""
+
+        _swarms[self.name] = self
+        registry.register(self.name, objects=[self.ob], data=[me], handlers=[(_update_swarms, _swarms, self.name)])
+        _install_handler(_update_swarms)
+        self.set_frame(bpy.context.scene.frame_current)
+
+    @classmethod
+    def from_positions(cls, name, parent, anim, positions, order=1, t=None, **kwargs):
+        """
+        Makes a field of the velocity (``order`` 1) or acceleration (``order`` 2) of many bodies, differentiated from
+        their positions with :func:`bpsci.resample.derivative`, each vector starting at its body
+
+        :param str name: the Blender object name of the field
+        :param bpy.data.object parent: the Blender object parent of the field
+        :param anim: class object that was used to initialize the animation
+        :type anim: :class:`bpsci.core.init_anim`
+        :param np.ndarray positions: the positions of every body over time, shape (N_bodies, len(anim.t), 3)
+        :param int order: the order of the derivative
+        :param np.ndarray t: the time of each sample, if the data has its own time vector instead of ``anim.t``
+        :param kwargs: passed on to :class:`vector_field`
+
+        Returns:
+            :returns (:class:`vector_field`) the field
+        """
+
+        vectors = derivative(positions, anim.t if t is None else t, order, axis=1)
+        return cls(name, parent, anim, positions, vectors, t=t, **kwargs)
+
+    def set_frame(self, frame):
+        """
+        Points every arrow along its vector at ``frame``, interpolating between samples
+
+        :param float frame: the frame
+        """
+
+        i, j, u = _bracket(self.key_frames, frame)
+
+        pos = self.positions[i]*(1-u) + self.positions[j]*u
+        vec = self.vectors[i]*(1-u) + self.vectors[j]*u
+        mag = np.sqrt(np.einsum('ij,ij->i', vec, vec))
+        direction = np.divide(vec, mag[:, None], out=np.zeros_like(vec), where=mag[:, None] > 0)
+
+        # the arrow points along its x axis, zero vectors keep it unrotated at zero length
+        x_axis = np.broadcast_to([1.0, 0.0, 0.0], direction.shape)
+        rot = quat_to_euler(align_quat(x_axis, np.where(mag[:, None] > 0, direction, x_axis)))
+        scale = np.empty_like(vec)
+        scale[:, 0] = mag/self.max_mag*self.scale_mag
+        scale[:, 1:] = self.scale_off
+
+        me = self.ob.data
+        me.vertices.foreach_set('co', pos.astype(np.float32).ravel())
+        attributes = me.attributes
+        attributes['bpsci_rotation'].data.foreach_set('vector', rot.astype(np.float32).ravel())
+        attributes['bpsci_scale'].data.foreach_set('vector', scale.astype(np.float32).ravel())
+        attributes['bpsci_direction'].data.foreach_set('vector', direction.astype(np.float32).ravel())
+        attributes['bpsci_magnitude'].data.foreach_set('value', mag.astype(np.float32))
+        me.update()
+
+def curves_to_meshes(curves):
+    """
+    Converts curve objects to mesh objects of the same name, all of them from one evaluation of the depsgraph and
+    without changing the selection. The curves are removed in one batch, and :mod:`bpsci.registry` records the
+    meshes in their place.
+
+    .. versionadded:: 0.3.6
+
+    :param list curves: the curve objects
+
+    Returns:
+        :returns (list): the mesh objects, in the order of ``curves``
+    """
+
+    deg = bpy.context.evaluated_depsgraph_get()
+
+    meshes = []
+    for curve in curves:
+        me = bpy.data.meshes.new_from_object(curve.evaluated_get(deg), depsgraph=deg)
+        new_obj = bpy.data.objects.new(curve.name + "_mesh", me)
+        for collection in curve.users_collection:
+            collection.objects.link(new_obj)
+        new_obj.matrix_world = curve.matrix_world
+        meshes.append(new_obj)
+
+    names = [curve.name for curve in curves]
+    registry.replace(list(zip(curves, meshes)))
+    bpy.data.batch_remove(list(curves))
+    for name, new_obj in zip(names, meshes):
+        new_obj.name = name
+
+    return meshes
 
 def curve_to_mesh(curve):
-    context = bpy.context
-    deg = context.evaluated_depsgraph_get()
-    me = bpy.data.meshes.new_from_object(curve.evaluated_get(deg), depsgraph=deg)
-    
-    curve_name = curve.name
+    """
+    Converts a curve object to a mesh object of the same name, which is selected and made active
+
+    .. versionchanged:: 0.3.6
+        uses :func:`curves_to_meshes`, the mesh is linked to the collections of the curve
+
+    :param bpy.types.Object curve: the curve object
+
+    Returns:
+        :returns (:class:`bpy.types.Object`) the mesh object
+    """
 
-    new_obj = bpy.data.objects.new(curve.name + "_mesh", me)
-    context.collection.objects.link(new_obj)
+    context = bpy.context
+    new_obj, = curves_to_meshes([curve])
 
     for o in context.selected_objects:
         o.select_set(False)
 
-    new_obj.matrix_world = curve.matrix_world
     new_obj.select_set(True)
     context.view_layer.objects.active = new_obj
-    
-    bpy.data.objects.remove(curve, do_unlink=True)
-    new_obj.name = curve_name
\ No newline at end of file
+
+    return new_obj
@@ -0,0 +1,151 @@
+"""
+Error-Bounded Keyframe Decimation - :mod:`bpsci.decimate`
+=========================================================
+Pure NumPy routines that remove keyframes from position and attitude tracks while keeping the
+linearly interpolated track within a user-set tolerance of the original samples.
+"""
+
+import numpy as np
+
+def last_per_frame(frames, values):
+    """
+    Drops samples that land on an already used frame, keeping the last one (like repeated ``keyframe_insert`` calls)
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray frames: the frame of each sample
+    :param np.ndarray values: the value of each sample, shape (len(frames),) or (len(frames), n)
+
+    Returns:
+        :returns (tuple[np.ndarray]): the sorted unique frames and their values
+    """
+
+    frames = np.asarray(frames, dtype=float)
+    values = np.asarray(values, dtype=float)
+    frames, last = np.unique(frames[::-1], return_index=True)
+    return frames, values[::-1][last]
+
+def _rdp(frames, values, tol, error, force=None):
+    """
+    Ramer-Douglas-Peucker over the frame axis, returns the kept indices and the largest error left.
+    ``force(a, b)`` can demand a split of the span between samples a and b even if it is within ``tol``.
+    """
+
+    n = len(frames)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    max_err = 0.0
+
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+
+        u = (frames[a + 1:b] - frames[a]) / (frames[b] - frames[a])
+        err = error(values[a], values[b], u, values[a + 1:b])
+        i = int(np.argmax(err))
+
+        if err[i] > tol or force is not None and force(a, b):
+            m = a + 1 + i
+            keep[m] = True
+            stack.append((a, m))
+            stack.append((m, b))
+        else:
+            max_err = max(max_err, float(err[i]))
+
+    return np.flatnonzero(keep), max_err
+
+def _position_error(v0, v1, u, orig):
+    interp = v0 + u[:, None] * (v1 - v0)
+    return np.linalg.norm(interp - orig, axis=1)
+
+def _attitude_error(q0, q1, u, orig):
+    # Blender interpolates the quaternion channels linearly and normalizes the result
+    interp = q0 + u[:, None] * (q1 - q0)
+    interp /= np.linalg.norm(interp, axis=1)[:, None]
+    dots = np.abs(np.einsum('ij,ij->i', interp, orig))
+    return 2 * np.arccos(np.clip(dots, 0.0, 1.0))
+
+def _chord_error(p0, p1, u, orig):
+    # distance to the chord itself, not to the infinite line through it
+    chord = p1 - p0
+    length2 = chord @ chord
+    s = np.clip((orig - p0) @ chord / length2, 0.0, 1.0) if length2 > 0 else np.zeros(len(orig))
+    return np.linalg.norm(p0 + s[:, None] * chord - orig, axis=1)
+
+def _turning(points):
+    """The angle the path turns at each point (0 at both ends and at repeated points)"""
+
+    seg = np.diff(points, axis=0)
+    norm = np.linalg.norm(seg, axis=1)
+    seg = np.divide(seg, norm[:, None], out=np.zeros_like(seg), where=norm[:, None] > 0)
+    turn = np.zeros(len(points))
+    turn[1:-1] = np.arccos(np.clip(np.einsum('ij,ij->i', seg[1:], seg[:-1]), -1.0, 1.0))
+    return turn
+
+def _report(n_in, keep, max_err):
+    return {'keys_in': n_in, 'keys_out': len(keep), 'ratio': n_in / len(keep), 'max_error': max_err}
+
+def decimate_positions(frames, positions, tol):
+    """
+    Simplifies a position track so that, with linear interpolation between the kept keys,
+    every original sample is within ``tol`` of the track at its frame
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray frames: the (unique, increasing) frame of each sample
+    :param np.ndarray positions: the positions over time, shape (len(frames), n)
+    :param float tol: the largest distance allowed between the original and simplified track (scene units)
+
+    Returns:
+        :returns (tuple): the kept indices and a report dict with ``keys_in``, ``keys_out``, ``ratio`` and ``max_error``
+    """
+
+    positions = np.asarray(positions, dtype=float).reshape(len(frames), -1)
+    keep, max_err = _rdp(np.asarray(frames, dtype=float), positions, tol, _position_error)
+    return keep, _report(len(frames), keep, max_err)
+
+def decimate_quats(frames, quat, tol):
+    """
+    Simplifies an attitude track so that, with normalized linear interpolation between the kept keys,
+    every original sample is within ``tol`` radians of the track at its frame
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray frames: the (unique, increasing) frame of each sample
+    :param np.ndarray quat: the quaternions over time, shape (len(frames), 4). Their sign should be continuous, see :func:`~bpsci.resample.unflip_quat`
+    :param float tol: the largest rotation angle allowed between the original and simplified track (radians)
+
+    Returns:
+        :returns (tuple): the kept indices and a report dict with ``keys_in``, ``keys_out``, ``ratio`` and ``max_error``
+    """
+
+    quat = np.asarray(quat, dtype=float)
+    quat = quat / np.linalg.norm(quat, axis=1)[:, None]
+    keep, max_err = _rdp(np.asarray(frames, dtype=float), quat, tol, _attitude_error)
+    return keep, _report(len(frames), keep, max_err)
+
+def decimate_path(points, tol, max_angle=None):
+    """
+    Simplifies a polyline so that every original point is within ``tol`` of the simplified one (its chord error),
+    and, if ``max_angle`` is given, so that the original path never turns by more than ``max_angle`` within one
+    simplified segment, which keeps tight bends smooth however loose ``tol`` is
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray points: the points of the path, shape (n, 3)
+    :param float tol: the largest distance allowed between an original point and the simplified path (scene units)
+    :param float max_angle: the largest total turning of the original path along one simplified segment (radians)
+
+    Returns:
+        :returns (tuple): the kept indices and a report dict with ``keys_in``, ``keys_out``, ``ratio`` and ``max_error``
+    """
+
+    points = np.asarray(points, dtype=float)
+    force = None
+    if max_angle is not None:
+        total = np.concatenate([[0.0], np.cumsum(_turning(points))])
+        force = lambda a, b: total[b] - total[a + 1] > max_angle
+    keep, max_err = _rdp(np.arange(len(points), dtype=float), points, tol, _chord_error, force)
+    return keep, _report(len(points), keep, max_err)
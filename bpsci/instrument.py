@@ -0,0 +1,282 @@
+"""
+Call Counting and Timing Instrumentation - :mod:`bpsci.instrument`
+==================================================================
+An opt-in profiler of how bpsci spends its time in Blender.
+
+While enabled, every method of the :mod:`bpsci.core` classes and every public function it calls is timed, and
+the work done inside each one is counted: calls that go through ``bpy.data`` and ``bpy.ops``, keyframes added
+and datablocks (objects, curves, meshes, ...) created. Keyframes and datablocks are counted as the change in the
+file, so a key that replaces one on the same frame is not counted. Nothing is patched until :func:`enable` is
+called, and :func:`disable` puts the original functions back, so it costs nothing when it is off::
+
+    from bpsci import instrument
+
+    with instrument.recording():
+        craft.apply_animation(x, y, z, quat)
+        craft.apply_streamline('dynamic', x, y, z, .1)
+
+    print(instrument.report())
+    instrument.save_trace('build_trace.json')  # open in chrome://tracing or https://ui.perfetto.dev
+
+Counts are attributed to the innermost bpsci call they happen in ('self'), and summed over its callees ('total').
+
+The 'data/ops calls' are only the calls made on ``bpy.data`` collections and ``bpy.ops`` operators, not all RNA
+traffic: ``keyframe_insert``, ``foreach_set`` and property writes on the datablocks themselves are not counted
+(they would have to be wrapped, and a wrapped datablock can not be handed back to Blender). How many keys a call
+writes, one ``keyframe_insert`` each on the per-frame paths, shows in the 'keyframes' column.
+"""
+
+import functools
+import inspect
+import json
+import time
+from contextlib import contextmanager
+
+import bpy
+
+import bpsci.core as _core
+import bpsci.utils as _utils
+
+_DATA_COLLECTIONS = ('objects', 'curves', 'meshes', 'actions', 'node_groups', 'collections', 'materials')
+
+_FIELDS = ('time', 'data_ops_calls', 'keyframes', 'datablocks')
+
+_patched = []
+_stats = {}
+_events = []
+_stack = []
+_origin = None
+
+class _bpy_proxy:
+    """
+    Stands in for the ``bpy`` module inside bpsci while enabled. ``bpy.data`` collections and ``bpy.ops`` operators
+    are wrapped so that their calls are counted, everything else (and every datablock) is the real one.
+    """
+
+    def __init__(self, target, path):
+        self._target = target
+        self._path = path
+
+    def __getattr__(self, name):
+
+        attr = getattr(self._target, name)
+        path = self._path + '.' + name
+
+        if path in ('bpy.data', 'bpy.ops') or path.startswith('bpy.ops.') and path.count('.') == 2 or \
+                path.startswith('bpy.data.') and name in _DATA_COLLECTIONS:
+            return _bpy_proxy(attr, path)
+        if callable(attr) and (path.startswith('bpy.data.') or path.startswith('bpy.ops.')):
+            return _count(attr)
+        return attr
+
+    def __getitem__(self, key):
+        return self._target[key]
+
+    def __contains__(self, key):
+        return key in self._target
+
+    def __iter__(self):
+        return iter(self._target)
+
+    def __len__(self):
+        return len(self._target)
+
+def _count(fn):
+    def counted(*args, **kwargs):
+        _bump('data_ops_calls', 1)
+        return fn(*args, **kwargs)
+    return counted
+
+def _bump(field, n):
+    if _stack:
+        _stack[-1]['self'][field] += n
+
+def _snapshot():
+    """The number of keyframes and datablocks in the file"""
+
+    keys = 0
+    for action in bpy.data.actions:
+        for fc in getattr(action, 'fcurves', ()):
+            keys += len(fc.keyframe_points)
+    blocks = sum(len(getattr(bpy.data, name)) for name in _DATA_COLLECTIONS if hasattr(bpy.data, name))
+    return keys, blocks
+
+def _traced(key, fn):
+    """Wraps a function so that each call is a span of the profile"""
+
+    @functools.wraps(fn)
+    def traced(*args, **kwargs):
+
+        keys, blocks = _snapshot()
+        span = {'self': dict.fromkeys(_FIELDS, 0), 'children': dict.fromkeys(_FIELDS, 0)}
+        _stack.append(span)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            _stack.pop()
+
+            keys_after, blocks_after = _snapshot()
+            total = {'time': end - start,
+                     'data_ops_calls': span['self']['data_ops_calls'] + span['children']['data_ops_calls'],
+                     'keyframes': keys_after - keys, 'datablocks': blocks_after - blocks}
+            own = {field: total[field] - span['children'][field] for field in _FIELDS}
+            own['data_ops_calls'] = span['self']['data_ops_calls']
+
+            stats = _stats.setdefault(key, {'calls': 0, 'total': dict.fromkeys(_FIELDS, 0),
+                                            'self': dict.fromkeys(_FIELDS, 0)})
+            stats['calls'] += 1
+            for field in _FIELDS:
+                stats['total'][field] += total[field]
+                stats['self'][field] += own[field]
+
+            if _stack:
+                for field in _FIELDS:
+                    _stack[-1]['children'][field] += total[field]
+
+            _events.append({'name': key, 'ph': 'X', 'pid': 0, 'tid': 0, 'ts': (start - _origin)*1e6,
+                            'dur': (end - start)*1e6, 'args': {f: total[f] for f in _FIELDS[1:]}})
+
+    return traced
+
+def _targets():
+    """Every (owner, attribute name, profile key) that is traced"""
+
+    for name, obj in vars(_core).items():
+        if name.startswith('_') or not getattr(obj, '__module__', '').startswith('bpsci'):
+            continue
+        if inspect.isclass(obj) and obj.__module__ == _core.__name__:
+            for attr, member in vars(obj).items():
+                if inspect.isfunction(member) and (attr == '__init__' or not attr.startswith('_')):
+                    yield obj, attr, obj.__name__ + '.' + attr
+        elif inspect.isfunction(obj):
+            yield _core, name, name
+
+def _patch(owner, attr, value):
+    _patched.append((owner, attr, vars(owner)[attr]))
+    setattr(owner, attr, value)
+
+def enable():
+    """
+    Starts recording. Patches the :mod:`bpsci.core` classes and functions, does nothing if already enabled.
+
+    .. versionadded:: 0.3.6
+    """
+
+    global _origin
+
+    if _patched:
+        return
+
+    if _origin is None:
+        _origin = time.perf_counter()
+
+    for owner, attr, key in list(_targets()):
+        _patch(owner, attr, _traced(key, vars(owner)[attr]))
+
+    proxy = _bpy_proxy(bpy, 'bpy')
+    _patch(_core, 'bpy', proxy)
+    _patch(_utils, 'bpy', proxy)
+
+def disable():
+    """
+    Stops recording and restores the original functions. The recorded profile is kept until :func:`reset`.
+
+    .. versionadded:: 0.3.6
+    """
+
+    while _patched:
+        owner, attr, original = _patched.pop()
+        setattr(owner, attr, original)
+
+def is_enabled():
+    """
+    .. versionadded:: 0.3.6
+
+    Returns:
+        :returns (bool): whether bpsci is being recorded
+    """
+
+    return bool(_patched)
+
+def reset():
+    """
+    Clears the recorded profile
+
+    .. versionadded:: 0.3.6
+    """
+
+    global _origin
+
+    _stats.clear()
+    del _events[:]
+    _origin = time.perf_counter() if _patched else None
+
+@contextmanager
+def recording(clear=True):
+    """
+    Records bpsci for the duration of a ``with`` block
+
+    .. versionadded:: 0.3.6
+
+    :param bool clear: whether to clear the previously recorded profile first
+    """
+
+    if clear:
+        reset()
+    was_enabled = is_enabled()
+    enable()
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
+
+def stats():
+    """
+    .. versionadded:: 0.3.6
+
+    Returns:
+        :returns (dict): per traced function (i.e. 'ref_frame.dynamic_6DOF'), the number of ``calls`` and the
+        ``total`` and ``self`` time [s], calls on ``bpy.data`` and ``bpy.ops`` ('data_ops_calls'), keyframes added
+        and datablocks created
+    """
+
+    return {key: {'calls': s['calls'], 'total': dict(s['total']), 'self': dict(s['self'])} for key, s in _stats.items()}
+
+def report(sort='time'):
+    """
+    Formats the recorded profile as a table, sorted by self time (or another field)
+
+    .. versionadded:: 0.3.6
+
+    :param str sort: the 'self' field to sort by ['time', 'data_ops_calls', 'keyframes' or 'datablocks']
+
+    Returns:
+        :returns (str): the report
+    """
+
+    rows = sorted(_stats.items(), key=lambda item: item[1]['self'][sort], reverse=True)
+    width = max([len(key) for key in _stats] + [8])
+
+    lines = ['%-*s %7s %10s %10s %14s %10s %10s' % (width, 'function', 'calls', 'total [s]', 'self [s]', 'data/ops calls',
+                                                     'keyframes', 'datablocks')]
+    for key, s in rows:
+        lines.append('%-*s %7d %10.4f %10.4f %14d %10d %10d' % (width, key, s['calls'], s['total']['time'],
+                                                                 s['self']['time'], s['self']['data_ops_calls'],
+                                                                 s['self']['keyframes'], s['self']['datablocks']))
+    return '\n'.join(lines)
+
+def save_trace(filepath):
+    """
+    Writes every recorded call as a JSON trace in the Trace Event Format, which ``chrome://tracing`` and
+    Perfetto can display as a timeline, along with the summary of :func:`stats`
+
+    .. versionadded:: 0.3.6
+
+    :param str filepath: path of the JSON file to write
+    """
+
+    with open(filepath, 'w') as f:
+        json.dump({'traceEvents': _events, 'displayTimeUnit': 'ms', 'bpsci': stats()}, f)
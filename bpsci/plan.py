@@ -0,0 +1,972 @@
+"""
+Headless Animation Plans - :mod:`bpsci.plan`
+============================================
+Everything bpsci computes before it talks to Blender, in pure NumPy.
+
+An :class:`~bpsci.plan.anim_plan` holds, for every Blender object, the keyframe tracks (frames, values and interpolation)
+of its locations, quaternions, scales and bevel factors, plus streamline points and text tables. Plans can be built
+and saved to ``.npz`` on a machine without Blender, then loaded and pushed into Blender in bulk with
+:func:`bpsci.core.apply_plan`.
+"""
+
+import json
+from collections import namedtuple
+
+import numpy as np
+
+from bpsci.resample import (resample as _resample, slerp, unflip_quat, quat_multiply, quat_rotate, interp_linear,
+                            euler_to_quat)
+from bpsci.decimate import last_per_frame, decimate_positions, decimate_quats, decimate_path
+
+track = namedtuple('track', ['frames', 'values', 'interpolation'])
+track.__doc__ = """
+One animated property: the frame of each key, the key values, shape (len(frames), array length), and the
+interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+"""
+
+def arc_length_frac(x, y, z):
+    # float up front, the in-place operations below can not cast integer coordinates
+    seg = np.diff(np.asarray(x, dtype=float)) ** 2
+    seg += np.diff(np.asarray(y, dtype=float)) ** 2
+    seg += np.diff(np.asarray(z, dtype=float)) ** 2
+    np.sqrt(seg, out=seg)
+
+    frac = np.empty(len(seg) + 1)
+    frac[0] = 0
+    np.cumsum(seg, out=frac[1:])
+    frac /= frac[-1]
+    return frac
+
+class anim_clock:
+    """
+    The timing of an animation, without Blender. :class:`bpsci.core.init_anim` is an :class:`anim_clock` that reads
+    the frame rate from and sets the frame range of the current scene.
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray t: contains the time information that corresponds with the six degrees of freedom data
+    :param float speed_up: the 'real time speed up' or the ratio of the duration of the data to the duration of the animation
+    :param float scale: global physical scale factor of the animation, i.e., .1 will reduce everything to be 1/10th its original size
+    :param float frame_rate: frame rate of the animation
+    :param str resample: if given ['linear' or 'cubic'], all data is resampled to exactly one sample per frame before it is keyed
+    """
+
+    def __init__(self, t, speed_up, scale, frame_rate, resample=None):
+
+        self.frame_rate = frame_rate
+        """:type: `float`: frame rate of animation"""
+
+        self.t = t
+        """:type: `np.ndarray`: contains the time information that corresponds with the six degrees of freedom data"""
+
+        self.speed_up = speed_up
+        """:type: `float`: the "real time speed up" or the ratio of the duration of the data to the duration of the animation"""
+
+        self.frame_duration = int(t[-1]/speed_up*self.frame_rate)
+        """:type: `int`: number of total frames in animation"""
+
+        self.resample = resample
+        """:type: `str`: the interpolation used to resample data onto the frame grid ['linear' or 'cubic'], None if data is keyed as given"""
+
+        if resample is None:
+            self.frames_per_t = self.frame_duration/(t[-1]*1.00001)
+            """:type: `float`: the number of frames per unit of ``t``, fixed when the animation is created so :meth:`extend` does not move existing frames"""
+
+            self.frames = self.time_to_frame(t)
+            """:type: `np.ndarray`: the frames that Blender will animate and have corresponding data for"""
+
+            self.frame_t = None
+            """:type: `np.ndarray`: the time of each frame when resampling, None otherwise"""
+        else:
+            self.frames = np.arange(self.frame_duration+1)
+            self.frame_t = self.frames/max(self.frame_duration, 1)*t[-1]
+            self.frames_per_t = max(self.frame_duration, 1)/t[-1]
+
+        self._buffers = {}
+
+        self.scale = scale
+        """:type: `float`: global physical scale factor of the animation, i.e., .1 will reduce everything to be 1/10th its original size"""
+
+    def _append(self, name, new):
+        """Appends to one of the growing arrays (t, frames, frame_t), amortized O(len(new)) as its buffer doubles"""
+
+        old = getattr(self, name)
+        n = len(old)
+        buf = self._buffers.get(name)
+        if buf is None or len(buf) < n + len(new):
+            buf = np.empty(max(2*(n + len(new)), 16), dtype=np.result_type(old, new))
+            buf[:n] = old
+            self._buffers[name] = buf
+        buf[n:n + len(new)] = new
+        setattr(self, name, buf[:n + len(new)])
+
+    def extend(self, t_new):
+        """
+        Appends new samples to the animation (i.e. from a simulation checkpoint). Existing frames do not move: the new
+        times are mapped to frames with the same :attr:`frames_per_t`, and the animation gets longer.
+
+        .. versionadded:: 0.3.6
+
+        :param np.ndarray t_new: the times of the new samples, after the last time of :attr:`t`
+
+        Returns:
+            :returns (np.ndarray): the new entries of :attr:`frames`
+        """
+
+        t_new = np.asarray(t_new, dtype=float)
+        if len(t_new) and t_new[0] <= self.t[-1]:
+            raise ValueError('new samples must come after t = %g' % self.t[-1])
+
+        self._append('t', t_new)
+        duration = max(self.frame_duration, int(self.t[-1]/self.speed_up*self.frame_rate))
+
+        if self.resample is None:
+            new_frames = self.time_to_frame(t_new)
+        else:
+            new_frames = np.arange(self.frame_duration + 1, duration + 1)
+            self._append('frame_t', np.minimum(new_frames/self.frames_per_t, self.t[-1]))
+        self._append('frames', new_frames)
+        self.frame_duration = duration
+
+        return new_frames
+
+    def time_to_frame(self, t, mapping='nearest'):
+        """
+        Maps times on this animation's time axis to frames, with the same :attr:`frames_per_t` as its own samples
+
+        .. versionadded:: 0.3.6
+
+        :param np.ndarray t: the times
+        :param str mapping: 'nearest' puts each time on the whole frame it falls in, the same frames the clock gives its own samples, 'interpolated' keeps the exact (fractional) frame, so samples between frames become subframe keys
+
+        Returns:
+            :returns (np.ndarray): the frame of each time, integers for 'nearest'
+        """
+
+        frames = np.asarray(t, dtype=float)*self.frames_per_t
+        if mapping == 'nearest':
+            # truncated like the clock's own frames, so the same time lands on the same frame for every entity
+            return frames.astype(int)
+        if mapping == 'interpolated':
+            return frames
+        raise ValueError("mapping must be 'nearest' or 'interpolated', not %r" % (mapping,))
+
+    def timebase(self, t, mapping='nearest'):
+        """
+        Returns the timing of data that has its own time vector (i.e. a 1 Hz ephemeris next to a 1 kHz attitude log),
+        mapped onto this animation's frames
+
+        .. versionadded:: 0.3.6
+
+        :param np.ndarray t: the time of each sample of the data, on the same time axis as :attr:`t`
+        :param str mapping: how the times are mapped to frames ['nearest' or 'interpolated'], see :meth:`time_to_frame`
+
+        Returns:
+            :returns (:class:`timebase`) the timing of the data
+        """
+
+        return timebase(self, t, mapping)
+
+    def sample(self, values, kind=None):
+        """
+        Returns data at the animation's frames. If the animation is not resampled, the data is returned as is.
+
+        :param np.ndarray values: the data over time (same length as ``t``), shape (len(t),) or (len(t), n)
+        :param str kind: overrides the interpolation of the animation ['linear' or 'cubic']
+
+        Returns:
+            :returns (np.ndarray): the data, one sample per entry of :attr:`frames`
+        """
+
+        if self.resample is None:
+            return values
+
+        return _resample(values, self.t, self.frame_t, kind or self.resample)
+
+    def sample_quat(self, quat):
+        """
+        Returns quaternions at the animation's frames using spherical linear interpolation.
+        If the animation is not resampled, the quaternions are returned as is.
+
+        :param np.ndarray quat: a numpy array of quaternions over time (same length as ``t``)
+
+        Returns:
+            :returns (np.ndarray): the quaternions, one per entry of :attr:`frames`
+        """
+
+        if self.resample is None or quat is None:
+            return quat
+
+        return slerp(quat, self.t, self.frame_t)
+
+class timebase(anim_clock):
+    """
+    The timing of one entity's own samples on a shared :class:`anim_clock`. Every sample is keyed at the frame of its
+    time (see :meth:`anim_clock.time_to_frame`), nothing is resampled onto a common grid, so each track keeps only
+    its native samples. It can be passed anywhere an :class:`anim_clock` is expected for data of the same length as
+    its :attr:`t`.
+
+    .. versionadded:: 0.3.6
+
+    :param clock: the shared clock
+    :type clock: :class:`anim_clock`
+    :param np.ndarray t: the time of each sample of the data, on the same time axis as ``clock.t``
+    :param str mapping: how the times are mapped to frames ['nearest' or 'interpolated']
+    """
+
+    def __init__(self, clock, t, mapping='nearest'):
+
+        self.clock = clock
+        """:class:`anim_clock`: the shared clock"""
+
+        self.mapping = mapping
+        """:type: `str`: how the times are mapped to frames ['nearest' or 'interpolated']"""
+
+        self.t = np.asarray(t, dtype=float)
+        """:type: `np.ndarray`: the time of each sample of the data"""
+
+        self.frames = clock.time_to_frame(self.t, mapping)
+        """:type: `np.ndarray`: the frame of each sample"""
+
+        self.frame_rate = clock.frame_rate
+        self.speed_up = clock.speed_up
+        self.scale = clock.scale
+        self.frames_per_t = clock.frames_per_t
+        self.frame_duration = clock.frame_duration
+        self.resample = None
+        self.frame_t = None
+        self._buffers = {}
+
+    def extend(self, t_new):
+        """
+        Appends new samples (i.e. from a simulation checkpoint), mapped to frames like the existing ones. The shared
+        clock is not changed.
+
+        :param np.ndarray t_new: the times of the new samples, after the last time of :attr:`t`
+
+        Returns:
+            :returns (np.ndarray): the new entries of :attr:`frames`
+        """
+
+        t_new = np.asarray(t_new, dtype=float)
+        if len(t_new) and t_new[0] <= self.t[-1]:
+            raise ValueError('new samples must come after t = %g' % self.t[-1])
+
+        new_frames = self.clock.time_to_frame(t_new, self.mapping)
+        self._append('t', t_new)
+        self._append('frames', new_frames)
+        return new_frames
+
+def appended_samples(anim, values, n, n_frames, last=None, quat=False, kind=None):
+    """
+    Maps samples appended with :meth:`anim_clock.extend` onto the animation's frames
+
+    .. versionadded:: 0.3.6
+
+    :param anim: the animation clock
+    :type anim: :class:`anim_clock`
+    :param np.ndarray values: the new samples, at the times ``anim.t[n:n+len(values)]``, shape (len(values),) or (len(values), k)
+    :param int n: the number of samples that were already keyed
+    :param int n_frames: the number of entries of ``anim.frames`` that were already keyed
+    :param np.ndarray last: the last sample that was already keyed (only used when resampling)
+    :param bool quat: whether the samples are quaternions, which are interpolated with :func:`~bpsci.resample.slerp`
+    :param str kind: overrides the interpolation of the animation ['linear' or 'cubic']
+
+    Returns:
+        :returns (tuple): the frames to key, the values to key at them and the new last sample (sign corrected for quaternions)
+    """
+
+    values = np.asarray(values, dtype=float)
+    if quat and last is not None:
+        # keep the sign continuous with the keys already written
+        values = unflip_quat(np.concatenate([[last], values]))[1:]
+    if anim.resample is None:
+        return anim.frames[n:n + len(values)], values, values[-1]
+
+    t = anim.t[n - 1:n + len(values)]
+    values_t = np.concatenate([[last], values])
+    end = n_frames + np.searchsorted(anim.frame_t[n_frames:], t[-1], side='right')
+    frame_t = anim.frame_t[n_frames:end]
+
+    if quat:
+        return anim.frames[n_frames:end], slerp(values_t, t, frame_t), values[-1]
+    return anim.frames[n_frames:end], _resample(values_t, t, frame_t, kind or anim.resample), values[-1]
+
+def rotation_track(frames, quat, interpolation='BEZIER', ang_tol=None):
+    """
+    Builds the ``rotation_quaternion`` track of a reference frame
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray frames: the frame of each quaternion
+    :param np.ndarray quat: a numpy array of quaternions over time in scipy's (x, y, z, w) order
+    :param str interpolation: the keyframe interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+    :param float ang_tol: if given, the track is decimated to this angular tolerance (radians) and interpolated linearly
+
+    Returns:
+        :returns (tuple): the :class:`track` in Blender's (w, x, y, z) order and the decimation report (None if not decimated)
+    """
+
+    quat = np.asarray(quat)[:, [3, 0, 1, 2]]
+    if ang_tol is None:
+        return track(frames, quat, interpolation), None
+
+    frames, quat = last_per_frame(frames, unflip_quat(quat))
+    keep, report = decimate_quats(frames, quat, ang_tol)
+    return track(frames[keep], quat[keep], 'LINEAR'), report
+
+def location_track(frames, x_list, y_list, z_list, scale, interpolation='BEZIER', pos_tol=None):
+    """
+    Builds the ``location`` track of a reference frame
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray frames: the frame of each position
+    :param np.ndarray x_list: the x position over time
+    :param np.ndarray y_list: the y position over time
+    :param np.ndarray z_list: the z position over time
+    :param float scale: global physical scale factor of the animation
+    :param str interpolation: the keyframe interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+    :param float pos_tol: if given, the track is decimated to this distance tolerance (scene units) and interpolated linearly
+
+    Returns:
+        :returns (tuple): the :class:`track` and the decimation report (None if not decimated)
+    """
+
+    loc = np.column_stack([x_list, y_list, z_list])*scale
+    if pos_tol is None:
+        return track(frames, loc, interpolation), None
+
+    frames, loc = last_per_frame(frames, loc)
+    keep, report = decimate_positions(frames, loc, pos_tol)
+    return track(frames[keep], loc[keep], 'LINEAR'), report
+
+def flat_transforms(loc, quat, pa_quat, cog, rest_loc=(0, 0, 0), rest_quat=(0, 0, 0, 1)):
+    """
+    Composes the transforms of the :class:`bpsci.core.dyn_obj` rig (non-rotating frame -> principal axes -> body ->
+    object) into the transform of the object alone, as Blender would evaluate the rig
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray loc: the scaled location of the non-rotating frame, shape (3,) or (n, 3)
+    :param np.ndarray quat: the rotation of the principal axes in scipy's (x, y, z, w) order, shape (4,) or (n, 4)
+    :param np.ndarray pa_quat: the principal axes offset, see :attr:`bpsci.core.dyn_obj.quat`
+    :param tuple cog: the center of gravity as defined from the origin of the 3D model
+    :param tuple rest_loc: the object's own location relative to the body frame
+    :param tuple rest_quat: the object's own rotation relative to the body frame, in (x, y, z, w) order
+
+    Returns:
+        :returns (tuple): the location and the (x, y, z, w) rotation of the object relative to the rig's parent
+    """
+
+    # the body frame is keyed with -pa_quat, which is the same rotation as pa_quat
+    offset = np.asarray(cog, dtype=float) + quat_rotate(pa_quat, np.asarray(rest_loc, dtype=float))
+    return np.asarray(loc) + quat_rotate(quat, offset), quat_multiply(quat_multiply(quat, pa_quat), rest_quat)
+
+def flat_tracks(frames, x_list, y_list, z_list, quat, scale, pa_quat, cog, rest_loc=(0, 0, 0), rest_quat=(0, 0, 0, 1),
+                interpolation='BEZIER', pos_tol=None, ang_tol=None):
+    """
+    Builds the ``location`` and ``rotation_quaternion`` tracks of a flattened :class:`bpsci.core.dyn_obj`, see
+    :func:`flat_transforms`
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray frames: the frame of each sample
+    :param np.ndarray x_list: the x position over time
+    :param np.ndarray y_list: the y position over time
+    :param np.ndarray z_list: the z position over time
+    :param np.ndarray quat: a numpy array of quaternions over time in scipy's (x, y, z, w) order, None if the object does not rotate
+    :param float scale: global physical scale factor of the animation
+    :param np.ndarray pa_quat: the principal axes offset
+    :param tuple cog: the center of gravity as defined from the origin of the 3D model
+    :param tuple rest_loc: the object's own location relative to the body frame
+    :param tuple rest_quat: the object's own rotation relative to the body frame, in (x, y, z, w) order
+    :param str interpolation: the keyframe interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+    :param float pos_tol: if given, the location track is decimated to this distance tolerance (scene units)
+    :param float ang_tol: if given, the rotation track is decimated to this angular tolerance (radians)
+
+    Returns:
+        :returns (tuple): the rotation :class:`track` (None without ``quat``), the location :class:`track` and the decimation report of each decimated track, keyed by data path
+    """
+
+    loc = np.column_stack([x_list, y_list, z_list])*scale
+    # without rotation data the principal axes frame keeps its offset
+    loc, world_quat = flat_transforms(loc, pa_quat if quat is None else np.asarray(quat, dtype=float), pa_quat, cog,
+                                      rest_loc, rest_quat)
+
+    reports = {}
+    rot = None
+    if quat is not None:
+        rot, report = rotation_track(frames, world_quat, interpolation, ang_tol)
+        if report is not None:
+            reports['rotation_quaternion'] = report
+
+    trk, report = location_track(frames, *loc.T, 1, interpolation, pos_tol)
+    if report is not None:
+        reports['location'] = report
+
+    return rot, trk, reports
+
+TRANSFORM_WIDTHS = {'location': 3, 'rotation_quaternion': 4, 'scale': 3}
+""":type: `dict`: the number of values of each transform property :func:`frame_table` can tabulate"""
+
+def frame_table(tracks):
+    """
+    Tabulates transform tracks at every whole frame they cover, the contents of a transform cache (see
+    :func:`bpsci.core.cache_transforms`). Values between keys are interpolated linearly (quaternions spherically),
+    or held with 'CONSTANT' interpolation.
+
+    .. versionadded:: 0.3.6
+
+    :param dict tracks: data path ('location', 'rotation_quaternion' or 'scale') -> :class:`track`
+
+    Returns:
+        :returns (tuple): the first frame, and the table with one row per frame and the values of each track side by side, in the order of ``tracks``
+    """
+
+    tracks = {path: last_per_frame(trk.frames, np.asarray(trk.values).reshape(len(trk.frames), -1)) + (trk.interpolation,)
+              for path, trk in tracks.items()}
+    start = int(np.floor(min(frames[0] for frames, _, _ in tracks.values())))
+    end = int(np.ceil(max(frames[-1] for frames, _, _ in tracks.values())))
+    all_frames = np.arange(start, end + 1, dtype=float)
+
+    columns = []
+    for path, (frames, values, interpolation) in tracks.items():
+        if interpolation == 'CONSTANT':
+            columns.append(values[np.clip(np.searchsorted(frames, all_frames, side='right') - 1, 0, None)])
+        elif path == 'rotation_quaternion':
+            columns.append(slerp(values, frames, all_frames))
+        else:
+            columns.append(_resample(values, frames, all_frames))
+
+    return start, np.hstack(columns)
+
+def streamline_points(x, y, z, scale):
+    """
+    Returns the spline point coordinates of a streamline as one (n, 4) array, ready for ``foreach_set``
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray x: the x position over time
+    :param np.ndarray y: the y position over time
+    :param np.ndarray z: the z position over time
+    :param float scale: global physical scale factor of the animation
+
+    Returns:
+        :returns (np.ndarray): the (x, y, z, w) coordinates as float32 like Blender's spline points, w is the nurbs weight
+    """
+
+    coords = np.ones((len(x), 4), dtype=np.float32)
+    coords[:, 0] = x
+    coords[:, 1] = y
+    coords[:, 2] = z
+    coords[:, :3] *= scale
+    return coords
+
+def lod_streamline(x, y, z, scale, tol, max_angle=None):
+    """
+    Returns the spline points of a streamline simplified to a chord error tolerance (see
+    :func:`~bpsci.decimate.decimate_path`), and the ``bevel_factor_end`` at each original sample that puts the end of
+    the simplified streamline at that sample. The factors use the 'SEGMENTS' bevel mapping of
+    :func:`bpsci.core.new_streamline`: segment k of n, a fraction u along it, is (k + u) / n.
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray x: the x position over time
+    :param np.ndarray y: the y position over time
+    :param np.ndarray z: the z position over time
+    :param float scale: global physical scale factor of the animation
+    :param float tol: the largest distance allowed between the data and the streamline (scene units)
+    :param float max_angle: the largest turn of the data along one streamline segment (radians)
+
+    Returns:
+        :returns (tuple): the (m, 4) spline point coordinates, the bevel factor of each sample and the decimation report
+    """
+
+    coords = streamline_points(x, y, z, scale)
+    pts = coords[:, :3].astype(float)
+    keep, report = decimate_path(pts, tol, max_angle)
+
+    n_seg = len(keep) - 1
+    if n_seg < 1:
+        return coords[keep], np.zeros(len(pts)), report
+
+    # every sample is projected onto the chord of the segment it was simplified into
+    k = np.clip(np.searchsorted(keep, np.arange(len(pts)), side='right') - 1, 0, n_seg - 1)
+    p0 = pts[keep[k]]
+    chord = pts[keep[k + 1]] - p0
+    length2 = np.einsum('ij,ij->i', chord, chord)
+    u = np.einsum('ij,ij->i', pts - p0, chord)
+    u = np.clip(np.divide(u, length2, out=np.ones_like(u), where=length2 > 0), 0.0, 1.0)
+
+    # projections can step back a little inside a segment, the streamline should never shrink
+    frac = np.maximum.accumulate((k + u) / n_seg)
+    return coords[keep], frac, report
+
+def bevel_track(anim, frac, interpolation='BEZIER'):
+    """
+    Builds the ``bevel_factor_end`` track that grows a dynamic streamline with its object
+
+    .. versionadded:: 0.3.6
+
+    :param anim: the animation clock
+    :type anim: :class:`anim_clock`
+    :param np.ndarray frac: the bevel factor of each sample, see :func:`arc_length_frac` and :func:`lod_streamline`
+    :param str interpolation: the keyframe interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+
+    Returns:
+        :returns (:class:`track`) the track
+    """
+
+    frames = anim.frames
+    if len(frac) == len(anim.t):
+        frac = anim.sample(frac, 'linear')
+    return track(frames, frac[:len(frames)], interpolation)
+
+def vector_tracks(anim, x, y, z, scale, offset, norm='component', max_mag=None, interpolation='BEZIER'):
+    """
+    Builds the tracks of a dynamic vector: the location of its pointing empty and the scale of its arrow
+
+    .. versionadded:: 0.3.6
+
+    :param anim: the animation clock
+    :type anim: :class:`anim_clock`
+    :param np.ndarray x: a numpy array of the x component over time
+    :param np.ndarray y: a numpy array of the y component over time
+    :param np.ndarray z: a numpy array of the z component over time
+    :param float scale: the scaling factor of the vector's magnitude axis
+    :param tuple[float] offset: offset of vector from the parent object
+    :param str norm: how the vector is normalized ['component' or 'magnitude'], see :meth:`bpsci.core.dyn_vec.animate`
+    :param float max_mag: the magnitude to normalize by, only in 'magnitude' mode
+    :param str interpolation: the keyframe interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+
+    Returns:
+        :returns (tuple): the location :class:`track` and the scale :class:`track`
+    """
+
+    frames = anim.frames
+    vec = anim.sample(np.column_stack([x, y, z]))
+
+    if norm == 'component':
+        if max_mag is not None:
+            raise ValueError("max_mag only applies to norm='magnitude'")
+        max_xyz = np.max(vec, axis=0)
+        max_xyz[max_xyz == 0] = 1
+    elif norm == 'magnitude':
+        max_xyz = np.sqrt(np.max(np.einsum('ij,ij->i', vec, vec))) if max_mag is None else max_mag
+        if max_xyz == 0:
+            max_xyz = 1
+    else:
+        raise ValueError("norm must be 'component' or 'magnitude', not %r" % (norm,))
+
+    norm_vec = vec/max_xyz*scale
+
+    mag_arrow = np.ones((len(frames), 3))
+    mag_arrow[:, 0] = np.sqrt(np.einsum('ij,ij->i', norm_vec, norm_vec))*scale
+
+    return track(frames, norm_vec + np.asarray(offset), interpolation), track(frames, mag_arrow, interpolation)
+
+def text_table(anim, data, label, fix_place, if_str):
+    """
+    Formats the text of every frame of an animated text, starting at frame 1
+
+    .. versionadded:: 0.3.6
+
+    :param anim: the animation clock
+    :type anim: :class:`anim_clock`
+    :param np.ndarray data: the data to be displayed (same length as the number of animated frames)
+    :param str label: a label to append to the text
+    :param int fix_place: the number of decimal places to fix the text to
+    :param bool if_str: whether or not the data is a numerical or string vector
+
+    Returns:
+        :returns (np.ndarray): the text of each frame
+    """
+
+    all_frames = np.arange(1, anim.frames[-1])
+
+    if not(if_str):
+        data = anim.sample(data)
+
+        fixed_data = interp_linear(all_frames, anim.frames, data)
+
+        text = np.char.mod('%.'+str(fix_place)+'f', fixed_data)
+    else:
+        data = np.asarray(data, dtype=str)
+        if anim.resample is not None:
+            # strings can not be interpolated, hold the last sample at or before each frame
+            data = data[np.clip(np.searchsorted(anim.t, anim.frame_t, side='right')-1, 0, None)]
+
+        text = data[np.clip(np.searchsorted(anim.frames, all_frames, side='right')-1, 0, None)]
+
+    return np.char.add(text, ' ' + label)
+
+def frame_windows(first, last, n):
+    """
+    Splits a frame range into windows of consecutive frames of (nearly) equal length
+
+    .. versionadded:: 0.3.6
+
+    :param int first: the first frame
+    :param int last: the last frame
+    :param int n: the number of windows, fewer if there are fewer frames
+
+    Returns:
+        :returns (list[tuple]): the (first, last) frame of each window
+    """
+
+    edges = np.unique(np.linspace(first, last + 1, min(n, last - first + 1) + 1).round().astype(int))
+    return [(int(a), int(b) - 1) for a, b in zip(edges[:-1], edges[1:])]
+
+class anim_plan:
+    """
+    The Blender-independent description of an animation: every keyframe track, streamline and text table,
+    keyed by the name of the Blender object they belong to
+
+    .. versionadded:: 0.3.6
+
+    :param anim: the animation clock the plan is built on
+    :type anim: :class:`anim_clock`
+    """
+
+    def __init__(self, anim):
+
+        self.anim = anim
+        """:class:`anim_clock`: the animation clock the plan is built on"""
+
+        self.tracks = {}
+        """:type: `dict`: object name -> {data path -> :class:`track`}. Paths starting with 'data.' animate the object's data (i.e. a curve)"""
+
+        self.streamlines = {}
+        """:type: `dict`: streamline object name -> {'points': (n, 4) coordinates, 'thickness': bevel depth}"""
+
+        self.texts = {}
+        """:type: `dict`: text object name -> text of each frame, starting at frame 1 (or the first frame of :attr:`frame_range`)"""
+
+        self.frame_range = None
+        """:type: `tuple`: the (first, last) frame rendered from a plan made by :meth:`window`, None for the whole animation"""
+
+        self.decimation = {}
+        """:type: `dict`: object name -> {data path -> decimation report}"""
+
+    def add_track(self, name, data_path, trk):
+        """
+        Adds (or replaces) the track of one property
+
+        :param str name: the Blender object name
+        :param str data_path: the RNA path of the animated property
+        :param trk: the track
+        :type trk: :class:`track`
+        """
+
+        self.tracks.setdefault(name, {})[data_path] = track(np.asarray(trk.frames), np.asarray(trk.values), trk.interpolation)
+
+    def update(self, other):
+        """
+        Adds every track, streamline and text of another plan to this one
+
+        :param other: a plan on the same clock
+        :type other: :class:`anim_plan`
+        """
+
+        for name, tracks in other.tracks.items():
+            for data_path, trk in tracks.items():
+                self.add_track(name, data_path, trk)
+        self.streamlines.update(other.streamlines)
+        self.texts.update(other.texts)
+        for name, reports in other.decimation.items():
+            self.decimation.setdefault(name, {}).update(reports)
+
+    def dyn_obj(self, name, x_list, y_list, z_list, quat_list, interpolation='BEZIER', pos_tol=None, ang_tol=None, t=None,
+                mapping='nearest'):
+        """
+        Plans :meth:`bpsci.core.dyn_obj.apply_animation` for the object called ``name``
+
+        :param str name: the Blender object name of the original object
+        :param np.ndarray x_list: a numpy array of the x position over time
+        :param np.ndarray y_list: a numpy array of the y position over time
+        :param np.ndarray z_list: a numpy array of the z position over time
+        :param np.ndarray quat_list: a numpy array of the quaternion over time. Can be passed None if rotation is ignored.
+        :param str interpolation: the keyframe interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+        :param float pos_tol: if given, decimate the position track to this distance tolerance (scene units)
+        :param float ang_tol: if given, decimate the quaternion track to this angular tolerance (radians)
+        :param np.ndarray t: the time of each sample, if the data has its own time vector instead of the clock's ``t``, see :meth:`anim_clock.timebase`
+        :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+        """
+
+        anim = self.anim if t is None else self.anim.timebase(t, mapping)
+        if anim.resample is not None:
+            quat_list = anim.sample_quat(quat_list)
+            x_list, y_list, z_list = anim.sample(np.column_stack([x_list, y_list, z_list])).T
+
+        if not(quat_list is None):
+            trk, report = rotation_track(anim.frames, quat_list, interpolation, ang_tol)
+            self.add_track(name+'_pa', 'rotation_quaternion', trk)
+            if report is not None:
+                self.decimation.setdefault(name+'_pa', {})['rotation_quaternion'] = report
+
+        trk, report = location_track(anim.frames, x_list, y_list, z_list, anim.scale, interpolation, pos_tol)
+        self.add_track(name+'_non_rot', 'location', trk)
+        if report is not None:
+            self.decimation.setdefault(name+'_non_rot', {})['location'] = report
+
+    def flat_obj(self, name, x_list, y_list, z_list, quat_list, pa, cog, euler_type, interpolation='BEZIER', pos_tol=None,
+                 ang_tol=None, t=None, mapping='nearest'):
+        """
+        Plans :meth:`bpsci.core.dyn_obj.apply_animation` for the object called ``name`` created with ``flatten=True``:
+        the object itself is keyed. Its own location and rotation before flattening are taken to be zero.
+
+        .. versionadded:: 0.3.6
+
+        :param str name: the Blender object name of the original object
+        :param np.ndarray x_list: a numpy array of the x position over time
+        :param np.ndarray y_list: a numpy array of the y position over time
+        :param np.ndarray z_list: a numpy array of the z position over time
+        :param np.ndarray quat_list: a numpy array of the quaternion over time. Can be passed None if rotation is ignored.
+        :param np.ndarray pa: the offset of the principal axes specified by ``euler_type``
+        :param tuple cog: the center of gravity as defined from the origin of the 3D model
+        :param str euler_type: the Euler angle order (i.e. 'xyz' for 1,2,3 or 'zxz' for 3,1,3)
+        :param str interpolation: the keyframe interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+        :param float pos_tol: if given, decimate the location track to this distance tolerance (scene units)
+        :param float ang_tol: if given, decimate the rotation track to this angular tolerance (radians)
+        :param np.ndarray t: the time of each sample, if the data has its own time vector instead of the clock's ``t``, see :meth:`anim_clock.timebase`
+        :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+        """
+
+        anim = self.anim if t is None else self.anim.timebase(t, mapping)
+        if anim.resample is not None:
+            quat_list = anim.sample_quat(quat_list)
+            x_list, y_list, z_list = anim.sample(np.column_stack([x_list, y_list, z_list])).T
+
+        rot, loc, reports = flat_tracks(anim.frames, x_list, y_list, z_list, quat_list, anim.scale,
+                                        euler_to_quat(pa, euler_type), cog, interpolation=interpolation,
+                                        pos_tol=pos_tol, ang_tol=ang_tol)
+        if rot is not None:
+            self.add_track(name, 'rotation_quaternion', rot)
+        self.add_track(name, 'location', loc)
+        if reports:
+            self.decimation.setdefault(name, {}).update(reports)
+
+    def streamline(self, name, staticity, int_x, int_y, int_z, thickness, lod_tol=None, lod_angle=None, t=None,
+                   mapping='nearest'):
+        """
+        Plans :meth:`bpsci.core.dyn_obj.apply_streamline` for the object called ``name``
+
+        :param str name: the Blender object name of the original object
+        :param str staticity: a string ['dynamic' or 'static'] that specifies whether the streamline is animated or static
+        :param np.ndarray int_x: a numpy array of the x position over time
+        :param np.ndarray int_y: a numpy array of the y position over time
+        :param np.ndarray int_z: a numpy array of the z position over time
+        :param float thickness: the bevel depth of the streamline
+        :param float lod_tol: if given, simplify the streamline to this chord error tolerance (scene units), see :func:`lod_streamline`
+        :param float lod_angle: with ``lod_tol``, the largest turn of the data along one streamline segment (radians)
+        :param np.ndarray t: the time of each sample, if the data has its own time vector instead of the clock's ``t``, see :meth:`anim_clock.timebase`
+        :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+        """
+
+        name = name+'_streamline'
+        if lod_tol is None:
+            points = streamline_points(int_x, int_y, int_z, self.anim.scale)
+            frac = arc_length_frac(int_x, int_y, int_z)
+        else:
+            points, frac, report = lod_streamline(int_x, int_y, int_z, self.anim.scale, lod_tol, lod_angle)
+            self.decimation.setdefault(name, {})['points'] = report
+        self.streamlines[name] = {'points': points, 'thickness': thickness}
+
+        if staticity == 'dynamic':
+            anim = self.anim if t is None else self.anim.timebase(t, mapping)
+            self.add_track(name, 'data.bevel_factor_end', bevel_track(anim, frac))
+
+    def dyn_vec(self, name, x, y, z, scale_mag, offset, norm='component', max_mag=None, interpolation='BEZIER', t=None,
+                mapping='nearest'):
+        """
+        Plans :meth:`bpsci.core.dyn_vec.animate` for the vector called ``name``
+
+        :param str name: the name passed to :class:`bpsci.core.dyn_vec`
+        :param np.ndarray x: a numpy array of the x component over time
+        :param np.ndarray y: a numpy array of the y component over time
+        :param np.ndarray z: a numpy array of the z component over time
+        :param float scale_mag: the scaling factor of the vector's magnitude axis
+        :param tuple[float] offset: offset of vector from the parent object
+        :param str norm: how the vector is normalized ['component' or 'magnitude']
+        :param float max_mag: the magnitude to normalize by, only in 'magnitude' mode
+        :param str interpolation: the keyframe interpolation mode ['CONSTANT', 'LINEAR' or 'BEZIER']
+        :param np.ndarray t: the time of each sample, if the data has its own time vector instead of the clock's ``t``, see :meth:`anim_clock.timebase`
+        :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+        """
+
+        anim = self.anim if t is None else self.anim.timebase(t, mapping)
+        loc, scale = vector_tracks(anim, x, y, z, scale_mag, offset, norm, max_mag, interpolation)
+        self.add_track(name+'_vector_pointing_empty', 'location', loc)
+        self.add_track(name+'_vector_empty', 'scale', scale)
+
+    def anim_text(self, name, data, label, fix_place, if_str, t=None, mapping='nearest'):
+        """
+        Plans :class:`bpsci.core.anim_text` for the text called ``name``
+
+        :param str name: the name passed to :class:`bpsci.core.anim_text`
+        :param np.ndarray data: the data to be displayed (same length as the number of animated frames)
+        :param str label: a label to append to the text (if no label is desired, pass '')
+        :param int fix_place: the number of decimal places to fix the text to
+        :param bool if_str: whether or not the data is a numerical or string vector
+        :param np.ndarray t: the time of each sample, if the data has its own time vector instead of the clock's ``t``, see :meth:`anim_clock.timebase`
+        :param str mapping: with ``t``, how the times are mapped to frames ['nearest' or 'interpolated']
+        """
+
+        anim = self.anim if t is None else self.anim.timebase(t, mapping)
+        self.texts[name+'_text'] = text_table(anim, data, label, fix_place, if_str)
+
+    def window(self, start, end, pad=2):
+        """
+        Returns the part of the plan needed to render the frames ``start`` to ``end``, so separate Blender processes
+        can each build and render one window of a long animation. Tracks keep their keys in the window plus ``pad``
+        keys on either side, so they interpolate the same at its edges. Dynamic streamlines keep only the points
+        they reach by the end of the window, and texts only the frames of the window.
+
+        .. versionadded:: 0.3.6
+
+        :param int start: the first frame of the window
+        :param int end: the last frame of the window
+        :param int pad: the number of keys kept beyond each edge (Bezier keys depend on two neighbours on each side)
+
+        Returns:
+            :returns (:class:`anim_plan`) the plan of the window, its :attr:`frame_range` is (start, end)
+        """
+
+        plan = anim_plan(self.anim)
+        plan.frame_range = (int(start), int(end))
+        plan.decimation = self.decimation
+
+        for name, tracks in self.tracks.items():
+            for data_path, trk in tracks.items():
+                values = np.asarray(trk.values)
+                frames, keys = last_per_frame(trk.frames, values.reshape(len(values), -1))
+                lo = max(np.searchsorted(frames, start, side='left') - pad, 0)
+                hi = np.searchsorted(frames, end, side='right') + pad
+                plan.add_track(name, data_path, track(frames[lo:hi], keys[lo:hi].reshape((-1,) + values.shape[1:]),
+                                                      trk.interpolation))
+
+        for name, streamline in self.streamlines.items():
+            points = streamline['points']
+            bevel = plan.tracks.get(name, {}).get('data.bevel_factor_end')
+            n_seg = len(points) - 1
+            if bevel is not None and n_seg > 1 and len(bevel.frames):
+                # with the 'SEGMENTS' mapping a bevel factor f ends f*n_seg segments along, the factors are rescaled
+                # so they end at the same place on the shorter spline
+                k = min(max(int(np.ceil(np.max(bevel.values)*n_seg - 1e-9)), 1), n_seg)
+                points = points[:k + 1]
+                plan.tracks[name]['data.bevel_factor_end'] = track(bevel.frames, np.minimum(bevel.values*(n_seg/k), 1.0),
+                                                                   bevel.interpolation)
+            plan.streamlines[name] = {'points': points, 'thickness': streamline['thickness']}
+
+        for name, table in self.texts.items():
+            first = 1 if self.frame_range is None else self.frame_range[0]
+            plan.texts[name] = table[max(start - first, 0):max(end - first + 1, 0)]
+
+        return plan
+
+    def partition(self, n, pad=2):
+        """
+        Splits the plan into ``n`` windows of consecutive frames, see :meth:`window`
+
+        .. versionadded:: 0.3.6
+
+        :param int n: the number of windows
+        :param int pad: the number of keys kept beyond the edges of each window
+
+        Returns:
+            :returns (list[:class:`anim_plan`]) the plan of each window
+        """
+
+        first, last = self.frame_range or (1, self.anim.frame_duration + 1)
+        return [self.window(start, end, pad) for start, end in frame_windows(first, last, n)]
+
+    def to_arrays(self):
+        """
+        Splits the plan (including its clock) into a JSON-serializable manifest and named arrays, the format of
+        :meth:`save` and of :class:`bpsci.cache.track_cache`
+
+        .. versionadded:: 0.3.6
+
+        Returns:
+            :returns (tuple): the manifest dict and a dict of arrays
+        """
+
+        anim = self.anim
+        arrays = {'t': np.asarray(anim.t)}
+        manifest = {'clock': {'speed_up': float(anim.speed_up), 'scale': float(anim.scale), 'frame_rate': float(anim.frame_rate),
+                              'resample': anim.resample},
+                    'tracks': [], 'streamlines': [], 'texts': [], 'decimation': self.decimation,
+                    'frame_range': None if self.frame_range is None else [int(f) for f in self.frame_range]}
+
+        for name, tracks in self.tracks.items():
+            for data_path, trk in tracks.items():
+                key = 'track%d' % len(manifest['tracks'])
+                arrays[key+'_frames'] = trk.frames
+                arrays[key+'_values'] = trk.values
+                manifest['tracks'].append([name, data_path, trk.interpolation, key])
+
+        for name, streamline in self.streamlines.items():
+            key = 'streamline%d' % len(manifest['streamlines'])
+            arrays[key] = streamline['points']
+            manifest['streamlines'].append([name, float(streamline['thickness']), key])
+
+        for name, table in self.texts.items():
+            key = 'text%d' % len(manifest['texts'])
+            arrays[key] = np.asarray(table, dtype=str)
+            manifest['texts'].append([name, key])
+
+        return manifest, arrays
+
+    @staticmethod
+    def from_arrays(manifest, arrays):
+        """
+        Rebuilds a plan from the output of :meth:`to_arrays`. The arrays are used as they are, not copied.
+
+        .. versionadded:: 0.3.6
+
+        :param dict manifest: the manifest
+        :param arrays: maps each array name to the array (a dict, an open ``.npz`` file, ...)
+
+        Returns:
+            :returns (:class:`anim_plan`) the plan
+        """
+
+        clock = manifest['clock']
+        plan = anim_plan(anim_clock(arrays['t'], clock['speed_up'], clock['scale'], clock['frame_rate'], clock['resample']))
+
+        for name, data_path, interpolation, key in manifest['tracks']:
+            plan.add_track(name, data_path, track(arrays[key+'_frames'], arrays[key+'_values'], interpolation))
+        for name, thickness, key in manifest['streamlines']:
+            plan.streamlines[name] = {'points': arrays[key], 'thickness': thickness}
+        for name, key in manifest['texts']:
+            plan.texts[name] = arrays[key]
+        plan.decimation = manifest['decimation']
+        if manifest.get('frame_range') is not None:
+            plan.frame_range = tuple(manifest['frame_range'])
+
+        return plan
+
+    def save(self, filepath):
+        """
+        Saves the plan (including its clock) to an uncompressed ``.npz`` file
+
+        :param str filepath: the file to write
+        """
+
+        manifest, arrays = self.to_arrays()
+        np.savez(filepath, manifest=np.array(json.dumps(manifest)), **arrays)
+
+    @staticmethod
+    def load(filepath):
+        """
+        Loads a plan saved with :meth:`save`
+
+        :param str filepath: the ``.npz`` file to read
+
+        Returns:
+            :returns (:class:`anim_plan`) the plan
+        """
+
+        with np.load(filepath, allow_pickle=False) as f:
+            return anim_plan.from_arrays(json.loads(str(f['manifest'])), f)
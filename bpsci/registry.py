@@ -0,0 +1,180 @@
+"""
+Registry of Created Datablocks - :mod:`bpsci.registry`
+======================================================
+Keeps track of what bpsci creates for each entity, so it can be removed again without searching the file.
+
+Every :class:`~bpsci.core.dyn_obj`, :class:`~bpsci.core.dyn_vec`, :class:`~bpsci.core.anim_text`,
+:class:`~bpsci.core.swarm` and :class:`~bpsci.core.vector_field` records the objects, object data (curves, meshes), constraints and frame handler
+registrations it creates under its name. :func:`teardown` then removes exactly those, all datablocks in one
+``bpy.data.batch_remove`` call, which is what :func:`bpsci.utils.erase_others` uses when a script is run again::
+
+    from bpsci import registry
+
+    registry.teardown('gallileo')   # the rig, streamline and their animation, not the 'gallileo' model itself
+
+The registry lives as long as the Python session. In a freshly opened .blend file nothing is registered yet, and
+the ``bpsci.utils`` erase functions fall back to the exact names bpsci gives the objects it creates.
+"""
+
+import bpy
+
+_owned = {}
+
+def _entry(owner):
+    return _owned.setdefault(owner, {'objects': [], 'data': [], 'constraints': [], 'handlers': []})
+
+def register(owner, objects=(), data=(), constraints=(), handlers=()):
+    """
+    Records datablocks created for an entity. Registering more under the same owner adds to what it already has.
+
+    .. versionadded:: 0.3.6
+
+    :param str owner: the name of the entity
+    :param list objects: the objects created
+    :param list data: the object data created (curves, meshes, ...) that no other entity shares
+    :param list[tuple] constraints: (object, constraint) of each constraint added to an object of another owner
+    :param list[tuple] handlers: (handler, table, key) of each entry added to a shared frame handler's table, the
+        handler is unregistered when its table is emptied
+    """
+
+    entry = _entry(owner)
+    entry['objects'].extend(objects)
+    entry['data'].extend(data)
+    entry['constraints'].extend(constraints)
+    entry['handlers'].extend(handlers)
+
+def owned(owner):
+    """
+    .. versionadded:: 0.3.6
+
+    Returns:
+        :returns (dict): the 'objects', 'data', 'constraints' and 'handlers' registered for an entity, empty lists if none
+    """
+
+    entry = _owned.get(owner, {'objects': [], 'data': [], 'constraints': [], 'handlers': []})
+    return {kind: list(items) for kind, items in entry.items()}
+
+def owners():
+    """
+    .. versionadded:: 0.3.6
+
+    Returns:
+        :returns (list[str]): the name of every registered entity
+    """
+
+    return list(_owned)
+
+def forget(owner):
+    """
+    Drops an entity from the registry without removing anything
+
+    .. versionadded:: 0.3.6
+
+    :param str owner: the name of the entity
+    """
+
+    _owned.pop(owner, None)
+
+def replace(pairs):
+    """
+    Hands the registration of objects over to the objects that replace them (i.e. curves converted to meshes), with
+    the data of the new objects
+
+    .. versionadded:: 0.3.6
+
+    :param list[tuple] pairs: (old object, new object)
+    """
+
+    for entry in _owned.values():
+        objects = entry['objects']
+        for i, ob in enumerate(objects):
+            for old, new in pairs:
+                if ob == old:
+                    objects[i] = new
+                    entry['data'].append(new.data)
+                    break
+
+def _alive(block):
+    """Whether a datablock still exists, the Python object of a removed one raises ReferenceError"""
+
+    try:
+        block.name
+    except ReferenceError:
+        return False
+    return True
+
+def remove(ids):
+    """
+    Removes datablocks, and the actions that animate them, with a single ``bpy.data.batch_remove``. Datablocks that
+    were already removed are skipped.
+
+    .. versionadded:: 0.3.6
+
+    :param list ids: the datablocks
+
+    Returns:
+        :returns (int): the number of datablocks removed
+    """
+
+    blocks = {}
+    for block in ids:
+        if block is None or not _alive(block):
+            continue
+        blocks[id(block)] = block
+        action = getattr(getattr(block, 'animation_data', None), 'action', None)
+        if action is not None and _alive(action):
+            blocks[id(action)] = action
+
+    if blocks:
+        bpy.data.batch_remove(list(blocks.values()))
+    return len(blocks)
+
+def _release(entry):
+    """Unregisters the handlers and constraints of an entry, returns the datablocks to remove"""
+
+    for handler, table, key in entry['handlers']:
+        table.pop(key, None)
+        if not table and handler in bpy.app.handlers.frame_change_pre:
+            bpy.app.handlers.frame_change_pre.remove(handler)
+
+    # constraints on objects that are removed anyway go with them
+    doomed = {id(ob) for ob in entry['objects']}
+    for ob, con in entry['constraints']:
+        if id(ob) not in doomed and _alive(ob):
+            try:
+                ob.constraints.remove(con)
+            except (ReferenceError, RuntimeError):
+                pass
+
+    return entry['objects'] + entry['data']
+
+def teardown(*owners):
+    """
+    Removes everything registered for the given entities and drops them from the registry
+
+    .. versionadded:: 0.3.6
+
+    :param str owners: the names of the entities
+
+    Returns:
+        :returns (int): the number of datablocks removed
+    """
+
+    ids = []
+    for owner in owners:
+        entry = _owned.pop(owner, None)
+        if entry is not None:
+            ids += _release(entry)
+    return remove(ids)
+
+def teardown_all():
+    """
+    Removes everything bpsci has registered
+
+    .. versionadded:: 0.3.6
+
+    Returns:
+        :returns (int): the number of datablocks removed
+    """
+
+    return teardown(*_owned)
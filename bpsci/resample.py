@@ -0,0 +1,261 @@
+"""
+Resampling of Time Series onto the Frame Grid - :mod:`bpsci.resample`
+=====================================================================
+Pure NumPy routines that interpolate positions, scalars and quaternions onto new sample times, and convert
+between Euler angles and quaternions. None of these functions touch Blender, so they can be used (and tested)
+outside of it, and only cubic resampling imports SciPy.
+"""
+
+import numpy as np
+
+def resample(values, t, t_new, kind='linear'):
+    """
+    Interpolates a time series onto new sample times
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray values: the data over time, shape (len(t),) or (len(t), n)
+    :param np.ndarray t: the (increasing) time of each sample
+    :param np.ndarray t_new: the times to interpolate the data at (clipped to the range of ``t``)
+    :param str kind: the interpolation method ['linear' or 'cubic']
+
+    Returns:
+        :returns (np.ndarray): the data at ``t_new``, with the same trailing shape as ``values``
+    """
+
+    values = np.asarray(values, dtype=float)
+    t = np.asarray(t, dtype=float)
+    t_new = np.clip(t_new, t[0], t[-1])
+
+    if kind == 'linear':
+        if values.ndim == 1:
+            return np.interp(t_new, t, values)
+        return np.column_stack([np.interp(t_new, t, values[:, i]) for i in range(values.shape[1])])
+    elif kind == 'cubic':
+        # SciPy takes a while to import, so it is only imported once it is needed
+        try:
+            from scipy.interpolate import CubicSpline
+        except ImportError as e:
+            raise ImportError("cubic resampling needs SciPy, install it or bpsci[cubic]") from e
+        return CubicSpline(t, values, axis=0)(t_new)
+
+    raise ValueError("kind must be 'linear' or 'cubic', not %r" % (kind,))
+
+def interp_linear(x, xp, fp):
+    """
+    Piecewise linear interpolation that extrapolates the first and last segments, the same as
+    ``scipy.interpolate.interp1d(xp, fp, fill_value='extrapolate')``. Repeated ``xp`` (i.e. several samples on
+    one frame) are allowed.
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray x: the points to interpolate at
+    :param np.ndarray xp: the (non-decreasing) sample points
+    :param np.ndarray fp: the value at each sample point
+
+    Returns:
+        :returns (np.ndarray): the values at ``x``
+    """
+
+    x = np.asarray(x, dtype=float)
+    xp = np.asarray(xp, dtype=float)
+    fp = np.asarray(fp, dtype=float)
+    if len(xp) == 1:
+        return np.full(x.shape, fp[0])
+
+    hi = np.clip(np.searchsorted(xp, x), 1, len(xp) - 1)
+    lo = hi - 1
+    dx = xp[hi] - xp[lo]
+    slope = np.divide(fp[hi] - fp[lo], dx, out=np.zeros_like(dx), where=dx != 0)
+    return slope*(x - xp[lo]) + fp[lo]
+
+def euler_to_quat(angles, euler_type):
+    """
+    Converts Euler angles to quaternions in scipy's (x, y, z, w) order, the same as
+    ``scipy.spatial.transform.Rotation.from_euler(euler_type, angles).as_quat()``
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray angles: the angles in radians, shape (3,) or (n, 3)
+    :param str euler_type: the axis order, lower case for rotations about the fixed axes (i.e. 'xyz', or 'zxz' for
+        3,1,3), upper case for rotations about the rotating axes (i.e. 'XYZ')
+
+    Returns:
+        :returns (np.ndarray): the quaternions, shape (4,) or (n, 4)
+    """
+
+    axes = euler_type.lower()
+    if len(euler_type) != 3 or not set(axes) <= set('xyz') or axes[0] == axes[1] or axes[1] == axes[2] \
+            or not (euler_type.islower() or euler_type.isupper()):
+        raise ValueError('invalid Euler angle order %r' % (euler_type,))
+
+    angles = np.asarray(angles, dtype=float)
+    half = angles/2
+    quats = []
+    for i, axis in enumerate(axes):
+        q = np.zeros(angles.shape[:-1] + (4,))
+        q[..., 'xyz'.index(axis)] = np.sin(half[..., i])
+        q[..., 3] = np.cos(half[..., i])
+        quats.append(q)
+
+    if euler_type.islower():
+        # about the fixed axes the first rotation is applied first
+        return quat_multiply(quat_multiply(quats[2], quats[1]), quats[0])
+    return quat_multiply(quat_multiply(quats[0], quats[1]), quats[2])
+
+def quat_to_euler(quat):
+    """
+    Converts quaternions to the angles of Blender's 'XYZ' Euler mode (about the fixed x, y and z axes in turn), the
+    same as ``scipy.spatial.transform.Rotation.from_quat(quat).as_euler('xyz')``
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray quat: quaternions in scipy's (x, y, z, w) order, shape (4,) or (n, 4), normalized first
+
+    Returns:
+        :returns (np.ndarray): the angles in radians, shape (3,) or (n, 3)
+    """
+
+    quat = np.asarray(quat, dtype=float)
+    x, y, z, w = np.moveaxis(quat/np.linalg.norm(quat, axis=-1, keepdims=True), -1, 0)
+
+    # the rotation matrix entries the angles are read from
+    r00 = 1 - 2*(y*y + z*z)
+    r10 = 2*(x*y + z*w)
+    r20 = 2*(x*z - y*w)
+    r21 = 2*(y*z + x*w)
+    r22 = 1 - 2*(x*x + y*y)
+    r11 = 1 - 2*(x*x + z*z)
+    r12 = 2*(y*z - x*w)
+
+    beta = np.arcsin(np.clip(-r20, -1.0, 1.0))
+    # in gimbal lock only the sum of the first and last angle is defined, the last one is set to zero
+    locked = np.abs(r20) > 1 - 1e-9
+    alpha = np.where(locked, np.arctan2(-r12, r11), np.arctan2(r21, r22))
+    gamma = np.where(locked, 0.0, np.arctan2(r10, r00))
+    return np.stack([alpha, beta, gamma], axis=-1)
+
+def derivative(values, t, order=1, axis=0):
+    """
+    Differentiates samples over time with second order accurate finite differences (central inside, one-sided at
+    the ends), vectorized over every other axis, so i.e. the velocity of many bodies is one call. The samples do
+    not need to be evenly spaced.
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray values: the samples, i.e. positions of shape (N_bodies, len(t), 3)
+    :param np.ndarray t: the (increasing) time of each sample
+    :param int order: the order of the derivative (i.e. 1 for velocity, 2 for acceleration)
+    :param int axis: the time axis of ``values``
+
+    Returns:
+        :returns (np.ndarray): the derivative, the same shape as ``values``
+    """
+
+    values = np.asarray(values, dtype=float)
+    t = np.asarray(t, dtype=float)
+    edge_order = 2 if len(t) > 2 else 1
+    for _ in range(order):
+        values = np.gradient(values, t, axis=axis, edge_order=edge_order)
+    return values
+
+def unflip_quat(quat):
+    """
+    Flips the sign of quaternions so that each one is in the same hemisphere as the one before it.
+    ``q`` and ``-q`` are the same rotation, but interpolating between them takes the long way around.
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray quat: a numpy array of quaternions over time, shape (n, 4)
+
+    Returns:
+        :returns (np.ndarray): a copy of ``quat`` with a continuous sign
+    """
+
+    quat = np.array(quat, dtype=float)
+    dots = np.einsum('ij,ij->i', quat[1:], quat[:-1])
+    sign = np.cumprod(np.where(dots < 0, -1.0, 1.0))
+    quat[1:] *= sign[:, None]
+    return quat
+
+def slerp(quat, t, t_new):
+    """
+    Spherical linear interpolation of quaternions onto new sample times, vectorized over all samples
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray quat: a numpy array of quaternions over time, shape (len(t), 4). Component order does not matter.
+    :param np.ndarray t: the (increasing) time of each quaternion
+    :param np.ndarray t_new: the times to interpolate the quaternions at (clipped to the range of ``t``)
+
+    Returns:
+        :returns (np.ndarray): the unit quaternions at ``t_new``, shape (len(t_new), 4)
+    """
+
+    quat = unflip_quat(quat)
+    t = np.asarray(t, dtype=float)
+    t_new = np.clip(t_new, t[0], t[-1])
+
+    if len(t) == 1:
+        return np.repeat(quat, len(t_new), axis=0)
+
+    i = np.clip(np.searchsorted(t, t_new, side='right') - 1, 0, len(t) - 2)
+    dt = t[i + 1] - t[i]
+    u = np.divide(t_new - t[i], dt, out=np.zeros_like(t_new), where=dt > 0)
+
+    q0 = quat[i]
+    q1 = quat[i + 1]
+    cos_theta = np.clip(np.einsum('ij,ij->i', q0, q1), -1.0, 1.0)
+    theta = np.arccos(cos_theta)
+    sin_theta = np.sin(theta)
+
+    # nearly parallel quaternions fall back to linear interpolation
+    small = sin_theta < 1e-9
+    safe_sin = np.where(small, 1.0, sin_theta)
+    w0 = np.where(small, 1.0 - u, np.sin((1.0 - u) * theta) / safe_sin)
+    w1 = np.where(small, u, np.sin(u * theta) / safe_sin)
+
+    out = w0[:, None] * q0 + w1[:, None] * q1
+    out /= np.linalg.norm(out, axis=1)[:, None]
+    return out
+
+def quat_multiply(a, b):
+    """
+    Multiplies quaternions in scipy's (x, y, z, w) order, so the result rotates by ``b`` and then by ``a``. Signs are
+    kept as they are (unlike a round trip through ``scipy.spatial.transform.Rotation``), so continuous inputs give a
+    continuous product.
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray a: quaternions, shape (4,) or (n, 4)
+    :param np.ndarray b: quaternions, shape (4,) or (n, 4)
+
+    Returns:
+        :returns (np.ndarray): the products, broadcast like ``a`` and ``b``
+    """
+
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    av, aw = a[..., :3], a[..., 3:]
+    bv, bw = b[..., :3], b[..., 3:]
+    return np.concatenate([aw*bv + bw*av + np.cross(av, bv),
+                           aw*bw - np.sum(av*bv, axis=-1, keepdims=True)], axis=-1)
+
+def quat_rotate(quat, vectors):
+    """
+    Rotates vectors by quaternions in scipy's (x, y, z, w) order, which are normalized first like Blender does
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray quat: quaternions, shape (4,) or (n, 4)
+    :param np.ndarray vectors: vectors, shape (3,) or (n, 3)
+
+    Returns:
+        :returns (np.ndarray): the rotated vectors, broadcast like ``quat`` and ``vectors``
+    """
+
+    quat = np.asarray(quat, dtype=float)
+    quat = quat/np.linalg.norm(quat, axis=-1, keepdims=True)
+    u, w = quat[..., :3], quat[..., 3:]
+    uv = np.cross(u, vectors)
+    return vectors + 2*(w*uv + np.cross(u, uv))
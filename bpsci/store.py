@@ -0,0 +1,197 @@
+"""
+Columnar Data Store - :mod:`bpsci.store`
+========================================
+Loads large trajectory files without parsing CSV in Blender every time.
+
+:func:`convert_csv` reads a CSV file in chunks of rows, so memory stays bounded however large the file is, and
+writes each column to its own raw binary file next to a JSON manifest. A :class:`column_store` memory-maps the
+columns, so reading a subset of them costs nothing until the data is used, and nothing is parsed again::
+
+    data = open_csv('./examples/gallileo/gallileo.csv')   # converts on first use, and when the CSV changes
+
+    anim = bpsci_core.init_anim(data['t'], speed_up, scaler)
+    quat = euler2quat(**data.select(angles1='psi', angles2='theta', angles3='phi'), euler_type='zxz')
+    craft.apply_animation(**data.select(x_list='x', y_list='y', z_list='z'), quat_list=quat)
+    vec.animate(**data.select(x='v_x', y='v_y', z='v_z'))
+"""
+
+import json
+import os
+from itertools import islice
+
+import numpy as np
+
+MANIFEST = 'manifest.json'
+""":type: `str`: the name of the manifest file of a store"""
+
+_FORMAT = 1
+
+def _read_header(f, delimiter):
+    return [name.strip() for name in f.readline().rstrip('\r\n').split(delimiter)]
+
+def convert_csv(filepath, directory, columns=None, dtype='float64', delimiter=',', chunk_rows=2**18):
+    """
+    Converts a CSV file with a header line to a :class:`column_store`, one chunk of rows at a time
+
+    .. versionadded:: 0.3.6
+
+    :param str filepath: the CSV file
+    :param str directory: the directory of the store, created if needed. An existing store there is replaced.
+    :param list[str] columns: the columns to convert (i.e. to leave out text columns), defaults to all of them
+    :param str dtype: the numpy data type the values are stored as
+    :param str delimiter: the field delimiter
+    :param int chunk_rows: the number of rows parsed at a time, which bounds the memory used
+
+    Returns:
+        :returns (:class:`column_store`) the store
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        # the store is incomplete until the new manifest is written
+        os.remove(manifest_path)
+
+    dtype = np.dtype(dtype)
+    with open(filepath, encoding='utf-8-sig') as f:
+        header = _read_header(f, delimiter)
+        names = [name for name in header if name] if columns is None else list(columns)
+        missing = [name for name in names if name not in header]
+        if missing:
+            raise KeyError('columns not in %s: %s' % (filepath, ', '.join(missing)))
+        usecols = [header.index(name) for name in names]
+
+        files = ['col_%04d.bin' % i for i in range(len(names))]
+        outs = [open(os.path.join(directory, name), 'wb') for name in files]
+        n_rows = 0
+        try:
+            for lines in iter(lambda: list(islice(f, chunk_rows)), []):
+                chunk = np.loadtxt(lines, delimiter=delimiter, usecols=usecols, dtype=dtype, ndmin=2)
+                for out, values in zip(outs, chunk.T):
+                    # the transposed column is strided, tofile writes it contiguously
+                    np.ascontiguousarray(values).tofile(out)
+                n_rows += len(chunk)
+        finally:
+            for out in outs:
+                out.close()
+
+    stat = os.stat(filepath)
+    manifest = {'format': _FORMAT, 'n_rows': n_rows, 'dtype': dtype.str, 'columns': dict(zip(names, files)),
+                'source': {'path': os.path.abspath(filepath), 'size': stat.st_size, 'mtime': stat.st_mtime}}
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+    return column_store(directory)
+
+def open_csv(filepath, directory=None, columns=None, **kwargs):
+    """
+    Opens the :class:`column_store` of a CSV file, converting it first if there is no store yet or the CSV file
+    changed since it was converted
+
+    .. versionadded:: 0.3.6
+
+    :param str filepath: the CSV file
+    :param str directory: the directory of the store, defaults to the CSV path with '.columns' in place of its extension
+    :param list[str] columns: the columns to convert, defaults to all of them
+    :param kwargs: passed on to :func:`convert_csv`
+
+    Returns:
+        :returns (:class:`column_store`) the store
+    """
+
+    if directory is None:
+        directory = os.path.splitext(filepath)[0] + '.columns'
+
+    try:
+        store = column_store(directory)
+    except (OSError, ValueError):
+        store = None
+
+    stat = os.stat(filepath)
+    if store is not None and store.source.get('size') == stat.st_size and store.source.get('mtime') == stat.st_mtime \
+            and (columns is None or all(name in store for name in columns)):
+        return store
+
+    return convert_csv(filepath, directory, columns, **kwargs)
+
+class column_store:
+    """
+    The columns of a dataset stored by :func:`convert_csv`, each read as a read-only ``np.memmap``
+
+    .. versionadded:: 0.3.6
+
+    :param str directory: the directory of the store
+    """
+
+    def __init__(self, directory):
+
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get('format') != _FORMAT:
+            raise ValueError('unsupported column store format: %r' % (manifest.get('format'),))
+
+        self.directory = directory
+        """:type: `str`: the directory of the store"""
+
+        self.n_rows = manifest['n_rows']
+        """:type: `int`: the number of rows"""
+
+        self.dtype = np.dtype(manifest['dtype'])
+        """:type: `np.dtype`: the data type of every column"""
+
+        self.columns = list(manifest['columns'])
+        """:type: `list[str]`: the column names"""
+
+        self.source = manifest.get('source', {})
+        """:type: `dict`: the 'path', 'size' and 'mtime' of the CSV file the store was converted from"""
+
+        self._files = manifest['columns']
+        self._maps = {}
+
+    def __contains__(self, name):
+        return name in self._files
+
+    def __len__(self):
+        return self.n_rows
+
+    def __getitem__(self, name):
+        """
+        Returns:
+            :returns (np.memmap): one column, mapped when it is first asked for
+        """
+
+        column = self._maps.get(name)
+        if column is None:
+            if name not in self._files:
+                raise KeyError(name)
+            if self.n_rows == 0:
+                column = np.empty(0, dtype=self.dtype)
+            else:
+                column = np.memmap(os.path.join(self.directory, self._files[name]), dtype=self.dtype, mode='r',
+                                   shape=(self.n_rows,))
+            self._maps[name] = column
+        return column
+
+    def select(self, mapping=None, **names):
+        """
+        Looks up columns for the parameters of a function, so a mapping goes straight into i.e.
+        :meth:`bpsci.core.dyn_obj.apply_animation`, :func:`bpsci.utils.euler2quat` or :meth:`bpsci.core.dyn_vec.animate`
+
+        :param dict mapping: parameter name -> column name. A tuple of column names gives the columns side by side
+            (i.e. a quaternion, shape (n_rows, 4)), which is a copy. None is passed through as is.
+        :param names: more parameter name -> column name pairs
+
+        Returns:
+            :returns (dict): parameter name -> column
+        """
+
+        mapping = dict(mapping or {}, **names)
+        selected = {}
+        for param, name in mapping.items():
+            if name is None:
+                selected[param] = None
+            elif isinstance(name, (tuple, list)):
+                selected[param] = np.column_stack([self[n] for n in name])
+            else:
+                selected[param] = self[name]
+        return selected
@@ -0,0 +1,360 @@
+"""
+Live Telemetry Streaming - :mod:`bpsci.stream`
+==============================================
+Watch a running simulation in Blender instead of waiting for its output file.
+
+A :class:`telemetry_source` reads rows of numbers from a local socket or pipe in a background thread and keeps the
+most recent ones in a fixed size :class:`ring_buffer`, so memory stays bounded however long the run is. A
+:class:`live_view` registers a Blender timer that applies the latest row to :class:`~bpsci.core.dyn_obj` and
+:class:`~bpsci.core.dyn_vec` objects at viewport rate. Blender's UI thread never waits on the source.
+
+The stream is newline separated text, one sample per line with comma separated values. Unless the column names are
+given, the first line is a header with the column names, like a CSV file::
+
+    source = telemetry_source(('localhost', 5555))
+    source.start()
+
+    view = live_view(source)
+    view.add_obj(craft, 'x', 'y', 'z', quat=('q_x', 'q_y', 'q_z', 'q_w'))
+    view.add_vec(velocity, 'v_x', 'v_y', 'v_z')
+    view.start()
+
+``examples/streaming/fake_producer.py`` replays a CSV file as such a stream for testing.
+"""
+
+import os
+import socket
+import stat
+import threading
+
+import numpy as np
+import bpy
+
+class ring_buffer:
+    """
+    A fixed size buffer of the most recent rows of a stream, safe to write from one thread and read from another
+
+    .. versionadded:: 0.3.6
+
+    :param int capacity: the number of rows kept
+    :param int width: the number of values per row
+    """
+
+    def __init__(self, capacity, width):
+
+        self.data = np.full((capacity, width), np.nan)
+        """:type: `np.ndarray`: the storage, row ``i`` of the stream is kept at ``i % capacity``"""
+
+        self.count = 0
+        """:type: `int`: the number of rows written so far"""
+
+        self._lock = threading.Lock()
+
+    def push(self, rows):
+        """
+        Writes rows to the buffer, overwriting the oldest ones
+
+        :param np.ndarray rows: the new rows, shape (n, width)
+        """
+
+        rows = np.asarray(rows, dtype=float).reshape(-1, self.data.shape[1])
+        capacity = len(self.data)
+        if len(rows) > capacity:
+            skipped = len(rows) - capacity
+            rows = rows[-capacity:]
+        else:
+            skipped = 0
+
+        with self._lock:
+            start = (self.count + skipped) % capacity
+            first = min(len(rows), capacity - start)
+            self.data[start:start + first] = rows[:first]
+            self.data[:len(rows) - first] = rows[first:]
+            self.count += skipped + len(rows)
+
+    def latest(self, n=1):
+        """
+        Returns:
+            :returns (np.ndarray): a copy of the last ``n`` rows written, oldest first (fewer if fewer were written)
+        """
+
+        with self._lock:
+            return self._rows(max(self.count - n, 0))[0]
+
+    def since(self, count):
+        """
+        Returns the rows written after the first ``count`` rows, as far as they are still in the buffer
+
+        :param int count: a previous value of :attr:`count`
+
+        Returns:
+            :returns (tuple): a copy of the rows, oldest first, and the current :attr:`count` to pass next time
+        """
+
+        with self._lock:
+            return self._rows(count)
+
+    def _rows(self, count):
+        capacity = len(self.data)
+        count = max(count, self.count - capacity)
+        idx = np.arange(count, self.count) % capacity
+        return self.data[idx], self.count
+
+def _open(source):
+    """Opens a binary stream to read lines from, returns it and its socket (None if it is not one)"""
+
+    if isinstance(source, tuple):
+        sock = socket.create_connection(source)
+        return sock.makefile('rb'), sock
+    if isinstance(source, str):
+        if stat.S_ISSOCK(os.stat(source).st_mode):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(source)
+            return sock.makefile('rb'), sock
+        return open(source, 'rb'), None
+    return source, None
+
+class telemetry_source:
+    """
+    Reads samples from a local source into a :class:`ring_buffer` in a background thread
+
+    .. versionadded:: 0.3.6
+
+    :param source: a (host, port) TCP address, the path of a Unix socket or named pipe (FIFO), or an open binary file (i.e. a subprocess' stdout)
+    :param int capacity: the number of samples kept
+    :param list[str] columns: the name of each column, read from the first line of the stream if not given
+    """
+
+    def __init__(self, source, capacity=4096, columns=None):
+
+        self.source = source
+        """the source the samples are read from"""
+
+        self.capacity = capacity
+        """:type: `int`: the number of samples kept"""
+
+        self.columns = None if columns is None else list(columns)
+        """:type: `list[str]`: the name of each column, None until the header was read"""
+
+        self.buffer = None if columns is None else ring_buffer(capacity, len(self.columns))
+        """:class:`ring_buffer`: the most recent samples, None until the header was read"""
+
+        self.error = None
+        """:type: `Exception`: what stopped the reader, if it failed"""
+
+        self.skipped = 0
+        """:type: `int`: the number of lines that could not be parsed"""
+
+        self._stream = None
+        self._socket = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        if columns is not None:
+            self._ready.set()
+
+    def start(self):
+        """
+        Starts reading in a daemon thread
+        """
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._read, name='bpsci telemetry reader', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        Stops reading and closes the source
+
+        :param float timeout: how long to wait for the reader thread [s]
+        """
+
+        self._stop.set()
+        if self._socket is not None:
+            # wakes the reader up if it is waiting for data
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        """:type: `bool`: whether the reader thread is alive"""
+
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait_ready(self, timeout=None):
+        """
+        Waits until the column names are known
+
+        :param float timeout: how long to wait [s]
+
+        Returns:
+            :returns (bool): whether :attr:`columns` and :attr:`buffer` are set
+        """
+
+        return self._ready.wait(timeout)
+
+    def column(self, name):
+        """
+        Returns:
+            :returns (int): the index of a column
+        """
+
+        return self.columns.index(name)
+
+    def _read(self):
+        try:
+            self._stream, self._socket = _open(self.source)
+            for line in self._stream:
+                if self._stop.is_set():
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                if self.columns is None:
+                    self.columns = [name.strip() for name in line.decode('utf-8-sig').split(',')]
+                    self.buffer = ring_buffer(self.capacity, len(self.columns))
+                    self._ready.set()
+                    continue
+                try:
+                    row = [float(v) for v in line.split(b',')]
+                except ValueError:
+                    self.skipped += 1
+                    continue
+                if len(row) != len(self.columns):
+                    self.skipped += 1
+                    continue
+                self.buffer.push(row)
+        except (OSError, ValueError) as e:
+            if not self._stop.is_set():
+                self.error = e
+        finally:
+            self._ready.set()
+            if self._stream is not None and self._stream is not self.source:
+                self._stream.close()
+            if self._socket is not None:
+                self._socket.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class live_view:
+    """
+    Applies the latest sample of a :class:`telemetry_source` to Blender objects from a ``bpy.app.timers`` timer.
+    Nothing is keyframed, the objects simply show the current state of the stream.
+
+    .. versionadded:: 0.3.6
+
+    :param source: the source of the samples
+    :type source: :class:`telemetry_source`
+    :param float rate: the number of updates per second, defaults to the scene's frame rate
+    :param float scale: global physical scale factor, defaults to the scale of the first object added
+    """
+
+    def __init__(self, source, rate=None, scale=None):
+
+        self.source = source
+        """:class:`telemetry_source`: the source of the samples"""
+
+        self.rate = rate or bpy.context.scene.render.fps
+        """:type: `float`: the number of updates per second"""
+
+        self.scale = scale
+        """:type: `float`: global physical scale factor"""
+
+        self.count = 0
+        """:type: `int`: the :attr:`ring_buffer.count` of the last applied sample"""
+
+        self._objs = []
+        self._vecs = []
+
+        # timers are told apart by identity, so the bound method is made once
+        self._timer = self.update
+
+    def add_obj(self, obj, x, y, z, quat=None):
+        """
+        Moves a :class:`~bpsci.core.dyn_obj` with the stream
+
+        :param obj: the dynamic object
+        :type obj: :class:`bpsci.core.dyn_obj`
+        :param str x: the column of the x position
+        :param str y: the column of the y position
+        :param str z: the column of the z position
+        :param tuple[str] quat: the four columns of the quaternion in scipy's (x, y, z, w) order, if it rotates
+        """
+
+        if self.scale is None:
+            self.scale = obj.scale
+        self._objs.append((obj, (x, y, z), quat))
+
+    def add_vec(self, vec, x, y, z, max_mag=None):
+        """
+        Points and scales a :class:`~bpsci.core.dyn_vec` with the stream. The vector is normalized by its magnitude,
+        like ``dyn_vec.animate(norm='magnitude')``.
+
+        :param vec: the dynamic vector
+        :type vec: :class:`bpsci.core.dyn_vec`
+        :param str x: the column of the x component
+        :param str y: the column of the y component
+        :param str z: the column of the z component
+        :param float max_mag: the magnitude to normalize by, defaults to the largest magnitude streamed so far
+        """
+
+        self._vecs.append({'vec': vec, 'columns': (x, y, z), 'max_mag': max_mag, 'seen': 0.0})
+
+    def start(self):
+        """
+        Registers the timer
+        """
+
+        if not bpy.app.timers.is_registered(self._timer):
+            bpy.app.timers.register(self._timer, first_interval=0, persistent=True)
+
+    def stop(self):
+        """
+        Unregisters the timer
+        """
+
+        if bpy.app.timers.is_registered(self._timer):
+            bpy.app.timers.unregister(self._timer)
+
+    def update(self):
+        """
+        Applies the latest sample, if there is a new one. This is the timer callback.
+
+        Returns:
+            :returns (float): the time until the next update [s]
+        """
+
+        buffer = self.source.buffer
+        if buffer is None or buffer.count == self.count:
+            return 1/self.rate
+
+        rows, self.count = buffer.since(self.count)
+        row = rows[-1]
+        col = self.source.column
+
+        for obj, xyz, quat in self._objs:
+            obj.set_pose(row[[col(c) for c in xyz]]*self.scale, None if quat is None else row[[col(c) for c in quat]])
+
+        for entry in self._vecs:
+            vec = entry['vec']
+            v = rows[:, [col(c) for c in entry['columns']]]
+            max_mag = entry['max_mag']
+            if max_mag is None:
+                # every sample since the last update counts towards the running maximum
+                entry['seen'] = max(entry['seen'], float(np.sqrt(np.max(np.einsum('ij,ij->i', v, v)))))
+                max_mag = entry['seen']
+            norm_vec = v[-1]/(max_mag or 1)*vec.scale
+
+            vec.point_rf.ob.location = norm_vec + np.asarray(vec.offset)
+            vec.parent_rf.ob.scale = (np.sqrt(norm_vec @ norm_vec)*vec.scale, 1, 1)
+
+        return 1/self.rate
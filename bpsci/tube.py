@@ -0,0 +1,182 @@
+"""
+Tube Meshes of Trajectories - :mod:`bpsci.tube`
+===============================================
+Sweeps a circle along a trajectory to give the geometry of a streamline directly from the data arrays, without
+a beveled curve for Blender to evaluate and convert.
+
+The circle is carried along the trajectory by parallel transport (rotation minimizing frames): each ring is turned
+from the one before it by the smallest rotation that follows the tangent, so the tube never twists. The rotations
+of all points are chained with a parallel prefix product of quaternions, and the trajectory is swept in chunks of
+points, so the memory used besides the finished mesh stays bounded however long the trajectory is::
+
+    verts, faces = sweep(points, radius=0.02, sides=8)
+
+None of these functions touch Blender, :func:`bpsci.core.new_tube` builds the mesh object from them.
+"""
+
+import numpy as np
+
+from bpsci.resample import quat_multiply, quat_rotate
+
+def _unit(vectors):
+    """Normalizes vectors, zero length vectors stay zero"""
+
+    norm = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norm, out=np.zeros_like(vectors), where=norm > 0)
+
+def _tangents(points, start, stop):
+    """The unit tangent at points ``start`` to ``stop``, the mean direction of the segments on either side"""
+
+    lo = max(start - 1, 0)
+    seg = _unit(np.diff(points[lo:stop + 1], axis=0))
+    # segment k of seg runs from point lo + k to lo + k + 1
+    before = seg[start - lo - 1:stop - lo - 1] if start > 0 else np.vstack([seg[:1], seg[:stop - 1]])
+    after = seg[start - lo:stop - lo]
+    if len(after) < stop - start:
+        after = np.vstack([after, before[-1:]])
+    return _unit(before + after)
+
+def _fill(tangents, previous=None):
+    """Carries the last valid tangent over repeated points (zero tangents), ``previous`` is the one before them"""
+
+    valid = np.any(tangents != 0, axis=1)
+    if valid.all():
+        return tangents
+    if previous is None:
+        previous = tangents[np.argmax(valid)] if valid.any() else np.array([0.0, 0.0, 1.0])
+    idx = np.maximum.accumulate(np.where(valid, np.arange(len(tangents)), -1))
+    filled = tangents[np.maximum(idx, 0)]
+    filled[idx < 0] = previous
+    return filled
+
+def align_quat(a, b):
+    """
+    The smallest rotations that turn unit vectors onto others
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray a: unit vectors, shape (n, 3)
+    :param np.ndarray b: unit vectors, shape (n, 3)
+
+    Returns:
+        :returns (np.ndarray): unit quaternions in scipy's (x, y, z, w) order, shape (n, 4)
+    """
+
+    dot = np.einsum('ij,ij->i', a, b)
+    quat = np.column_stack([np.cross(a, b), 1 + dot])
+
+    # opposite vectors turn half way around any axis perpendicular to them
+    opposite = quat[:, 3] < 1e-12
+    if opposite.any():
+        other = np.where(np.abs(a[opposite, :1]) < 0.9, [[1.0, 0.0, 0.0]], [[0.0, 1.0, 0.0]])
+        quat[opposite] = np.column_stack([_unit(np.cross(a[opposite], other)), np.zeros(opposite.sum())])
+
+    return _unit(quat)
+
+def prefix_quat(quat):
+    """
+    Chains rotations, the Hillis-Steele parallel prefix product: after log2(n) vectorized passes element i rotates
+    by ``quat[0]``, then ``quat[1]``, ..., then ``quat[i]``
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray quat: quaternions in scipy's (x, y, z, w) order, shape (n, 4)
+
+    Returns:
+        :returns (np.ndarray): the chained unit quaternions, shape (n, 4)
+    """
+
+    out = np.array(quat, dtype=float)
+    step = 1
+    while step < len(out):
+        out[step:] = quat_multiply(out[step:], out[:-step])
+        # renormalized every pass, so rounding does not build up over long trajectories
+        out /= np.linalg.norm(out, axis=1, keepdims=True)
+        step *= 2
+    return out
+
+def normal_frames(tangents, normal=None, carry=None):
+    """
+    Parallel transports a normal vector along unit tangents
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray tangents: the unit tangents, shape (n, 3)
+    :param np.ndarray normal: the normal at the first tangent, perpendicular to it, defaults to any such normal
+    :param tuple carry: the carry returned for an earlier chunk, to continue its frames (``normal`` is then ignored)
+
+    Returns:
+        :returns (tuple): the unit normals, shape (n, 3), and the carry for the next chunk
+    """
+
+    if carry is None:
+        prev, rot = tangents[0], np.array([0.0, 0.0, 0.0, 1.0])
+        if normal is None:
+            axis = np.zeros(3)
+            axis[np.argmin(np.abs(tangents[0]))] = 1.0
+            normal = _unit(np.cross(tangents[0], axis))
+    else:
+        prev, rot, normal = carry
+
+    # the rotation of each point is the chain of the smallest turns between consecutive tangents
+    steps = align_quat(np.vstack([prev, tangents[:-1]]), tangents)
+    steps[0] = quat_multiply(steps[0], rot)
+    rot = prefix_quat(steps)
+
+    return quat_rotate(rot, normal), (tangents[-1], rot[-1], normal)
+
+def tube_faces(n_rings, sides):
+    """
+    The quads between consecutive rings of a tube, facing outwards
+
+    .. versionadded:: 0.3.6
+
+    :param int n_rings: the number of rings
+    :param int sides: the number of vertices of each ring
+
+    Returns:
+        :returns (np.ndarray): vertex indices, shape ((n_rings - 1)*sides, 4)
+    """
+
+    ring = np.arange(n_rings - 1, dtype=np.int32)[:, None]*sides
+    j = np.arange(sides, dtype=np.int32)
+    k = (j + 1) % sides
+    return np.stack([ring + j, ring + k, ring + sides + k, ring + sides + j], axis=-1).reshape(-1, 4)
+
+def sweep(points, radius, sides=8, chunk_rows=2**16):
+    """
+    Sweeps a circle along a trajectory with parallel transport frames
+
+    .. versionadded:: 0.3.6
+
+    :param np.ndarray points: the trajectory, shape (n, 3). Extra columns (i.e. the w of
+        :func:`bpsci.plan.streamline_points`) are ignored.
+    :param radius: the radius of the tube, a float or one per point
+    :type radius: float or np.ndarray
+    :param int sides: the number of vertices of each ring
+    :param int chunk_rows: the number of points swept at a time, which bounds the memory used
+
+    Returns:
+        :returns (tuple): the vertices, float32 shape (n*sides, 3), and the quads, int32 shape ((n - 1)*sides, 4)
+    """
+
+    points = np.asarray(points)[:, :3]
+    n = len(points)
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), (n,))
+
+    angle = np.linspace(0, 2*np.pi, sides, endpoint=False)
+    cos, sin = np.cos(angle)[None, :, None], np.sin(angle)[None, :, None]
+
+    verts = np.empty((n, sides, 3), dtype=np.float32)
+    carry = previous = None
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        tangents = _fill(_tangents(points, start, stop) if n > 1 else np.zeros((1, 3)), previous)
+        normals, carry = normal_frames(tangents, carry=carry)
+        previous = tangents[-1]
+        binormals = np.cross(tangents, normals)
+
+        r = radius[start:stop, None, None]
+        verts[start:stop] = points[start:stop, None, :] + r*(cos*normals[:, None, :] + sin*binormals[:, None, :])
+
+    return verts.reshape(-1, 3), tube_faces(n, sides)
@@ -1,39 +1,30 @@
 import numpy as np
-from scipy.spatial.transform import Rotation as R
 import bpy
-import pandas as pd
+
+from bpsci import registry
+from bpsci.resample import euler_to_quat
 
 def erase_others(obj_name):
     """
     Erase all objects associated with the passed object name (that is not the original object). 
 
-    .. warning::
-        this function will delete any object that has the passed object name as a substring
     .. versionadded:: 0.2.30
+    .. versionchanged:: 0.3.6
+        removes the datablocks :mod:`bpsci.registry` recorded for the object in one batch, or if it has none
+        (i.e. in a freshly opened file) the objects named like the ones :class:`bpsci.core.dyn_obj` creates.
+        Other objects that merely contain the name are no longer deleted.
 
     :param str obj_name: the object name
     """
-    
-    actual_obj = bpy.data.objects[obj_name]
-    name = actual_obj.name
-    
-    all_objs = list(bpy.data.objects)
-    all_objs_names = np.array([obj.name for obj in all_objs])
-    
-    inds = [all_obj_name.find(name) for all_obj_name in all_objs_names]
-    
-    family = []
-    relatives = []
-    
-    for i in range(len(inds)):
-        if inds[i] >= 0:
-            family.append(all_objs_names[i])
-    
-    for member in family:
-        if member != name:
-            relatives.append(member)
-            
-    [bpy.data.objects.remove(bpy.data.objects[obj_name]) for obj_name in relatives]
+
+    if obj_name in registry.owners():
+        registry.teardown(obj_name)
+        return
+
+    name = bpy.data.objects[obj_name].name
+    relatives = [bpy.data.objects.get(name + suffix) for suffix in ('_non_rot', '_pa', '_body', '_streamline')]
+    streamline = relatives[-1]
+    registry.remove(relatives + [None if streamline is None else streamline.data])
 
 def erase_vector(name):
     """
@@ -41,10 +32,17 @@ def erase_vector(name):
 
         :param str obj_name: the name passed to :class:`bpsci.core.dyn_vector`  
 
+        .. versionchanged:: 0.3.6
+            removes the datablocks :mod:`bpsci.registry` recorded for the vector in one batch
+
         """
+
+    if name+'_vector' in registry.owners():
+        registry.teardown(name+'_vector')
+        return
+
     obj_list = [name+'_vector', name+'_vector_empty', name+'_vector_pointing_empty']
-            
-    [bpy.data.objects.remove(bpy.data.objects[obj_name]) for obj_name in obj_list]
+    registry.remove([bpy.data.objects[obj_name] for obj_name in obj_list])
 
 def erase_self(obj_name):
     """
@@ -71,6 +69,9 @@ def euler2quat(angles1, angles2, angles3, euler_type):
     """
     Takes a set of Euler angles over time and returns the equivalent quaternion representation
 
+    .. versionchanged:: 0.3.6
+        converted with NumPy (:func:`bpsci.resample.euler_to_quat`), without importing SciPy
+
     :param np.ndarray angles1: first set of angles over time
     :param np.ndarray angles2: second set of angles over time
     :param np.ndarray angles3: third set of angles over time
@@ -82,5 +83,37 @@ def euler2quat(angles1, angles2, angles3, euler_type):
     """
 
     all_angles = np.vstack([angles1, angles2, angles3]).transpose()
-    quat_out = R.from_euler(euler_type, all_angles).as_quat()
-    return quat_out
\ No newline at end of file
+    quat_out = euler_to_quat(all_angles, euler_type)
+    return quat_out
+
+def read_obj(filepath):
+    """
+    Reads the vertices and faces of a Wavefront OBJ file into numpy arrays, converted to Blender's axes
+    the same way Blender's OBJ importer does (-Z forward, Y up)
+
+    .. versionadded:: 0.3.6
+
+    :param str filepath: path to the OBJ file
+
+    Returns:
+        :returns (tuple): the vertex coordinates, shape (n, 3), and a list of faces, each an array of vertex indices
+    """
+
+    with open(filepath) as f:
+        lines = f.read().splitlines()
+
+    verts = []
+    faces = []
+    for line in lines:
+        if line.startswith('v '):
+            verts.append(line.split()[1:4])
+        elif line.startswith('f '):
+            idx = np.array([corner.split('/')[0] for corner in line.split()[1:]], dtype=int)
+            # OBJ indices are 1-based, negative indices count back from the last vertex read so far
+            faces.append(np.where(idx < 0, idx + len(verts), idx - 1))
+
+    verts = np.array(verts, dtype=float).reshape(-1, 3)
+    verts = verts[:, [0, 2, 1]]
+    verts[:, 1] *= -1
+
+    return verts, faces
\ No newline at end of file
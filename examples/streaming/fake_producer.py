@@ -0,0 +1,43 @@
+"""
+Replays a CSV file as a live telemetry stream for bpsci.stream, one row at a time over a local TCP socket.
+Run it outside of Blender, then run streaming_blend.py inside Blender:
+
+    python examples/streaming/fake_producer.py examples/gallileo/gallileo.csv --port 5555 --rate 60
+"""
+
+import argparse
+import socket
+import time
+
+parser = argparse.ArgumentParser(description='Replays a CSV file as a live telemetry stream')
+parser.add_argument('file_path', help='the CSV file to replay, its first line is sent as the header')
+parser.add_argument('--port', type=int, default=5555, help='the local TCP port to serve on')
+parser.add_argument('--rate', type=float, default=60, help='rows sent per second')
+parser.add_argument('--loop', action='store_true', help='start over at the end of the file')
+args = parser.parse_args()
+
+with open(args.file_path, encoding='utf-8-sig') as f:
+    header = f.readline()
+    rows = f.readlines()
+
+server = socket.create_server(('localhost', args.port))
+print('waiting for a reader on port %d' % args.port)
+conn, _ = server.accept()
+
+with conn:
+    conn.sendall(header.encode())
+    start = time.perf_counter()
+    sent = 0
+    while True:
+        for row in rows:
+            # keep the average rate without drifting
+            sent += 1
+            delay = start + sent/args.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                conn.sendall(row.encode())
+            except (BrokenPipeError, ConnectionResetError):
+                raise SystemExit('the reader disconnected')
+        if not args.loop:
+            break
@@ -0,0 +1,23 @@
+import numpy as np
+import bpy
+
+import bpsci.core as bpsci_core
+from bpsci.stream import telemetry_source, live_view
+
+# the streamed values are shown as they arrive, the clock only sets the scene up
+anim = bpsci_core.init_anim(np.array([0.0, 1.0]), 1, 1)
+
+craft = bpsci_core.dyn_obj(bpy.data.objects['gallileo'], [0, 0, 0], [0, 0, 0], 'xyz', None, anim)  # the object that follows the stream
+w_vec = bpsci_core.dyn_vec(craft.pa_axes.ob, 'angular_velocity', 1, .2, (0, 0, 0), anim)  # an arrow along the angular velocity
+
+# start examples/streaming/fake_producer.py first, it serves the data on this port
+source = telemetry_source(('localhost', 5555), capacity=1024)  # only the last 1024 samples are ever kept
+source.start()
+
+view = live_view(source)  # applies the latest sample at the scene's frame rate
+view.add_obj(craft, 'x', 'y', 'z')
+view.add_vec(w_vec, 'w_x', 'w_y', 'w_z')
+view.start()
+
+# to stop watching:
+# view.stop(); source.stop()
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the core modules run against the recording bpy/mathutils stand-ins of the benchmarks
+sys.path[:0] = [os.path.join(ROOT, 'benchmarks', 'stubs'), ROOT]
+
+import bpy
+import bpsci.core as bpsci_core
+
+@pytest.fixture(autouse=True)
+def fresh_scene():
+    bpy.reset()
+    bpsci_core._text_tables.clear()
+    bpsci_core._swarms.clear()
@@ -0,0 +1,44 @@
+import bpy
+import numpy as np
+
+import bpsci.core as bpsci_core
+
+def _clock():
+    t = np.linspace(0, 2, 49)
+    return t, bpsci_core.init_anim(t, 1, 1)
+
+def test_numeric_table():
+    t, anim = _clock()
+    text = bpsci_core.anim_text('time', None, anim, 3*t, 's', 2, False)
+    assert text.obj.name == 'time_text'
+    for frame in (1, 10, 30, len(text.table)):
+        bpy.context.scene.frame_set(frame)
+        assert text.obj.data.body == '%.2f s' % np.interp(frame, anim.frames, 3*t)
+    # frames past the end of the table hold its last text
+    bpy.context.scene.frame_set(1000)
+    assert text.obj.data.body == text.table[-1]
+
+def test_string_table_holds_samples():
+    t, anim = _clock()
+    labels = np.array(['coast', 'burn', 'coast'])[np.minimum(np.arange(len(t)) // 20, 2)]
+    text = bpsci_core.anim_text('phase', None, anim, labels, '', 0, True)
+    for frame in range(1, len(text.table) + 1):
+        bpy.context.scene.frame_set(frame)
+        sample = np.searchsorted(anim.frames, frame, side='right') - 1
+        assert text.obj.data.body == labels[sample] + ' '
+
+def test_one_shared_handler():
+    t, anim = _clock()
+
+    def recalculate_text(scene, depsgraph=None):
+        pass
+
+    # a handler left by an earlier version of the script
+    recalculate_text.__module__ = bpsci_core.__name__
+    bpy.app.handlers.frame_change_pre.append(recalculate_text)
+
+    texts = [bpsci_core.anim_text(name, None, anim, i*t, '', 1, False) for i, name in enumerate('abc')]
+
+    assert bpy.app.handlers.frame_change_pre == [bpsci_core._update_texts]
+    bpy.context.scene.frame_set(12)
+    assert [text.obj.data.body for text in texts] == [text.table[11] for text in texts]
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+from bpsci.cache import track_cache
+from bpsci.plan import anim_clock, anim_plan
+
+def _plan(n=100):
+    t = np.linspace(0, 10, n)
+    plan = anim_plan(anim_clock(t, 1, 1, 24))
+    plan.dyn_obj('craft', np.cos(t), np.sin(t), t, None)
+    return plan
+
+def _leftovers(cache):
+    return [name for name in os.listdir(cache.directory) if name.startswith('.')]
+
+def test_key():
+    a = np.arange(3.0)
+    assert track_cache.key(a, 1, 'x') == track_cache.key(a.copy(), 1, 'x')
+    assert track_cache.key(a, 1) != track_cache.key(a, '1')
+    assert track_cache.key(a) != track_cache.key(a.astype(np.float32))
+
+def test_round_trip(tmp_path):
+    cache = track_cache(str(tmp_path))
+    plan = _plan()
+    key = cache.key('craft')
+    assert cache.get(key) is None
+    cache.put(key, plan)
+    loaded = cache.get(key)
+    trk = plan.tracks['craft_non_rot']['location']
+    np.testing.assert_array_equal(loaded.tracks['craft_non_rot']['location'].values, trk.values)
+    assert cache.plan(key, lambda: pytest.fail('a cached plan is built again')) is not None
+    assert not _leftovers(cache)
+
+def test_eviction(tmp_path):
+    cache = track_cache(str(tmp_path))
+    for i in range(3):
+        cache.put(cache.key(i), _plan())
+        os.utime(os.path.join(cache.directory, cache.key(i)), (i, i))
+    size = cache.entries()[0][1]
+    cache.trim(2*size)
+    assert [key for key, _, _ in cache.entries()] == [cache.key(1), cache.key(2)]
+    cache.clear()
+    assert cache.entries() == []
+
+def test_failed_put_leaves_nothing(tmp_path, monkeypatch):
+    cache = track_cache(str(tmp_path))
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(np, 'save', fail)
+    with pytest.raises(OSError):
+        cache.put(cache.key('craft'), _plan())
+    assert not _leftovers(cache)
+    assert cache.entries() == []
+
+def test_trim_removes_stale_writes(tmp_path):
+    cache = track_cache(str(tmp_path))
+    stale, fresh = os.path.join(cache.directory, '.tmpstale'), os.path.join(cache.directory, '.tmpfresh')
+    os.mkdir(stale)
+    os.mkdir(fresh)
+    os.utime(stale, (0, 0))
+    cache.trim()
+    assert _leftovers(cache) == ['.tmpfresh']
@@ -0,0 +1,59 @@
+import numpy as np
+
+from bpsci.decimate import decimate_path, decimate_positions, decimate_quats, last_per_frame
+from bpsci.resample import euler_to_quat, unflip_quat
+
+def _track(n=2000):
+    frames = np.arange(n, dtype=float)
+    t = frames/100
+    positions = np.column_stack([np.cos(t), np.sin(2*t), 0.1*t**2])
+    return frames, t, positions
+
+def _lerp(frames, keep, values):
+    return np.column_stack([np.interp(frames, frames[keep], v) for v in values[keep].T])
+
+def test_last_per_frame():
+    frames, values = last_per_frame([0, 1, 1, 2], [0.0, 1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(frames, [0, 1, 2])
+    np.testing.assert_array_equal(values, [0, 2, 3])
+
+def test_decimate_positions_error_bound():
+    frames, _, positions = _track()
+    for tol in (1e-2, 1e-4):
+        keep, report = decimate_positions(frames, positions, tol)
+        err = np.linalg.norm(_lerp(frames, keep, positions) - positions, axis=1)
+        assert err.max() <= tol
+        assert report['max_error'] <= tol
+        assert keep[0] == 0 and keep[-1] == len(frames) - 1
+        assert report['keys_out'] == len(keep) < len(frames)
+
+def test_decimate_quats_error_bound():
+    frames, t, _ = _track()
+    quat = unflip_quat(euler_to_quat(np.column_stack([t, 0.5*np.sin(t), 0.2*t]), 'xyz'))
+    tol = 1e-3
+    keep, report = decimate_quats(frames, quat, tol)
+    interp = _lerp(frames, keep, quat)
+    interp /= np.linalg.norm(interp, axis=1)[:, None]
+    angle = 2*np.arccos(np.clip(np.abs(np.einsum('ij,ij->i', interp, quat)), 0, 1))
+    assert angle.max() <= tol
+    assert report['max_error'] <= tol
+    assert len(keep) < len(frames)
+
+def test_decimate_path_error_bound():
+    _, _, points = _track()
+    tol = 1e-3
+    keep, report = decimate_path(points, tol)
+    for a, b in zip(keep[:-1], keep[1:]):
+        chord = points[b] - points[a]
+        s = np.clip((points[a:b + 1] - points[a]) @ chord/(chord @ chord), 0, 1)
+        assert np.linalg.norm(points[a] + s[:, None]*chord - points[a:b + 1], axis=1).max() <= tol
+    assert report['max_error'] <= tol
+
+def test_decimate_path_max_angle():
+    t = np.linspace(0, 2*np.pi, 1000)
+    points = np.column_stack([np.cos(t), np.sin(t), np.zeros_like(t)])
+    loose, _ = decimate_path(points, 10)
+    bounded, _ = decimate_path(points, 10, max_angle=0.5)
+    assert len(loose) == 2
+    # a circle turns 2 pi in total, so at least 2 pi/0.5 segments are needed
+    assert len(bounded) - 1 >= int(2*np.pi/0.5)
@@ -0,0 +1,51 @@
+import bpy
+import numpy as np
+
+import bpsci.core as bpsci_core
+from bpsci.utils import euler2quat
+
+def _data():
+    t = np.linspace(0, 20, 401)
+    quat = euler2quat(0.3*t, 0.1*t, np.sin(t), 'zxz')
+    return t, np.cos(t), np.sin(t), 0.2*t, quat
+
+def _keys(ob, data_path):
+    fcurves = sorted((fc for fc in ob.animation_data.action.fcurves if fc.data_path == data_path),
+                     key=lambda fc: fc.array_index)
+    for fc in fcurves:
+        fc.update()
+    return np.stack([[kp.co for kp in fc.keyframe_points] for fc in fcurves])
+
+def test_extend_matches_rebuild():
+    t, x, y, z, quat = _data()
+    # twice as long, so the full clock has the same frames per second of data as the first half
+    m = 201
+
+    anim = bpsci_core.init_anim(t[:m], 1, .5)
+    grown = bpsci_core.dyn_obj(bpy.data.objects.new('grown', None), [.1, 0, 0], [0, 0, 0], 'xyz', None, anim)
+    grown.apply_animation(x[:m], y[:m], z[:m], quat[:m])
+    grown.apply_streamline('dynamic', x[:m], y[:m], z[:m], .1)
+    for a, b in ((m, 300), (300, len(t))):
+        anim.extend(t[a:b])
+        grown.extend(x[a:b], y[a:b], z[a:b], quat[a:b])
+        grown.extend_streamline(x[a:b], y[a:b], z[a:b])
+
+    full = bpsci_core.init_anim(t, 1, .5)
+    rebuilt = bpsci_core.dyn_obj(bpy.data.objects.new('rebuilt', None), [.1, 0, 0], [0, 0, 0], 'xyz', None, full)
+    rebuilt.apply_animation(x, y, z, quat)
+    rebuilt.apply_streamline('dynamic', x, y, z, .1)
+
+    np.testing.assert_array_equal(anim.frames, full.frames)
+    assert anim.frame_duration == full.frame_duration
+    np.testing.assert_allclose(_keys(grown.non_rot.ob, 'location'), _keys(rebuilt.non_rot.ob, 'location'), atol=1e-6)
+    np.testing.assert_allclose(_keys(grown.pa_axes.ob, 'rotation_quaternion'),
+                               _keys(rebuilt.pa_axes.ob, 'rotation_quaternion'), atol=1e-6)
+
+    grown_crv = bpy.data.objects['grown_streamline'].data
+    rebuilt_crv = bpy.data.objects['rebuilt_streamline'].data
+    np.testing.assert_allclose(grown_crv.splines[0].points._co, rebuilt_crv.splines[0].points._co, atol=1e-6)
+
+    # the extended streamline keys its length along it, and a driver divides it by the total length
+    bevel = _keys(grown_crv, '["bpsci_bevel"]')[0]
+    bevel[:, 1] /= grown_crv['bpsci_bevel_total']
+    np.testing.assert_allclose(bevel, _keys(rebuilt_crv, 'bevel_factor_end')[0], atol=1e-5)
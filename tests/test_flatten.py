@@ -0,0 +1,111 @@
+import bpy
+import numpy as np
+
+import bpsci.core as bpsci_core
+from bpsci.plan import flat_tracks, location_track, rotation_track
+from bpsci.resample import euler_to_quat, quat_rotate
+from bpsci.utils import euler2quat
+
+PA = [.3, -.2, .5]
+COG = [.1, .2, -.3]
+
+def _matrix(loc, quat=(0, 0, 0, 1), scale=1):
+    """The 4x4 matrices of locations, (x, y, z, w) rotations and scales, shape (..., 4, 4)"""
+
+    loc, quat = np.asarray(loc, dtype=float), np.asarray(quat, dtype=float)
+    shape = np.broadcast_shapes(loc.shape[:-1] if loc.ndim else (), quat.shape[:-1])
+    m = np.zeros(shape + (4, 4))
+    m[..., :3, :3] = np.stack([quat_rotate(quat, axis) for axis in np.eye(3)], axis=-1)*np.asarray(scale, dtype=float)
+    m[..., :3, 3] = loc
+    m[..., 3, 3] = 1
+    return m
+
+def _keyed(ob, data_path, frames):
+    ad = ob.animation_data
+    fcurves = [fc for fc in ad.action.fcurves if fc.data_path == data_path] if ad and ad.action else []
+    if not fcurves:
+        return np.tile(list(getattr(ob, data_path)), (len(frames), 1))
+    values = []
+    for fc in sorted(fcurves, key=lambda fc: fc.array_index):
+        fc.update()
+        co = np.array([kp.co for kp in fc.keyframe_points])
+        values.append(np.interp(frames, co[:, 0], co[:, 1]))
+    return np.column_stack(values)
+
+def _world(ob, frames=(0,)):
+    """The world matrix of an object at each frame, as Blender evaluates its keys and its parents"""
+
+    frames = np.asarray(frames, dtype=float)
+    if ob.rotation_mode == 'QUATERNION':
+        quat = np.roll(_keyed(ob, 'rotation_quaternion', frames), -1, axis=1)
+        quat /= np.linalg.norm(quat, axis=1)[:, None]
+    else:
+        quat = euler_to_quat(np.tile(list(ob.rotation_euler), (len(frames), 1)), ob.rotation_mode.lower())
+    local = _matrix(_keyed(ob, 'location', frames), quat, list(ob.scale))
+    return local if ob.parent is None else _world(ob.parent, frames) @ local
+
+def _crafts(anim):
+    crafts = []
+    for name, flatten in (('rig', False), ('flat', True)):
+        ob = bpy.data.objects.new(name, None)
+        # the model's own offset, which the rig applies under the body frame
+        ob.location = (.4, 0, -.1)
+        ob.rotation_euler = (0, .7, .2)
+        crafts.append(bpsci_core.dyn_obj(ob, PA, COG, 'xyz', None, anim, flatten))
+    return crafts
+
+def _data(t):
+    return np.cos(t), np.sin(t), 0.2*t, euler2quat(0.3*t, 0.1*t, np.sin(t), 'zxz')
+
+def _assert_same_world(rig, flat, frames):
+    frames = np.unique(frames)
+    np.testing.assert_allclose(_world(flat.ob, frames), _world(rig.ob, frames), atol=1e-5)
+
+def test_flat_tracks_compose_the_rig():
+    t = np.linspace(0, 10, 50)
+    x, y, z, quat = _data(t)
+    frames = np.arange(len(t))
+    pa_quat = euler_to_quat(PA, 'xyz')
+    rest_loc, rest_quat = np.array([.4, 0, -.1]), euler_to_quat([0, .7, .2], 'xyz')
+    rot, loc, _ = flat_tracks(frames, x, y, z, quat, 2, pa_quat, COG, rest_loc, rest_quat)
+
+    non_rot = location_track(frames, x, y, z, 2)[0].values
+    pa = rotation_track(frames, quat)[0].values
+    for i in frames:
+        w, qx, qy, qz = pa[i]
+        rig = _matrix(non_rot[i]) @ _matrix(0, [qx, qy, qz, w]) @ _matrix(COG, -pa_quat) @ _matrix(rest_loc, rest_quat)
+        w, qx, qy, qz = rot.values[i]
+        np.testing.assert_allclose(_matrix(loc.values[i], [qx, qy, qz, w]), rig, atol=1e-12)
+
+def test_flatten_matches_rig():
+    t = np.linspace(0, 10, 240)
+    anim = bpsci_core.init_anim(t, 1, .5)
+    rig, flat = _crafts(anim)
+    for craft in (rig, flat):
+        craft.apply_animation(*_data(t), interpolation='LINEAR')
+    _assert_same_world(rig, flat, anim.frames)
+
+    t_new = np.linspace(10.05, 12, 40)
+    new_frames = anim.extend(t_new)
+    for craft in (rig, flat):
+        craft.extend(*_data(t_new))
+    _assert_same_world(rig, flat, new_frames)
+
+    # without rotation data the last rotation holds
+    t_more = np.linspace(12.05, 13, 20)
+    more_frames = anim.extend(t_more)
+    for craft in (rig, flat):
+        craft.extend(*_data(t_more)[:3], None)
+    _assert_same_world(rig, flat, more_frames)
+
+def test_set_pose_matches_rig():
+    rig, flat = _crafts(bpsci_core.init_anim(np.linspace(0, 1, 10), 1, .5))
+    _assert_same_world(rig, flat, [0])
+    quat = euler2quat(np.array([.3]), np.array([-.4]), np.array([1.2]), 'zxz')[0]
+    for craft in (rig, flat):
+        craft.set_pose((1, 2, 3), quat)
+    _assert_same_world(rig, flat, [0])
+    # the rotation is left as it is
+    for craft in (rig, flat):
+        craft.set_pose((-1, 0, 2))
+    _assert_same_world(rig, flat, [0])
@@ -0,0 +1,63 @@
+import bpy
+import numpy as np
+from numpy.testing import assert_allclose
+
+import bpsci.core as bpsci_core
+from bpsci.utils import euler2quat
+
+def _trajectory(n=50):
+    t = np.linspace(0, 10, n)
+    quat = euler2quat(0.3*t, 0.1*t, np.sin(t), 'zxz')
+    return t, np.cos(t), np.sin(t), 0.2*t, quat
+
+def _keys(bulk):
+    """Every keyframe written by apply_animation, by (data path, index)"""
+
+    bpy.reset()
+    t, x, y, z, quat = _trajectory()
+    craft = bpsci_core.dyn_obj(bpy.data.objects.new('craft', None), [.1, 0, 0], [.1, 0, 0], 'xyz', None,
+                               bpsci_core.init_anim(t, 1, 1))
+    craft.apply_animation(x, y, z, quat, bulk=bulk)
+
+    keys = {}
+    for action in bpy.data.actions:
+        for fc in action.fcurves:
+            fc.update()
+            points = fc.keyframe_points
+            keys[action.name, fc.data_path, fc.array_index] = (np.array([kp.co for kp in points]),
+                                                               [kp.interpolation for kp in points])
+    return keys
+
+def test_bulk_matches_per_frame():
+    per_frame, bulk = _keys(False), _keys(True)
+    assert per_frame.keys() == bulk.keys()
+    for path, (co, interpolation) in per_frame.items():
+        assert_allclose(bulk[path][0], co, atol=1e-6, err_msg=str(path))
+        assert bulk[path][1] == interpolation
+
+def test_bulk_buffers_are_float32(monkeypatch):
+    dtypes = []
+    for name in ('foreach_set', 'foreach_get'):
+        method = getattr(bpy.KeyframePoints, name)
+
+        def record(self, attr, seq, method=method):
+            if attr == 'co':
+                dtypes.append(np.asarray(seq).dtype)
+            return method(self, attr, seq)
+
+        monkeypatch.setattr(bpy.KeyframePoints, name, record)
+
+    ob = bpy.data.objects.new('ob', None)
+    bpsci_core.keyframe_bulk(ob, 'location', [1, 2], np.zeros((2, 3)))
+    # merged with the keys above, then appended after them
+    bpsci_core.keyframe_bulk(ob, 'location', [2, 3], np.ones((2, 3)))
+    bpsci_core.keyframe_bulk(ob, 'location', [5, 6], np.ones((2, 3)))
+    assert dtypes and all(dtype == np.float32 for dtype in dtypes)
+
+def test_bulk_merges_fractional_frames():
+    ob = bpy.data.objects.new('ob', None)
+    bpsci_core.keyframe_bulk(ob, 'location', [1.1, 2.3], np.zeros((2, 3)))
+    bpsci_core.keyframe_bulk(ob, 'location', [2.3, 0.5], np.ones((2, 3)))
+    fc = ob.animation_data.action.fcurves.find('location', index=0)
+    fc.update()
+    np.testing.assert_allclose([kp.co for kp in fc.keyframe_points], [[0.5, 1], [1.1, 0], [2.3, 1]], rtol=1e-6)
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from bpsci.plan import anim_clock, anim_plan, arc_length_frac, frame_windows, vector_tracks
+from bpsci.resample import euler_to_quat
+
+def _plan(n=200):
+    t = np.linspace(0, 20, n)
+    x, y, z = np.cos(t), np.sin(t), 0.1*t
+    quat = euler_to_quat(np.column_stack([0.2*t, 0.1*t, 0.05*t]), 'xyz')
+    plan = anim_plan(anim_clock(t, 1, 2, 24))
+    plan.dyn_obj('craft', x, y, z, quat)
+    plan.dyn_obj('probe', x, y, z, None, interpolation='LINEAR', pos_tol=1e-3)
+    plan.streamline('craft', 'dynamic', x, y, z, 0.1)
+    plan.anim_text('x', x, 'x = ', 2, False)
+    return plan
+
+def _assert_same(a, b):
+    assert a.tracks.keys() == b.tracks.keys()
+    for name, tracks in a.tracks.items():
+        assert tracks.keys() == b.tracks[name].keys()
+        for data_path, trk in tracks.items():
+            other = b.tracks[name][data_path]
+            np.testing.assert_array_equal(other.frames, trk.frames)
+            np.testing.assert_array_equal(other.values, trk.values)
+            assert other.interpolation == trk.interpolation
+    assert a.streamlines.keys() == b.streamlines.keys()
+    for name, streamline in a.streamlines.items():
+        np.testing.assert_array_equal(b.streamlines[name]['points'], streamline['points'])
+        assert b.streamlines[name]['thickness'] == streamline['thickness']
+    assert a.texts.keys() == b.texts.keys()
+    for name, table in a.texts.items():
+        np.testing.assert_array_equal(b.texts[name], table)
+    assert b.decimation == a.decimation
+    assert b.frame_range == a.frame_range
+
+def test_arc_length_frac():
+    x = np.array([0.0, 3.0, 3.0])
+    y = np.array([0.0, 4.0, 4.0])
+    z = np.array([0.0, 0.0, 5.0])
+    np.testing.assert_allclose(arc_length_frac(x, y, z), [0, 0.5, 1])
+
+def test_arc_length_frac_integer_input():
+    x = np.array([0, 3, 3])
+    y = np.array([0, 4, 4])
+    z = np.array([0, 0, 5])
+    np.testing.assert_allclose(arc_length_frac(x, y, z), [0, 0.5, 1])
+    np.testing.assert_allclose(arc_length_frac([0, 1, 2], [0, 0, 0], [0, 0, 0]), [0, 0.5, 1])
+
+def test_save_load_round_trip(tmp_path):
+    plan = _plan()
+    plan.save(str(tmp_path / 'plan.npz'))
+    loaded = anim_plan.load(str(tmp_path / 'plan.npz'))
+    _assert_same(plan, loaded)
+    np.testing.assert_array_equal(loaded.anim.t, plan.anim.t)
+    np.testing.assert_array_equal(loaded.anim.frames, plan.anim.frames)
+    assert loaded.anim.scale == plan.anim.scale
+
+def test_arrays_round_trip():
+    plan = _plan()
+    _assert_same(plan, anim_plan.from_arrays(*plan.to_arrays()))
+    window = plan.window(10, 40)
+    _assert_same(window, anim_plan.from_arrays(*window.to_arrays()))
+
+def test_frame_windows():
+    windows = frame_windows(1, 100, 3)
+    assert windows[0][0] == 1 and windows[-1][1] == 100
+    assert all(b[0] == a[1] + 1 for a, b in zip(windows[:-1], windows[1:]))
+    assert max(b - a for a, b in windows) - min(b - a for a, b in windows) <= 1
+    assert frame_windows(1, 3, 10) == [(1, 1), (2, 2), (3, 3)]
+
+def test_partition_covers_every_key():
+    plan = _plan()
+    windows = plan.partition(4)
+    trk = plan.tracks['craft_non_rot']['location']
+    frames = np.unique(np.concatenate([w.tracks['craft_non_rot']['location'].frames for w in windows]))
+    np.testing.assert_array_equal(frames, np.unique(trk.frames))
+    for window in windows:
+        start, end = window.frame_range
+        np.testing.assert_array_equal(window.texts['x_text'], plan.texts['x_text'][start - 1:end])
+
+def test_vector_tracks_max_mag_component():
+    anim = anim_clock(np.linspace(0, 1, 5), 1, 1, 24)
+    with pytest.raises(ValueError):
+        vector_tracks(anim, np.ones(5), np.ones(5), np.ones(5), 1, (0, 0, 0), max_mag=2)
+
+def test_timebase_matches_clock():
+    t = np.linspace(0, 100, 1001)
+    anim = anim_clock(t, 1, 1, 24)
+    np.testing.assert_array_equal(anim.timebase(t).frames, anim.frames)
+    np.testing.assert_array_equal(np.floor(anim.timebase(t, 'interpolated').frames), anim.frames)
+
+    # a slower log on the same clock lands on the frames of the shared samples at the same times
+    np.testing.assert_array_equal(anim.timebase(t[::7]).frames, anim.frames[::7])
+
+    t_new = np.linspace(100.05, 110, 200)
+    base = anim.timebase(t)
+    np.testing.assert_array_equal(base.extend(t_new), anim.extend(t_new))
@@ -0,0 +1,56 @@
+import bpy
+import numpy as np
+import pytest
+
+import bpsci.core as bpsci_core
+from bpsci import registry
+from bpsci.utils import erase_others
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    registry.teardown_all()
+    yield
+    registry.teardown_all()
+
+def _scene():
+    t = np.linspace(0, 10, 50)
+    anim = bpsci_core.init_anim(t, 1, 1)
+    model = bpy.data.objects.new('gallileo', None)
+    craft = bpsci_core.dyn_obj(model, [0, 0, 0], [0, 0, 0], 'xyz', None, anim)
+    craft.apply_animation(np.cos(t), np.sin(t), t, None)
+    craft.apply_streamline('dynamic', np.cos(t), np.sin(t), t, .1)
+    text = bpsci_core.anim_text('gallileo_x', None, anim, t, '', 1, False)
+    # objects of the user that merely contain the name
+    for name in ('gallileo_non_rot_notes', 'old_gallileo', 'gallileo.001'):
+        bpy.data.objects.new(name, None)
+    return craft, text
+
+def test_teardown_keeps_unowned_objects():
+    craft, text = _scene()
+    names = {ob.name for ob in bpy.data.objects}
+    action = craft.non_rot.ob.animation_data.action
+
+    removed = registry.teardown('gallileo')
+    left = {ob.name for ob in bpy.data.objects}
+    gone = {'gallileo_non_rot', 'gallileo_pa', 'gallileo_body', 'gallileo_streamline'}
+    assert left == names - gone
+    # the objects, the streamline's curve and the actions of the animated ones
+    assert removed == len(gone) + 1 + 2
+    assert action is not None and not any(act is action for act in bpy.data.actions)
+    assert 'gallileo' not in registry.owners()
+
+    # the text is another entity and keeps its handler
+    assert text.obj.name in registry.owners()
+    assert bpsci_core._update_texts in bpy.app.handlers.frame_change_pre
+    registry.teardown(text.obj.name)
+    assert bpsci_core._update_texts not in bpy.app.handlers.frame_change_pre
+    assert text.obj.name not in {ob.name for ob in bpy.data.objects}
+
+def test_erase_others_without_registry():
+    _scene()
+    names = {ob.name for ob in bpy.data.objects}
+    # a freshly opened file: nothing is registered, only the exact rig names are removed
+    registry.forget('gallileo')
+    erase_others('gallileo')
+    assert {ob.name for ob in bpy.data.objects} == names - {'gallileo_non_rot', 'gallileo_pa', 'gallileo_body',
+                                                            'gallileo_streamline'}
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from bpsci.resample import derivative, euler_to_quat, interp_linear, quat_rotate, quat_to_euler, resample, slerp
+
+def test_euler_to_quat():
+    np.testing.assert_allclose(euler_to_quat([np.pi/2, 0, 0], 'xyz'), [np.sqrt(.5), 0, 0, np.sqrt(.5)])
+    # about the fixed axes: x first, then z
+    quat = euler_to_quat([np.pi/2, 0, np.pi/2], 'xyz')
+    np.testing.assert_allclose(quat_rotate(quat, [1, 0, 0]), [0, 1, 0], atol=1e-12)
+    with pytest.raises(ValueError):
+        euler_to_quat([0, 0, 0], 'xxy')
+
+def test_euler_round_trip():
+    angles = np.random.default_rng(0).uniform(-1, 1, (50, 3))
+    np.testing.assert_allclose(quat_to_euler(euler_to_quat(angles, 'xyz')), angles, atol=1e-12)
+
+def test_euler_to_quat_matches_scipy():
+    Rotation = pytest.importorskip('scipy.spatial.transform').Rotation
+    angles = np.random.default_rng(1).uniform(-3, 3, (50, 3))
+    for order in ('xyz', 'zxz', 'ZYX'):
+        np.testing.assert_allclose(euler_to_quat(angles, order), Rotation.from_euler(order, angles).as_quat(),
+                                   atol=1e-12)
+
+def test_interp_linear():
+    xp = np.array([0.0, 1.0, 1.0, 3.0])
+    fp = np.array([0.0, 1.0, 2.0, 6.0])
+    # extrapolates the first and last segments, repeated sample points are allowed
+    np.testing.assert_allclose(interp_linear([-1, 0.5, 2, 4], xp, fp), [-1, 0.5, 4, 8])
+    np.testing.assert_allclose(interp_linear([0, 5], [2.0], [7.0]), [7, 7])
+
+def test_resample():
+    t = np.linspace(0, 1, 11)
+    values = np.column_stack([t, 2*t])
+    np.testing.assert_allclose(resample(values, t, [0.25, 2]), [[0.25, 0.5], [1, 2]])
+    with pytest.raises(ValueError):
+        resample(values, t, t, kind='nearest')
+
+def test_derivative():
+    t = np.linspace(0, 1, 101)
+    np.testing.assert_allclose(derivative(t**2, t), 2*t, atol=1e-2)
+
+def test_slerp():
+    quat = np.array([[0, 0, 0, 1], [0, 0, np.sin(np.pi/4), np.cos(np.pi/4)]])
+    np.testing.assert_allclose(slerp(quat, [0, 1], np.array([0.5])), [[0, 0, np.sin(np.pi/8), np.cos(np.pi/8)]])
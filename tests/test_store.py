@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from bpsci.store import column_store, convert_csv, open_csv
+
+def _write_csv(path, n=1000):
+    t = np.arange(n)*0.5
+    x = np.sin(t)
+    with open(path, 'w') as f:
+        f.write('t,x,label\n')
+        for row in zip(t, x):
+            f.write('%.17g,%.17g,a\n' % row)
+    return t, x
+
+def test_convert_round_trip(tmp_path):
+    t, x = _write_csv(str(tmp_path / 'data.csv'))
+    # a chunk size that does not divide the number of rows
+    store = convert_csv(str(tmp_path / 'data.csv'), str(tmp_path / 'store'), columns=['t', 'x'], chunk_rows=77)
+    assert len(store) == len(t)
+    assert store.columns == ['t', 'x']
+    np.testing.assert_array_equal(store['t'], t)
+    np.testing.assert_array_equal(store['x'], x)
+
+    reopened = column_store(str(tmp_path / 'store'))
+    np.testing.assert_array_equal(reopened['x'], x)
+    with pytest.raises(KeyError):
+        reopened['label']
+
+def test_missing_column(tmp_path):
+    _write_csv(str(tmp_path / 'data.csv'))
+    with pytest.raises(KeyError):
+        convert_csv(str(tmp_path / 'data.csv'), str(tmp_path / 'store'), columns=['t', 'y'])
+
+def test_open_csv_reconverts_on_change(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    _write_csv(path, 10)
+    store = open_csv(path, columns=['t', 'x'])
+    assert store.directory == str(tmp_path / 'data.columns')
+    assert len(store) == 10
+    assert len(open_csv(path, columns=['t'])) == 10
+
+    t, _ = _write_csv(path, 20)
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+    store = open_csv(path, columns=['t', 'x'])
+    assert len(store) == 20
+    np.testing.assert_array_equal(store['t'], t)
+
+def test_select(tmp_path):
+    t, x = _write_csv(str(tmp_path / 'data.csv'), 10)
+    store = convert_csv(str(tmp_path / 'data.csv'), str(tmp_path / 'store'), columns=['t', 'x'])
+    selected = store.select({'x_list': 'x', 'quat_list': None}, pair=('t', 'x'))
+    np.testing.assert_array_equal(selected['x_list'], x)
+    assert selected['quat_list'] is None
+    np.testing.assert_array_equal(selected['pair'], np.column_stack([t, x]))
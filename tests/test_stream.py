@@ -0,0 +1,49 @@
+import io
+
+import numpy as np
+
+from bpsci.stream import ring_buffer, telemetry_source
+
+def _rows(a, b):
+    return np.column_stack([np.arange(a, b), 10*np.arange(a, b)])
+
+def test_ring_buffer_wraps_around():
+    buf = ring_buffer(5, 2)
+    assert len(buf.latest(3)) == 0
+
+    buf.push(_rows(0, 3))
+    np.testing.assert_array_equal(buf.latest(5), _rows(0, 3))
+
+    # crosses the end of the storage
+    buf.push(_rows(3, 7))
+    assert buf.count == 7
+    np.testing.assert_array_equal(buf.latest(5), _rows(2, 7))
+    np.testing.assert_array_equal(buf.latest(2), _rows(5, 7))
+    np.testing.assert_array_equal(buf.data[:2], _rows(5, 7))
+
+    rows, count = buf.since(4)
+    np.testing.assert_array_equal(rows, _rows(4, 7))
+    assert count == 7
+    # rows that were overwritten are gone, the rest is returned
+    rows, _ = buf.since(0)
+    np.testing.assert_array_equal(rows, _rows(2, 7))
+    assert len(buf.since(7)[0]) == 0
+
+def test_ring_buffer_push_more_than_capacity():
+    buf = ring_buffer(4, 2)
+    buf.push(_rows(0, 3))
+    buf.push(_rows(3, 13))
+    assert buf.count == 13
+    np.testing.assert_array_equal(buf.latest(4), _rows(9, 13))
+    np.testing.assert_array_equal(buf.since(11)[0], _rows(11, 13))
+    # memory stays bounded however much is pushed
+    assert buf.data.shape == (4, 2)
+
+def test_telemetry_source():
+    stream = io.BytesIO(b't,x\n0,1\n1,2\nbad,row\n2\n2,3\n3,4\n')
+    with telemetry_source(stream, capacity=3) as source:
+        source._thread.join(5)
+    assert source.error is None
+    assert source.columns == ['t', 'x']
+    assert source.skipped == 2
+    np.testing.assert_array_equal(source.buffer.latest(3), [[1, 2], [2, 3], [3, 4]])
@@ -0,0 +1,26 @@
+import bpy
+import numpy as np
+
+import bpsci.core as bpsci_core
+from bpsci.plan import streamline_points
+
+def test_spline_buffers_are_float32(monkeypatch):
+    dtypes = []
+    for name in ('foreach_set', 'foreach_get'):
+        method = getattr(bpy.SplinePoints, name)
+
+        def record(self, attr, seq, method=method):
+            dtypes.append(np.asarray(seq).dtype)
+            return method(self, attr, seq)
+
+        monkeypatch.setattr(bpy.SplinePoints, name, record)
+
+    t = np.linspace(0, 1, 10)
+    coords = streamline_points(t, 2*t, 3*t, 0.5)
+    assert coords.dtype == np.float32
+    obj = bpsci_core.new_streamline('line', coords[:6], 0.1)
+    spline = obj.data.splines[0]
+    bpsci_core.extend_spline(spline, coords[6:])
+
+    assert dtypes and all(dtype == np.float32 for dtype in dtypes)
+    np.testing.assert_array_equal(spline.points._co, coords)
@@ -0,0 +1,45 @@
+import bpy
+import numpy as np
+
+import bpsci.core as bpsci_core
+from bpsci.resample import euler_to_quat, quat_rotate, slerp
+
+def _swarm(quats=True):
+    t = np.linspace(0, 1, 13)
+    anim = bpsci_core.init_anim(t, 1/12, 1)
+    positions = np.stack([np.column_stack([t, 2*t, 0*t]), np.column_stack([0*t, 0*t, -t])])
+    angle = np.pi/2*t
+    quat = np.stack([np.column_stack([0*t, 0*t, np.sin(angle/2), np.cos(angle/2)]),
+                     np.tile([0, 0, 0, 1.0], (len(t), 1))])
+    instance = bpy.data.objects.new('rock', None)
+    return t, bpsci_core.swarm('rocks', instance, None, anim, positions, quat if quats else None), positions, quat
+
+def test_positions_between_frames():
+    t, sw, positions, _ = _swarm(quats=False)
+    assert 'bpsci_rotation' not in sw.ob.data.attributes
+    for frame in (sw.key_frames[0], sw.key_frames[4], (sw.key_frames[4] + sw.key_frames[5])/2, 1e6):
+        sw.set_frame(frame)
+        u = np.interp(frame, sw.key_frames, t[sw.key_index.astype(int)])
+        expected = [[u, 2*u, 0], [0, 0, -u]]
+        np.testing.assert_allclose(sw.ob.data.vertices._co, expected, rtol=1e-6, atol=1e-7)
+
+def test_rotations_between_frames():
+    t, sw, _, quat = _swarm()
+    a, b = sw.key_frames[4], sw.key_frames[5]
+    for frame in (a, (a + b)/2, b):
+        sw.set_frame(frame)
+        rot = sw.ob.data.attributes['bpsci_rotation'].values.reshape(2, 3).astype(float)
+        u = np.interp(frame, sw.key_frames, t[sw.key_index.astype(int)])
+        for body in range(2):
+            expected = slerp(quat[body], t, np.array([u]))[0]
+            # the angles turn the axes like the interpolated quaternion (normalized lerp, so within a small angle)
+            np.testing.assert_allclose(quat_rotate(euler_to_quat(rot[body], 'xyz'), np.eye(3)),
+                                       quat_rotate(expected, np.eye(3)), atol=1e-3)
+
+def test_handler_moves_every_swarm():
+    _, sw, _, _ = _swarm()
+    _, other, _, _ = _swarm()
+    assert bpy.app.handlers.frame_change_pre.count(bpsci_core._update_swarms) == 1
+    bpy.context.scene.frame_set(int(sw.key_frames[3]))
+    for s in (sw, other):
+        np.testing.assert_allclose(s.ob.data.vertices._co, s.positions[3], rtol=1e-6)
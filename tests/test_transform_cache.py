@@ -0,0 +1,50 @@
+import os
+
+import bpy
+import numpy as np
+
+import bpsci.core as bpsci_core
+from bpsci.utils import euler2quat
+
+def _craft(flatten):
+    t = np.linspace(0, 10, 240)
+    anim = bpsci_core.init_anim(t, 1, 1)
+    craft = bpsci_core.dyn_obj(bpy.data.objects.new('craft', None), [.1, 0, 0], [.1, .2, 0], 'xyz', None, anim,
+                               flatten)
+    quat = euler2quat(0.3*t, 0.1*t, np.sin(t), 'zxz')
+    return craft, (np.cos(t), np.sin(t), 0.2*t, quat)
+
+def _keys(ob, data_path):
+    fcurves = [fc for fc in ob.animation_data.action.fcurves if fc.data_path == data_path]
+    for fc in fcurves:
+        fc.update()
+    frames = np.array([kp.co[0] for kp in fcurves[0].keyframe_points])
+    values = np.column_stack([[kp.co[1] for kp in fc.keyframe_points] for fc in fcurves])
+    return frames, values
+
+def test_cache_matches_keyframes(tmp_path):
+    for flatten in (False, True):
+        bpy.reset()
+        craft, data = _craft(flatten)
+        keyed = craft.apply_animation(*data, interpolation='LINEAR', pos_tol=1e-3, ang_tol=1e-3)
+        objects = [craft.ob] if flatten else [craft.non_rot.ob, craft.pa_axes.ob]
+        keys = {(ob.name, fc.data_path): _keys(ob, fc.data_path) for ob in objects
+                for fc in ob.animation_data.action.fcurves}
+
+        bpy.reset()
+        craft, data = _craft(flatten)
+        cached = craft.apply_animation(*data, interpolation='LINEAR', pos_tol=1e-3, ang_tol=1e-3,
+                                       cache_dir=str(tmp_path))
+        assert cached == keyed
+
+        for ob in objects:
+            table = np.load(os.path.join(str(tmp_path), ob.name + '.npy'))
+            start = bpy.data.objects[ob.name]['bpsci_cache_start']
+            column = 0
+            for path in bpy.data.objects[ob.name]['bpsci_cache_paths'].split():
+                frames, values = keys[ob.name, path]
+                rows = table[frames.astype(int) - start, column:column + values.shape[1]]
+                # the decimated keys land on whole frames, where the cache holds them as they are
+                np.testing.assert_allclose(rows, values, atol=1e-6)
+                column += values.shape[1]
+            assert column == table.shape[1]
@@ -0,0 +1,44 @@
+import numpy as np
+
+from bpsci.tube import prefix_quat, sweep, tube_faces
+from bpsci.resample import quat_multiply
+
+def _helix(n=500):
+    t = np.linspace(0, 6*np.pi, n)
+    return np.column_stack([np.cos(t), np.sin(t), 0.2*t])
+
+def test_chunks_do_not_change_the_tube():
+    points = _helix()
+    verts, faces = sweep(points, 0.1, sides=6)
+    chunked, chunked_faces = sweep(points, 0.1, sides=6, chunk_rows=37)
+    np.testing.assert_allclose(chunked, verts, atol=1e-5)
+    np.testing.assert_array_equal(chunked_faces, faces)
+
+def test_rings():
+    points = _helix()
+    verts, faces = sweep(points, 0.1, sides=8)
+    rings = verts.reshape(len(points), 8, 3) - points[:, None, :]
+    np.testing.assert_allclose(np.linalg.norm(rings, axis=2), 0.1, rtol=1e-5)
+
+    # every ring is perpendicular to the tangent of the path
+    tangents = np.gradient(points, axis=0)
+    tangents /= np.linalg.norm(tangents, axis=1)[:, None]
+    assert np.abs(np.einsum('ijk,ik->ij', rings, tangents)[1:-1]).max() < 1e-3
+    assert faces.shape == ((len(points) - 1)*8, 4)
+
+def test_repeated_points():
+    points = np.array([[0, 0, 0], [0, 0, 0], [1, 0, 0], [1, 0, 0], [2, 0, 0]], dtype=float)
+    verts, _ = sweep(points, 1.0, sides=4)
+    assert np.isfinite(verts).all()
+    np.testing.assert_allclose(verts.reshape(5, 4, 3)[:, :, 0], points[:, :1].repeat(4, axis=1), atol=1e-6)
+
+def test_prefix_quat():
+    quat = np.random.default_rng(0).normal(size=(13, 4))
+    quat /= np.linalg.norm(quat, axis=1)[:, None]
+    chained = [quat[0]]
+    for q in quat[1:]:
+        chained.append(quat_multiply(q, chained[-1]))
+    np.testing.assert_allclose(prefix_quat(quat), chained, atol=1e-12)
+
+def test_tube_faces():
+    np.testing.assert_array_equal(tube_faces(2, 3), [[0, 1, 4, 3], [1, 2, 5, 4], [2, 0, 3, 5]])
@@ -0,0 +1,13 @@
+import numpy as np
+
+from bpsci.utils import read_obj
+
+def test_read_obj(tmp_path):
+    path = tmp_path / 'model.obj'
+    path.write_text('v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n'
+                    'v 0 0 1\nf -4/1 -3/2 -1/3\nf 2//1 3//1 4//1\n')
+    verts, faces = read_obj(str(path))
+    # -Z forward, Y up: y is the OBJ z, z is the OBJ y
+    np.testing.assert_allclose(verts, [[0, 0, 0], [1, 0, 0], [0, 0, 1], [0, -1, 0]])
+    # negative indices count back from the vertices read before the face
+    assert [list(face) for face in faces] == [[0, 1, 2], [0, 1, 3], [1, 2, 3]]
@@ -0,0 +1,45 @@
+import bpy
+import numpy as np
+
+import bpsci.core as bpsci_core
+from bpsci.resample import euler_to_quat, quat_rotate
+
+def _attributes(field):
+    me = field.ob.data
+    return {name: me.attributes[name].values.reshape(len(me.vertices), -1) for name in
+            ('bpsci_rotation', 'bpsci_scale', 'bpsci_direction', 'bpsci_magnitude')}
+
+def test_per_point_attributes():
+    t = np.linspace(0, 1, 25)
+    anim = bpsci_core.init_anim(t, 1/24, 2)
+    positions = np.stack([np.column_stack([t, 0*t, 0*t]), np.column_stack([0*t, t, 0*t]), np.zeros((25, 3))])
+    vectors = np.stack([np.column_stack([0*t, 3 + 0*t, 4 + 0*t]), np.column_stack([t, -t, 0*t]), np.zeros((25, 3))])
+    field = bpsci_core.vector_field('field', None, anim, positions, vectors, scale_mag=2, scale_off=.5)
+    assert field.max_mag == 5
+
+    for frame in (field.key_frames[3], (field.key_frames[3] + field.key_frames[4])/2):
+        field.set_frame(frame)
+        attrs = _attributes(field)
+        u = np.interp(frame, field.key_frames, t[field.key_index.astype(int)])
+        pos = np.interp(frame, field.key_frames, field.positions[:, 0, 0])
+        np.testing.assert_allclose(field.ob.data.vertices._co[0], [pos, 0, 0], rtol=1e-6)
+
+        vec = np.array([[0, 3, 4], [u, -u, 0], [0, 0, 0]])
+        mag = np.linalg.norm(vec, axis=1)
+        np.testing.assert_allclose(attrs['bpsci_magnitude'].ravel(), mag, rtol=1e-6)
+        np.testing.assert_allclose(attrs['bpsci_direction'][:2], vec[:2]/mag[:2, None], rtol=1e-6)
+        np.testing.assert_allclose(attrs['bpsci_scale'][:, 0], mag/5*2, rtol=1e-6)
+        np.testing.assert_allclose(attrs['bpsci_scale'][:, 1:], .5)
+
+        # each arrow's x axis is turned onto its vector, a zero vector leaves it unrotated
+        x_axis = quat_rotate(euler_to_quat(attrs['bpsci_rotation'].astype(float), 'xyz'), [1, 0, 0])
+        np.testing.assert_allclose(x_axis[:2], vec[:2]/mag[:2, None], atol=1e-6)
+        np.testing.assert_allclose(attrs['bpsci_rotation'][2], 0)
+        np.testing.assert_allclose(attrs['bpsci_direction'][2], 0)
+
+def test_from_positions():
+    t = np.linspace(0, 2, 49)
+    anim = bpsci_core.init_anim(t, 1/24, 1)
+    positions = np.stack([np.column_stack([t**2, 3*t, 0*t])])
+    field = bpsci_core.vector_field.from_positions('velocity', None, anim, positions)
+    np.testing.assert_allclose(field.vectors[5:-5, 0], np.column_stack([2*t, 3 + 0*t, 0*t])[5:-5], atol=1e-3)